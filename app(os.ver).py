@@ -1,13 +1,38 @@
-import streamlit as st
-from openai import OpenAI
-import re
-import time
-import os
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.errors import HttpError
 import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import streamlit as st
+
+import llm_client
+import llm_scheduler
+import metrics
+import ui_assets
+from chunking import chunk_text, estimate_tokens
+from doc_extractor import DOCUMENT_FIELDS, KIND_TOC, blocks_to_text, extract_blocks
+from doc_snapshot import DOCS_VERSION_FIELDS, DocumentSnapshotCache, docs_version
+from hedging import HedgePolicy
+from insertion_planner import (
+    EDGE_END,
+    build_requests,
+    drop_applied,
+    is_revision_conflict,
+    leading_anchor,
+    plan_insertions,
+    relocate,
+    split_batches,
+)
+from paragraph_store import (
+    FEEDBACK_HEADER_PREFIX,
+    FEEDBACK_SEPARATOR,
+    ParagraphStore,
+    diff_paragraphs,
+    make_scope,
+)
+from prompt_cache import get_prompt_cache_stats
+from resilience import call_with_retry, is_outcome_unknown, status_code
+from template_index import build_template_index, parse_doc_ids, skipped_tokens
 
 # 페이지 설정
 st.set_page_config(
@@ -17,110 +42,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS 스타일링
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        color: #2E86AB;
-        font-size: 2.5rem;
-        margin-bottom: 1rem;
-        font-weight: bold;
-    }
-    .sub-header {
-        text-align: center;
-        color: #666;
-        font-size: 1.2rem;
-        margin-bottom: 2rem;
-    }
-    .success-box {
-        background-color: #d4edda;
-        color: #155724;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #28a745;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #d1ecf1;
-        color: #0c5460;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #17a2b8;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        color: #856404;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #ffc107;
-        margin: 1rem 0;
-    }
-    .error-box {
-        background-color: #f8d7da;
-        color: #721c24;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #dc3545;
-        margin: 1rem 0;
-    }
-    .step-box {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-        border: 1px solid #dee2e6;
-    }
-    .feedback-section {
-        background-color: #f8f9fa;
-        padding: 2rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        border: 1px solid #dee2e6;
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS 스타일링 (고정 화면 요소는 ui_assets에서 한 번만 만듦)
+st.markdown(ui_assets.GENRE_CSS, unsafe_allow_html=True)
 
 # 타이틀
-st.markdown('<h1 class="main-header">📝 AI 글쓰기 평가 시스템</h1>', unsafe_allow_html=True)
-st.markdown('<p class="sub-header">Google Docs 문서에 AI가 장르별 맞춤 평가를 제공합니다</p>', unsafe_allow_html=True)
+st.markdown(ui_assets.GENRE_HEADER, unsafe_allow_html=True)
 
 # 사용법 안내
 with st.expander("📖 사용법 안내", expanded=True):
-    st.markdown("""
-    ### 🚀 빠른 시작 가이드
-    
-    <div class='step-box'>
-    <b>1단계: Google Docs 문서 준비</b>
-    <ul>
-    <li>평가받고 싶은 Google Docs 문서를 준비합니다</li>
-    <li>문서를 열고 우측 상단의 '공유' 버튼을 클릭합니다</li>
-    <li>'링크 복사'를 클릭하거나, 특정 사용자에게 '편집자' 권한을 부여합니다</li>
-    <li><b>중요:</b> 이 앱의 서비스 계정에 '편집자' 권한이 있어야 피드백을 추가할 수 있습니다</li>
-    </ul>
-    </div>
-    
-    <div class='step-box'>
-    <b>2단계: 글의 장르 선택</b>
-    <ul>
-    <li>감상문: 독서감상문, 영화감상문 등</li>
-    <li>비평문: 문학비평, 예술비평 등</li>
-    <li>보고서: 실험보고서, 조사보고서 등</li>
-    <li>소논문: 학술적 논문, 연구논문 등</li>
-    <li>논설문: 주장과 논거를 담은 글</li>
-    </ul>
-    </div>
-    
-    <div class='step-box'>
-    <b>3단계: 평가 요청</b>
-    <ul>
-    <li>Google Docs URL을 입력하고 '평가 요청' 버튼을 클릭합니다</li>
-    <li>AI가 문서를 분석하고 장르별 구조적 원리에 따라 평가합니다</li>
-    <li>평가 결과가 문서에 직접 삽입됩니다</li>
-    </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(ui_assets.GENRE_GUIDE, unsafe_allow_html=True)
 
 # Google Docs 인증 설정
 @st.cache_resource
@@ -135,6 +65,10 @@ def get_google_service():
             st.error("Google 서비스 계정 정보가 없습니다.")
             return None
         
+        # Google 라이브러리는 처음 문서를 읽을 때 불러옴 (첫 화면 표시를 늦추지 않도록)
+        from google.oauth2.service_account import Credentials
+        from googleapiclient.discovery import build
+        
         # 문서 편집을 위한 권한
         creds = Credentials.from_service_account_info(
             service_account_info,
@@ -150,6 +84,26 @@ def get_google_service():
         st.error(f"Google 서비스 초기화 실패: {str(e)}")
         return None
 
+@st.cache_resource
+def get_hedge_policy():
+    """프로세스 전체에서 공유하는 중복 전송 기준 (최근 지연 기록과 예산 유지)"""
+    return HedgePolicy()
+
+@st.cache_resource
+def get_template_index(_service):
+    """보고서 템플릿 문단 색인 (한 번만 만들며, 템플릿을 읽지 못하면 예외가 나고 다음에 다시 시도)"""
+    return build_template_index(_service, parse_doc_ids(os.environ.get("TEMPLATE_DOC_IDS")))
+
+@st.cache_resource
+def get_snapshot_cache():
+    """바뀌지 않은 문서를 다시 읽지 않기 위한 문서 스냅숏 캐시 (프로세스 전체 공유)"""
+    return DocumentSnapshotCache()
+
+@st.cache_resource
+def get_paragraph_store():
+    """증분 분석용 문단 저장소 (프로세스 전체 공유)"""
+    return ParagraphStore()
+
 def extract_document_id(url):
     """Google Docs URL에서 문서 ID 추출"""
     patterns = [
@@ -165,110 +119,157 @@ def extract_document_id(url):
             return match.group(1)
     return None
 
-def get_document_content(service, document_id):
-    """Google Docs 문서 내용과 구조 가져오기"""
+def get_document_content(service, document_id, snapshots=None):
+    """Google Docs 문서 제목, 블록 목록, 수정본 ID 가져오기
+    
+    snapshots(DocumentSnapshotCache)를 주면 수정본 ID만 먼저 확인하여
+    지난번에 읽은 뒤 바뀌지 않은 문서는 다시 읽지 않습니다
+    (처음 읽는 문서는 확인 요청 없이 바로 전체를 읽음).
+    """
     try:
-        document = service.documents().get(documentId=document_id).execute()
+        with metrics.timed('fetch') as span:
+            document = None
+            head = None
+            if snapshots is not None and snapshots.has(document_id):
+                head = call_with_retry('docs.read', service.documents().get(
+                    documentId=document_id,
+                    fields=DOCS_VERSION_FIELDS
+                ).execute, span=span)
+                document = snapshots.get(document_id, docs_version(head))
+            
+            if document is None:
+                # 필요한 필드만 요청
+                document = call_with_retry('docs.read', service.documents().get(
+                    documentId=document_id,
+                    fields=DOCUMENT_FIELDS
+                ).execute, span=span)
+                span.bytes_received = metrics.payload_bytes(document)
+                if snapshots is not None:
+                    snapshots.set(document_id, docs_version(document), document)
+                    span.calls = 2 if head is not None else 1
+            else:
+                metrics.count('doc_snapshot', result='hit')
+                span.bytes_received = metrics.payload_bytes(head)
         
         title = document.get('title', '제목 없음')
-        content_with_positions = []
+        revision_id = document.get('revisionId')
         
-        for element in document.get('body', {}).get('content', []):
-            if 'paragraph' in element:
-                paragraph_text = []
-                start_index = element.get('startIndex', 0)
-                end_index = element.get('endIndex', 0)
-                
-                for text_element in element['paragraph'].get('elements', []):
-                    if 'textRun' in text_element:
-                        text = text_element['textRun'].get('content', '')
-                        if text.strip():
-                            paragraph_text.append(text)
-                
-                if paragraph_text:
-                    full_text = ''.join(paragraph_text)
-                    content_with_positions.append({
-                        'text': full_text,
-                        'start': start_index,
-                        'end': end_index
-                    })
+        # 문단과 표를 블록 단위로 추출 (목차는 평가 대상에서 제외)
+        content_with_positions = [
+            block for block in extract_blocks(document)
+            if block['kind'] != KIND_TOC
+        ]
         
-        return title, content_with_positions
+        return title, content_with_positions, revision_id
     except Exception as e:
         st.error(f"문서 읽기 오류: {str(e)}")
-        return None, None
+        return None, None, None
+
+# 삽입한 피드백 스타일 (파란 글씨, 연한 파란 배경, 기울임)
+FEEDBACK_TEXT_STYLE = {
+    'foregroundColor': {
+        'color': {
+            'rgbColor': {
+                'red': 0.0,
+                'green': 0.0,
+                'blue': 0.8
+            }
+        }
+    },
+    'backgroundColor': {
+        'color': {
+            'rgbColor': {
+                'red': 0.95,
+                'green': 0.95,
+                'blue': 1.0
+            }
+        }
+    },
+    'italic': True
+}
+FEEDBACK_STYLE_FIELDS = 'foregroundColor,backgroundColor,italic'
+
+# 삽입 중 문서가 바뀌었거나 적용 여부를 모를 때 남은 피드백을 다시 계획하는 최대 횟수
+MAX_INSERT_REPLANS = 3
 
-def insert_feedback_to_doc(service, document_id, feedbacks):
-    """Google Docs에 피드백 직접 삽입"""
+def format_feedback_text(feedback):
+    """문서에 삽입할 피드백 텍스트 포맷팅"""
+    return f"\n\n{FEEDBACK_HEADER_PREFIX}{feedback['type']}]\n{feedback['content']}\n{FEEDBACK_SEPARATOR}\n"
+
+def insert_feedback_to_doc(service, document_id, feedbacks, revision_id=None):
+    """Google Docs에 피드백 직접 삽입
+    
+    revision_id(문서를 읽을 때의 수정본)를 넘기면 그 뒤 문서가 바뀐 경우 바뀐 위치에 맞춰 삽입합니다.
+    시간 초과나 5xx로 적용 여부를 모르는 묶음은 그대로 다시 보내지 않고, 문서를 다시 읽어
+    아직 들어가지 않은 피드백만 보냅니다.
+    """
     try:
-        requests = []
+        items = [
+            {
+                'index': feedback['insert_at'],
+                'text': format_feedback_text(feedback),
+                'anchor': feedback.get('anchor'),
+            }
+            for feedback in feedbacks
+        ]
         
-        # 피드백을 역순으로 삽입 (문서 끝부터 시작하여 인덱스가 밀리지 않도록)
-        for feedback in reversed(feedbacks):
-            # 피드백 텍스트 포맷팅
-            feedback_text = f"\n\n[AI 평가 - {feedback['type']}]\n{feedback['content']}\n" + "-" * 50 + "\n"
-            
-            # 텍스트 삽입 요청
-            requests.append({
-                'insertText': {
-                    'location': {
-                        'index': feedback['insert_at']
-                    },
-                    'text': feedback_text
-                }
-            })
+        # 위치 내림차순으로 정렬·병합하고 크기 제한에 맞춰 여러 번의 batchUpdate로 나눔
+        batches = split_batches(plan_insertions(items))
+        if not batches:
+            return False
+        
+        replans = 0
+        skipped = []
+        while batches:
+            batch = batches[0]
+            body = {'requests': build_requests(batch, FEEDBACK_TEXT_STYLE, FEEDBACK_STYLE_FIELDS)}
+            if revision_id:
+                body['writeControl'] = {'requiredRevisionId': revision_id}
+            try:
+                with metrics.timed('insert') as span:
+                    span.bytes_sent = metrics.payload_bytes(body)
+                    # 다시 보내면 피드백이 두 번 들어가므로 처리되지 않은 것이 확실한 오류(429 등)만 재시도
+                    result = call_with_retry('docs.write', service.documents().batchUpdate(
+                        documentId=document_id,
+                        body=body
+                    ).execute, span=span, idempotent=False)
+            except Exception as e:
+                conflict = bool(revision_id) and is_revision_conflict(e)
+                if not (conflict or is_outcome_unknown(e)) or replans >= MAX_INSERT_REPLANS:
+                    raise
+                # 그 사이 문서가 바뀌었거나 적용 여부를 모름: 문서를 다시 읽어 남은 삽입만 새 위치로 다시 계획
+                replans += 1
+                metrics.count('insert_replan', reason='revision_conflict' if conflict else 'unknown_outcome')
+                with metrics.timed('fetch') as span:
+                    document = call_with_retry('docs.read', service.documents().get(
+                        documentId=document_id,
+                        fields=DOCUMENT_FIELDS
+                    ).execute, span=span)
+                revision_id = document.get('revisionId')
+                blocks = extract_blocks(document)
+                remaining = [item for pending in batches for insertion in pending for item in insertion['items']]
+                # 충돌 직전에 보낸 묶음도 응답만 받지 못하고 적용되었을 수 있으므로, 기준 문단을 다시 찾기 전에
+                # 이미 들어간 피드백(머리말부터 구분선까지 그대로 있는 것)은 뺌
+                remaining, _ = drop_applied(remaining, blocks)
+                moved, missing = relocate(remaining, blocks)
+                skipped.extend(missing)
+                batches = split_batches(plan_insertions(moved))
+                continue
             
-            # 피드백 스타일 적용 (색상과 배경)
-            text_length = len(feedback_text)
-            requests.append({
-                'updateTextStyle': {
-                    'range': {
-                        'startIndex': feedback['insert_at'],
-                        'endIndex': feedback['insert_at'] + text_length
-                    },
-                    'textStyle': {
-                        'foregroundColor': {
-                            'color': {
-                                'rgbColor': {
-                                    'red': 0.0,
-                                    'green': 0.0,
-                                    'blue': 0.8
-                                }
-                            }
-                        },
-                        'backgroundColor': {
-                            'color': {
-                                'rgbColor': {
-                                    'red': 0.95,
-                                    'green': 0.95,
-                                    'blue': 1.0
-                                }
-                            }
-                        },
-                        'italic': True
-                    },
-                    'fields': 'foregroundColor,backgroundColor,italic'
-                }
-            })
+            # 다음 묶음은 방금 만든 수정본을 기준으로 확인
+            revision_id = (result.get('writeControl') or {}).get('requiredRevisionId') or revision_id
+            batches.pop(0)
         
-        # 문서 업데이트 실행
-        if requests:
-            result = service.documents().batchUpdate(
-                documentId=document_id,
-                body={'requests': requests}
-            ).execute()
-            return True
-        return False
+        if skipped:
+            st.warning(f"⚠️ 평가 중 문서가 수정되어 {len(skipped)}개의 피드백 위치를 찾지 못했습니다.")
+        return True
         
-    except HttpError as e:
-        if e.resp.status == 403:
+    except Exception as e:
+        if status_code(e) == 403:
             st.error("❌ 문서를 편집할 권한이 없습니다. 문서에 '편집자' 권한을 부여해주세요.")
         else:
             st.error(f"피드백 삽입 중 오류 발생: {str(e)}")
         return False
-    except Exception as e:
-        st.error(f"피드백 삽입 중 오류 발생: {str(e)}")
-        return False
 
 # 글의 장르와 평가 기준
 GENRES = {
@@ -279,7 +280,13 @@ GENRES = {
             "전개부: 인상 깊은 장면/내용과 개인적 감상",
             "결론부: 작품이 주는 교훈이나 의미"
         ],
-        "criteria": "개인적 감상의 진정성, 구체적 근거 제시, 감정 표현의 적절성"
+        "criteria": "개인적 감상의 진정성, 구체적 근거 제시, 감정 표현의 적절성",
+        "checkpoints": [
+            "작품의 제목, 지은이나 감독 같은 기본 정보와 감상하게 된 계기를 소개했는가",
+            "줄거리 요약에 그치지 않고 인상 깊은 장면에 대한 자신의 생각과 느낌을 밝혔는가",
+            "감상의 근거가 되는 장면, 대사, 구절을 구체적으로 제시했는가",
+            "작품에서 얻은 깨달음이나 자신의 삶과의 관련성이 드러나는가"
+        ]
     },
     "비평문": {
         "description": "문학작품, 예술작품 등을 객관적으로 분석하고 평가하는 글",
@@ -288,7 +295,13 @@ GENRES = {
             "본론: 작품의 특징 분석과 평가",
             "결론: 종합적 평가와 의의"
         ],
-        "criteria": "분석의 객관성, 평가 기준의 명확성, 논리적 일관성"
+        "criteria": "분석의 객관성, 평가 기준의 명확성, 논리적 일관성",
+        "checkpoints": [
+            "비평의 대상과 관점(주제, 형식, 시대적 배경 등)을 서론에서 분명히 밝혔는가",
+            "평가 기준이 명확하고 글 전체에서 일관되게 적용되는가",
+            "작품의 구체적인 부분을 근거로 분석했는가, 단순한 호불호에 그치지 않았는가",
+            "작품의 한계나 다른 해석의 가능성도 균형 있게 다루었는가"
+        ]
     },
     "보고서": {
         "description": "조사, 실험, 관찰 등의 결과를 체계적으로 정리한 글",
@@ -299,7 +312,13 @@ GENRES = {
             "논의: 결과 해석과 의미 분석",
             "결론: 요약과 제언"
         ],
-        "criteria": "객관성, 정확성, 체계성, 데이터의 신뢰성"
+        "criteria": "객관성, 정확성, 체계성, 데이터의 신뢰성",
+        "checkpoints": [
+            "조사나 실험의 목적과 배경을 분명하게 제시했는가",
+            "다른 사람이 따라 할 수 있을 만큼 방법을 구체적으로 설명했는가",
+            "결과를 표, 그래프, 수치로 정확하게 제시하고 해석과 구분했는가",
+            "결론이 결과에 근거하며 한계와 후속 과제를 밝혔는가"
+        ]
     },
     "소논문": {
         "description": "특정 주제에 대한 학술적 연구를 담은 글",
@@ -310,7 +329,13 @@ GENRES = {
             "연구 결과: 분석 결과 제시",
             "논의 및 결론: 시사점과 한계"
         ],
-        "criteria": "학술적 엄밀성, 논리적 타당성, 독창성, 인용의 정확성"
+        "criteria": "학술적 엄밀성, 논리적 타당성, 독창성, 인용의 정확성",
+        "checkpoints": [
+            "연구 문제를 구체적이고 탐구 가능한 형태로 제시했는가",
+            "선행연구를 요약하는 데 그치지 않고 자신의 연구와의 관계를 밝혔는가",
+            "연구 방법이 연구 문제에 답하기에 적절하고 자료 수집 과정이 분명한가",
+            "인용과 참고문헌이 정해진 양식에 맞고 본문과 서로 대응하는가"
+        ]
     },
     "논설문": {
         "description": "특정 주제에 대한 주장과 논거를 제시하는 글",
@@ -319,10 +344,414 @@ GENRES = {
             "본론: 논거 제시와 반박 고려",
             "결론: 주장 강조와 설득"
         ],
-        "criteria": "주장의 명확성, 논거의 타당성, 반박 고려, 설득력"
+        "criteria": "주장의 명확성, 논거의 타당성, 반박 고려, 설득력",
+        "checkpoints": [
+            "논제와 글쓴이의 주장이 한 문장으로 분명하게 드러나는가",
+            "논거를 사실, 통계, 전문가 의견 등으로 뒷받침하고 주장과 논리적으로 연결했는가",
+            "예상되는 반론을 제시하고 타당하게 반박했는가",
+            "감정에 호소하거나 지나치게 일반화하는 등의 논리적 오류가 없는가"
+        ]
     }
 }
 
+# 동시에 실행할 평가 요청 수 기본값
+DEFAULT_MAX_CONCURRENCY = 8
+
+# 섹션별 평가 대상이 되는 최소 문단 길이
+MIN_SECTION_LENGTH = 50
+
+# 한 요청에 묶어 평가할 문단 수 기본값
+DEFAULT_SECTION_BATCH_SIZE = 5
+
+# 전체 평가 시 한 번에 보낼 문서 분량 (넘으면 나누어 검토한 뒤 종합)
+OVERALL_CHUNK_TOKENS = 4000
+
+EVALUATOR_INSTRUCTIONS = """
+    당신은 고등학교 국어 교사이자 글쓰기 평가 전문가입니다. 학생이 쓴 글을 장르의 특성에 비추어
+    건설적으로 평가하고, 학생이 스스로 고쳐 쓸 수 있도록 구체적인 피드백을 제공합니다.
+    요청마다 평가할 글의 장르와 작업이 주어지므로, 아래의 장르별 기준과 작업별 지침 중
+    해당하는 것을 따라주세요.
+
+    [공통 평가 관점]
+    1. 내용: 주제가 분명한지, 주장·감상·분석을 뒷받침하는 근거와 사례가 충분하고 적절한지,
+       글쓴이 자신의 생각이 드러나는지 살펴봅니다.
+    2. 조직: 장르의 일반적인 구조를 갖추었는지, 문단마다 중심 내용이 하나로 모이는지,
+       문단과 문단이 자연스럽게 이어지는지 살펴봅니다.
+    3. 표현: 어휘가 정확하고 글의 목적에 맞는지, 문장이 지나치게 길거나 모호하지 않은지,
+       같은 표현을 불필요하게 되풀이하지 않는지 살펴봅니다.
+    4. 어법과 형식: 맞춤법, 띄어쓰기, 문장 성분의 호응, 인용과 출처 표기가 바른지 살펴봅니다.
+
+    [피드백 작성 원칙]
+    - 잘된 점을 먼저 한두 가지 짚은 뒤 개선할 점을 제시합니다.
+    - 막연한 칭찬이나 지적 대신 글의 문장이나 표현을 짧게 인용하여 근거를 보여줍니다.
+    - 개선할 점마다 학생이 바로 실천할 수 있는 고쳐 쓰기 방법이나 예시를 함께 제안합니다.
+    - 학생의 수준을 존중하는 정중하고 따뜻한 어조로 씁니다.
+    - 글에 없는 내용을 지어내지 않고, 판단하기 어려운 부분은 추측임을 밝힙니다.
+    - 학생의 개인 정보나 글의 주제와 관계없는 내용은 언급하지 않습니다.
+"""
+
+TASK_INSTRUCTIONS = """
+    [작업별 지침]
+    - 전체 평가: 글 전체(또는 나누어 검토한 결과 모음)를 바탕으로 장르에 맞는 구조를 갖추었는지,
+      각 부분이 적절히 구성되었는지, 개선이 필요한 부분, 잘된 점을 종합하여 평가합니다.
+      공통 평가 관점과 해당 장르의 점검 질문을 두루 반영하고, 소제목을 붙여 읽기 쉽게 정리합니다.
+    - 부분 검토: 긴 글을 나눈 한 부분만 보고, 이 부분이 장르의 어느 구조에 해당하는지와
+      잘된 점, 개선이 필요한 점을 평가 초점에 비추어 5줄 이내로 정리합니다.
+      다른 부분은 보지 못했으므로 글 전체에 대한 판단은 하지 않습니다.
+    - 섹션 평가: 한 문단이 장르의 어느 구조에 해당하는지 파악하고, 그 역할에 맞는 피드백을
+      2-3문장으로 작성합니다. 개선 제안을 반드시 포함합니다.
+    - 묶음 평가: 여러 문단이 [P번호] 형태의 ID와 함께 주어지면, 문단마다 섹션 평가와 같은 방식으로
+      2-3문장의 피드백을 작성하고 요청한 JSON 형식으로만 답합니다. 주어진 ID마다 하나씩 답하며,
+      ID를 바꾸거나 새로 만들지 않습니다.
+"""
+
+def build_genre_system_prompt():
+    """모든 장르와 평가 작업이 함께 쓰는 고정 시스템 프롬프트
+
+    전체/부분/섹션/묶음 평가가 장르와 관계없이 같은 앞부분으로 시작해야 API 제공자의
+    프롬프트 캐시(앞부분이 약 1024 토큰 이상일 때만 동작)를 재사용할 수 있으므로,
+    모든 장르의 기준과 작업별 지침을 한 블록에 담고 장르와 글은 사용자 메시지로 보냅니다.
+    """
+    genres = []
+    for genre, info in GENRES.items():
+        structure = '\n'.join(f"    - {item}" for item in info['structure'])
+        checkpoints = '\n'.join(f"    - {item}" for item in info['checkpoints'])
+        genres.append(f"""
+    [{genre}]
+    정의: {info['description']}
+    구조:
+{structure}
+    평가 초점: {info['criteria']}
+    점검 질문:
+{checkpoints}
+""")
+    return EVALUATOR_INSTRUCTIONS + "\n    [장르별 기준]\n" + ''.join(genres) + TASK_INSTRUCTIONS
+
+GENRE_SYSTEM_PROMPT = build_genre_system_prompt()
+
+def create_completion(client, kind, model, genre, prompt, hedge=None, **options):
+    """장르 평가 요청 후 응답 텍스트 반환 (모델에 맞는 제공자로 보내고 소요 시간·토큰 계측)
+
+    hedge(HedgePolicy)를 넘기면 요청 종류(kind)별 최근 지연 기록보다 늦은 요청을 한 번 더 보냅니다.
+    """
+    with metrics.timed('llm', kind=kind) as span:
+        result = llm_client.complete(
+            model,
+            [{"role": "user", "content": prompt}],
+            system=GENRE_SYSTEM_PROMPT,
+            client=client,
+            span=span,
+            hedge=hedge,
+            hedge_key=kind,
+            **options
+        )
+    return result.text
+
+def review_document_chunk(client, model, genre, chunk, chunk_num, total_chunks, hedge=None):
+    """긴 문서의 한 부분을 검토하여 핵심 관찰 사항 정리 (map 단계)"""
+    chunk_prompt = f"""
+    다음은 긴 {genre}의 일부분입니다.
+    이 부분이 어느 구조에 해당하는지, 잘된 점과 개선이 필요한 점을
+    평가 초점에 비추어 5줄 이내로 정리해주세요.
+
+    [{chunk_num}/{total_chunks} 부분]
+    {chunk}
+    """
+
+    content = create_completion(
+        client,
+        'chunk',
+        model,
+        genre,
+        chunk_prompt,
+        hedge=hedge,
+        max_tokens=600,
+        temperature=0.3
+    )
+
+    return content
+
+def evaluate_overall(client, model, genre, full_text, custom_instructions="", hedge=None, findings=None):
+    """전체 문서 종합 평가 생성
+
+    문서가 길면 run_concurrent_evaluation이 문단 경계에서 나눈 부분들을 먼저 검토(map)하고,
+    그 결과(findings)를 바탕으로 종합 평가(reduce)하므로 문서 전체가 평가에 반영됩니다.
+    """
+    if findings:
+        document_section = f"문서를 {len(findings)}개 부분으로 나누어 검토한 결과:\n" + "\n\n".join(
+            f"[{idx + 1}/{len(findings)} 부분]\n{finding}" for idx, finding in enumerate(findings)
+        )
+    else:
+        document_section = f"문서 전체 내용:\n{full_text}"
+
+    # 전체 문서 평가 프롬프트 (고정 지시 → 추가 지시 → 문서 순서)
+    overall_prompt = f"""
+    다음 글을 {genre}의 일반적인 구조적 원리에 따라 평가해주세요.
+    다음 사항을 포함하여 종합적으로 평가해주세요:
+    1. 장르에 맞는 구조를 갖추었는지
+    2. 각 부분이 적절히 구성되었는지
+    3. 개선이 필요한 부분
+    4. 잘된 점
+
+    평가는 구체적이고 건설적으로 작성해주세요.
+
+    {f"추가 지시사항: {custom_instructions}" if custom_instructions else ""}
+
+    {document_section}
+    """
+
+    content = create_completion(
+        client,
+        'overall',
+        model,
+        genre,
+        overall_prompt,
+        hedge=hedge,
+        max_tokens=3000,
+        temperature=0.7
+    )
+
+    return content
+
+def evaluate_section(client, model, genre, text, hedge=None):
+    """섹션(문단)별 피드백 생성"""
+    # 섹션별 평가 프롬프트 (분석할 내용은 맨 뒤에)
+    section_prompt = f"""
+    이것은 {genre}의 일부분입니다.
+    현재 분석 중인 부분이 {genre}의 어느 구조에 해당하는지 파악하고,
+    해당 부분에 맞는 구체적인 피드백을 2-3문장으로 작성해주세요.
+    개선 제안을 포함해주세요.
+
+    분석할 내용:
+    {text}
+    """
+
+    content = create_completion(
+        client,
+        'section',
+        model,
+        genre,
+        section_prompt,
+        hedge=hedge,
+        max_tokens=500,
+        temperature=0.7
+    )
+
+    return content
+
+def _paragraph_id(idx):
+    """묶음 평가에서 문단을 가리키는 고정 ID"""
+    return f"P{idx + 1}"
+
+def evaluate_section_batch(client, model, genre, sections, hedge=None):
+    """여러 문단을 한 번의 요청으로 평가하고 {섹션 인덱스: 피드백} 반환
+
+    sections는 (섹션 인덱스, 텍스트) 목록입니다. 응답은 JSON으로 받으며,
+    형식이 잘못되었거나 빠진 항목은 결과에 포함하지 않으므로 호출한 쪽에서
+    해당 문단만 따로 다시 평가하면 됩니다.
+    """
+    tagged = "\n\n".join(f"[{_paragraph_id(idx)}]\n{text.strip()}" for idx, text in sections)
+    batch_prompt = f"""
+    다음은 {genre}의 일부 문단들이며, 각 문단 앞에 [P번호] 형태의 ID가 붙어 있습니다.
+    각 문단이 {genre}의 어느 구조에 해당하는지 파악하고,
+    해당 부분에 맞는 구체적인 피드백을 문단마다 2-3문장으로 작성해주세요.
+    개선 제안을 포함해주세요.
+
+    반드시 다음 JSON 형식으로만 답해주세요:
+    {{"feedbacks": [{{"id": "P1", "feedback": "피드백 내용"}}]}}
+
+    분석할 문단:
+    {tagged}
+    """
+
+    content = create_completion(
+        client,
+        'batch',
+        model,
+        genre,
+        batch_prompt,
+        hedge=hedge,
+        max_tokens=min(4000, 350 * len(sections)),
+        temperature=0.7,
+        json_mode=True
+    )
+
+    try:
+        items = json.loads(content).get('feedbacks', [])
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+    index_by_id = {_paragraph_id(idx): idx for idx, _ in sections}
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        idx = index_by_id.get(str(item.get('id', '')).strip().strip('[]'))
+        feedback = item.get('feedback')
+        if idx is not None and isinstance(feedback, str) and feedback.strip():
+            results[idx] = feedback.strip()
+    return results
+
+def estimate_evaluation_calls(blocks, batch_size=1):
+    """blocks를 평가하는 데 드는 AI 호출 수 (섹션 평가 + 전체 평가)"""
+    sections = sum(1 for block in blocks if len(block['text'].strip()) > MIN_SECTION_LENGTH)
+    chunks = chunk_text(blocks_to_text(blocks), OVERALL_CHUNK_TOKENS)
+    overall_calls = 1 if len(chunks) == 1 else len(chunks) + 1
+    return -(-sections // max(1, batch_size)) + overall_calls
+
+def estimate_evaluation_wait(model, blocks, batch_size=1):
+    """blocks 평가를 지금 요청하면 AI 요청 예산(분당 요청·토큰 수)을 받기까지 기다릴 시간 추정 (초)"""
+    calls = estimate_evaluation_calls(blocks, batch_size)
+    text_tokens = sum(estimate_tokens(block['text']) for block in blocks)
+    # 전체 평가와 섹션 평가가 글 전체를 한 번씩 읽고, 출력은 전체 평가 3000 + 나머지 호출당 500 토큰 이내
+    tokens = 2 * text_tokens + 3000 + 500 * max(0, calls - 1)
+    return llm_scheduler.estimate_wait(llm_client.provider_for(model), tokens, calls)
+
+def run_concurrent_evaluation(client, model, genre, full_text, content_with_positions,
+                              custom_instructions="", max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                              on_progress=None, section_indices=None, include_overall=True,
+                              batch_size=1, hedge=None):
+    """전체 평가와 섹션별 평가를 동시에 실행하여 피드백 목록 생성
+
+    on_progress(완료 수, 전체 수, 작업 이름, 오류)는 결과가 도착할 때마다
+    호출한 스레드에서 실행되므로 Streamlit 위젯을 바로 갱신할 수 있습니다.
+    section_indices를 주면 해당 섹션만 분석합니다 (증분 분석).
+    batch_size가 2 이상이면 문단을 batch_size개씩 묶어 한 번에 평가하고,
+    응답에서 빠지거나 잘못된 문단만 따로 다시 평가합니다.
+    hedge(HedgePolicy)를 주면 응답이 늦은 요청을 한 번 더 보내 가장 느린 요청을 기다리지 않습니다.
+    반환값은 (feedbacks, errors)이며 feedbacks는 전체 평가 → 섹션 순서로 정렬됩니다.
+    """
+    if not content_with_positions:
+        return [], []
+
+    overall = None
+    section_results = {}
+    errors = []
+
+    if section_indices is None:
+        section_indices = range(len(content_with_positions))
+    # 의미있는 길이의 텍스트만 분석
+    targets = [
+        idx for idx in section_indices
+        if len(content_with_positions[idx]['text'].strip()) > MIN_SECTION_LENGTH
+    ]
+
+    # 긴 문서의 전체 평가는 부분 검토(map) 뒤 종합(reduce)하며, 모두 같은 작업 풀에서 실행해 동시 요청 수를 지킴
+    chunks = chunk_text(full_text, OVERALL_CHUNK_TOKENS) if include_overall else []
+    chunk_count = len(chunks) if len(chunks) > 1 else 0
+    findings = [None] * chunk_count
+
+    total = len(targets) + (chunk_count + 1 if include_overall else 0)
+    if total == 0:
+        return [], []
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        # 작업 종류: ('overall', None), ('chunk', 부분 인덱스), ('section', 인덱스), ('batch', 인덱스 목록)
+        tasks = {}
+
+        def submit_section(idx):
+            future = executor.submit(metrics.in_current_run(evaluate_section), client, model, genre, content_with_positions[idx]['text'], hedge)
+            tasks[future] = ('section', idx)
+
+        def submit_overall():
+            future = executor.submit(metrics.in_current_run(evaluate_overall), client, model, genre, full_text, custom_instructions, hedge, findings)
+            tasks[future] = ('overall', None)
+
+        if chunk_count:
+            for idx, chunk in enumerate(chunks):
+                future = executor.submit(metrics.in_current_run(review_document_chunk), client, model, genre, chunk, idx + 1, chunk_count, hedge)
+                tasks[future] = ('chunk', idx)
+        elif include_overall:
+            submit_overall()
+
+        if batch_size > 1:
+            for start in range(0, len(targets), batch_size):
+                group = targets[start:start + batch_size]
+                sections = [(idx, content_with_positions[idx]['text']) for idx in group]
+                tasks[executor.submit(metrics.in_current_run(evaluate_section_batch), client, model, genre, sections, hedge)] = ('batch', group)
+        else:
+            for idx in targets:
+                submit_section(idx)
+
+        pending = set(tasks)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, target = tasks.pop(future)
+                error = None
+
+                if kind == 'batch':
+                    label = f"섹션 {target[0] + 1}~{target[-1] + 1}"
+                    try:
+                        results = future.result()
+                    except Exception:
+                        results = {}
+                    section_results.update(results)
+                    done += len(results)
+
+                    # 빠지거나 형식이 잘못된 문단은 하나씩 다시 평가
+                    for idx in target:
+                        if idx not in results:
+                            submit_section(idx)
+                    pending |= {f for f, (k, i) in tasks.items() if k == 'section' and i in target}
+                elif kind == 'chunk':
+                    label = f"전체 평가 {target + 1}/{chunk_count} 부분"
+                    done += 1
+                    try:
+                        findings[target] = future.result()
+                    except Exception as e:
+                        error = e
+                        errors.append((label, e))
+
+                    # 모든 부분을 검토하면 종합 평가 (한 부분이라도 실패하면 전체 평가는 건너뜀)
+                    if not any(k == 'chunk' for k, _ in tasks.values()):
+                        if all(finding is not None for finding in findings):
+                            submit_overall()
+                            pending |= {f for f, (k, _) in tasks.items() if k == 'overall'}
+                        else:
+                            done += 1
+                else:
+                    label = "전체 평가" if kind == 'overall' else f"섹션 {target + 1}"
+                    done += 1
+                    try:
+                        result = future.result()
+                        if kind == 'overall':
+                            overall = result
+                        else:
+                            section_results[target] = result
+                    except Exception as e:
+                        error = e
+                        errors.append((label, e))
+
+                if on_progress:
+                    on_progress(done, total, label, error)
+
+    feedbacks = []
+    # 전체 평가를 문서 시작 부분에 추가 (표지·학생 정보 표로 시작하면 표 다음 첫 문단 앞)
+    if overall is not None:
+        insert_at, anchor = leading_anchor(content_with_positions)
+        feedbacks.append({
+            'type': '전체 평가',
+            'content': overall,
+            'insert_at': insert_at,
+            'anchor': anchor
+        })
+
+    # 피드백을 해당 섹션 끝에 추가 (문서 순서 유지)
+    for idx in sorted(section_results):
+        feedbacks.append({
+            'type': f'섹션 {idx + 1} 평가',
+            'content': section_results[idx],
+            'insert_at': content_with_positions[idx]['end'],
+            'anchor': (content_with_positions[idx]['text'], EDGE_END)
+        })
+
+    return feedbacks, errors
+
+# METRICS_PORT가 설정되어 있으면 Prometheus 형식 지표 제공 (프로세스당 한 번만 시작)
+metrics.serve_from_env()
+
 # 사이드바 설정
 with st.sidebar:
     st.markdown("### ⚙️ 설정")
@@ -337,6 +766,24 @@ with st.sidebar:
     model_choice = "gpt-4o-mini"
     st.info("모델: GPT-4o-mini")
     
+    # 동시 분석 수 설정
+    max_concurrency = st.slider(
+        "⚡ 동시 분석 수",
+        min_value=1,
+        max_value=16,
+        value=DEFAULT_MAX_CONCURRENCY,
+        help="동시에 보낼 평가 요청 수입니다. API 사용량 제한에 걸리면 값을 낮추세요."
+    )
+    
+    # 묶음 평가 설정
+    section_batch_size = st.slider(
+        "📦 한 번에 평가할 문단 수",
+        min_value=1,
+        max_value=10,
+        value=DEFAULT_SECTION_BATCH_SIZE,
+        help="여러 문단을 한 요청으로 묶어 평가합니다. 1이면 문단마다 따로 요청합니다."
+    )
+    
     st.markdown("---")
     
     # 글의 장르 선택
@@ -355,6 +802,9 @@ with st.sidebar:
         for item in GENRES[genre]['structure']:
             st.markdown(f"- {item}")
         st.markdown(f"\n**평가 초점:** {GENRES[genre]['criteria']}")
+        st.markdown("**점검 질문:**")
+        for item in GENRES[genre]['checkpoints']:
+            st.markdown(f"- {item}")
     
     # 추가 지시사항
     custom_instructions = st.text_area(
@@ -363,6 +813,27 @@ with st.sidebar:
         help="예: '고등학생 수준에 맞게 평가해주세요', '문법보다는 내용에 집중해주세요' 등"
     )
     
+    # 증분 분석 설정
+    incremental_mode = st.checkbox(
+        "🔁 변경된 문단만 다시 분석",
+        value=True,
+        help="이전에 평가한 문서를 다시 제출하면 새로 쓰거나 고친 문단만 분석하고 피드백을 추가합니다"
+    )
+    
+    # 템플릿 문단 건너뛰기
+    template_mode = st.checkbox(
+        "📎 템플릿 문단 건너뛰기",
+        value=True,
+        help="보고서 템플릿의 안내 문구를 고치지 않고 그대로 둔 문단은 평가하지 않습니다"
+    )
+    
+    # 꼬리 지연 줄이기
+    hedge_mode = st.checkbox(
+        "🏎️ 느린 요청 중복 전송",
+        value=False,
+        help="평가 요청이 평소보다 늦으면 같은 요청을 한 번 더 보내 먼저 도착한 결과를 사용합니다 (요청의 약 10% 이내)"
+    )
+    
     st.markdown("---")
     st.markdown("### 🔍 시스템 상태")
     
@@ -377,6 +848,22 @@ with st.sidebar:
         st.success("✅ Google API 연결됨")
     else:
         st.warning("⚠️ Google 인증 필요")
+    
+    # 프롬프트 앞부분 캐시 적중률 (OpenAI 자동 캐시)
+    prompt_stats = get_prompt_cache_stats('openai').snapshot()
+    if prompt_stats['requests']:
+        st.caption(
+            f"🧠 프롬프트 캐시: 입력 토큰의 {prompt_stats['hit_rate']:.0%} 재사용 · "
+            f"캐시 토큰 {prompt_stats['cached_tokens']:,}개 / 요청 {prompt_stats['requests']}회"
+        )
+    
+    # 느린 요청 중복 전송 현황
+    hedge_stats = get_hedge_policy().stats.snapshot()
+    if hedge_stats['hedged']:
+        st.caption(
+            f"🏎️ 중복 전송: {hedge_stats['hedged']}회 (요청의 {hedge_stats['hedge_rate']:.0%}) · "
+            f"먼저 도착 {hedge_stats['hedge_wins']}회 · 약 {hedge_stats['saved_seconds']:.1f}초 단축"
+        )
 
 # 메인 컨텐츠
 st.markdown("### 📄 문서 정보 입력")
@@ -422,14 +909,62 @@ if st.button("🚀 평가 요청", type="primary", use_container_width=True):
             docs_service = get_google_service()
             
             if docs_service:
+                # 이번 실행의 단계별 소요 시간 기록 시작
+                run = metrics.start_run()
+                
                 with st.spinner("📖 문서를 읽어오는 중..."):
-                    title, content_with_positions = get_document_content(docs_service, document_id)
+                    title, content_with_positions, revision_id = get_document_content(
+                        docs_service, document_id, get_snapshot_cache()
+                    )
                 
                 if content_with_positions:
                     st.success(f"✅ 문서 로드 완료: **{title}**")
                     
-                    # 전체 텍스트 추출
-                    full_text = '\n'.join([item['text'] for item in content_with_positions])
+                    # 템플릿 문단을 그대로 둔 부분은 평가하지 않음
+                    if template_mode:
+                        try:
+                            template_index = get_template_index(docs_service)
+                        except Exception as e:
+                            template_index = None
+                            st.warning(f"⚠️ 보고서 템플릿을 읽지 못해 모든 문단을 평가합니다: {str(e)}")
+                        if template_index:
+                            all_blocks = content_with_positions
+                            content_with_positions, template_blocks = template_index.split(all_blocks)
+                            if template_blocks:
+                                saved_calls = (estimate_evaluation_calls(all_blocks, section_batch_size)
+                                               - estimate_evaluation_calls(content_with_positions, section_batch_size))
+                                st.info(
+                                    f"📎 템플릿 그대로인 문단 {len(template_blocks)}개 제외 · "
+                                    f"약 {skipped_tokens(template_blocks):,} 토큰, AI 호출 {saved_calls}회 절약"
+                                )
+                    
+                    # 이전 평가 결과와 비교 (증분 분석)
+                    paragraph_store = get_paragraph_store()
+                    store_scope = make_scope(genre=genre, model=model_choice, instructions=custom_instructions)
+                    analyzed, inserted = paragraph_store.load(document_id, store_scope)
+                    content_with_positions, changed, reused = diff_paragraphs(
+                        content_with_positions, analyzed, inserted
+                    )
+                    changed = [
+                        idx for idx in changed
+                        if len(content_with_positions[idx]['text'].strip()) > MIN_SECTION_LENGTH
+                    ]
+                    if incremental_mode and analyzed:
+                        # 전체 평가는 처음 평가 때 문서 맨 앞에 넣은 것을 그대로 두어 겹치지 않게 함
+                        section_indices = changed
+                        include_overall = False
+                        st.info(f"🔁 변경된 문단 {len(changed)}개만 분석합니다 (이전 결과 재사용: {len(reused)}개)")
+                        if reused:
+                            with st.expander(f"♻️ 바뀌지 않은 문단의 이전 피드백 ({len(reused)}개)"):
+                                for idx, feedback in sorted(reused.items()):
+                                    st.markdown(f"**섹션 {idx + 1}:** {content_with_positions[idx]['text'].strip()[:80]}")
+                                    st.info(feedback)
+                    else:
+                        section_indices = None
+                        include_overall = True
+                    
+                    # 전체 텍스트 추출 (블록마다 줄바꿈으로 끝나므로 그대로 이어 붙임)
+                    full_text = blocks_to_text(content_with_positions)
                     
                     # 내용 미리보기
                     with st.expander("📄 문서 내용 미리보기", expanded=False):
@@ -439,123 +974,60 @@ if st.button("🚀 평가 요청", type="primary", use_container_width=True):
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
-                    # OpenAI 클라이언트 초기화
-                    client = OpenAI(api_key=api_key)
+                    # 선택한 모델의 제공자 클라이언트 (모든 세션이 같은 연결 풀을 공유)
+                    client = llm_client.get_client(llm_client.provider_for(model_choice), api_key)
                     
-                    # 피드백을 저장할 리스트
-                    feedbacks = []
+                    # 요청이 몰려 있으면 예상 대기 시간 안내
+                    evaluated_blocks = (content_with_positions if section_indices is None
+                                        else [content_with_positions[idx] for idx in section_indices])
+                    wait_seconds = estimate_evaluation_wait(model_choice, evaluated_blocks, section_batch_size)
+                    if wait_seconds >= 1:
+                        st.info(f"⏳ 지금 평가 요청이 많아 약 {wait_seconds:.0f}초 더 걸릴 수 있습니다")
                     
-                    # 먼저 전체 문서에 대한 종합 평가를 생성
-                    status_text.text("🤖 전체 문서 분석 중...")
+                    # 전체 평가와 섹션별 평가를 동시에 실행
+                    status_text.text("🤖 전체 문서와 섹션을 동시에 분석 중...")
                     
-                    try:
-                        # 전체 문서 평가 프롬프트
-                        overall_prompt = f"""
-                        다음은 {genre}입니다. {genre}의 일반적인 구조적 원리에 따라 평가해주세요.
-                        
-                        평가 기준:
-                        구조: {', '.join(GENRES[genre]['structure'])}
-                        초점: {GENRES[genre]['criteria']}
-                        
-                        {f"추가 지시사항: {custom_instructions}" if custom_instructions else ""}
-                        
-                        문서 전체 내용:
-                        {full_text[:3000]}...
-                        
-                        위 {genre}에 대해 다음 사항을 포함하여 종합적으로 평가해주세요:
-                        1. 장르에 맞는 구조를 갖추었는지
-                        2. 각 부분이 적절히 구성되었는지
-                        3. 개선이 필요한 부분
-                        4. 잘된 점
-                        
-                        평가는 구체적이고 건설적으로 작성해주세요.
-                        """
-                        
-                        response = client.chat.completions.create(
-                            model=model_choice,
-                            messages=[{
-                                "role": "system",
-                                "content": f"당신은 {genre} 평가 전문가입니다. 학생들의 글을 건설적으로 평가해주세요."
-                            }, {
-                                "role": "user",
-                                "content": overall_prompt
-                            }],
-                            max_tokens=3000,
-                            temperature=0.7
-                        )
-                        
-                        overall_feedback = response.choices[0].message.content
-                        
-                        # 전체 평가를 문서 시작 부분에 추가
-                        if content_with_positions:
-                            feedbacks.append({
-                                'type': '전체 평가',
-                                'content': overall_feedback,
-                                'insert_at': content_with_positions[0]['start']
-                            })
-                        
-                    except Exception as e:
-                        st.warning(f"전체 평가 중 오류: {str(e)}")
+                    def update_progress(done, total, label, error):
+                        progress_bar.progress(done / total)
+                        status_text.text(f"🤖 {label} 분석 완료 ({done}/{total})")
+                        if error is not None:
+                            st.warning(f"{label} 분석 중 오류: {str(error)}")
                     
-                    # 섹션별로 분석 및 피드백 생성
-                    total_sections = len(content_with_positions)
-                    
-                    for idx, section in enumerate(content_with_positions):
-                        if len(section['text'].strip()) > 50:  # 의미있는 길이의 텍스트만 분석
-                            progress = (idx + 1) / total_sections
-                            progress_bar.progress(progress)
-                            status_text.text(f"🤖 섹션 {idx + 1}/{total_sections} 분석 중...")
-                            
-                            try:
-                                # 섹션별 평가 프롬프트
-                                section_prompt = f"""
-                                이것은 {genre}의 일부분입니다.
-                                현재 분석 중인 부분이 {genre}의 어느 구조에 해당하는지 파악하고,
-                                해당 부분에 맞는 구체적인 피드백을 제공해주세요.
-                                
-                                {genre}의 구조: {', '.join(GENRES[genre]['structure'])}
-                                
-                                분석할 내용:
-                                {section['text']}
-                                
-                                위 내용에 대해 2-3문장으로 구체적이고 건설적인 피드백을 작성해주세요.
-                                개선 제안을 포함해주세요.
-                                """
-                                
-                                response = client.chat.completions.create(
-                                    model=model_choice,
-                                    messages=[{
-                                        "role": "system",
-                                        "content": f"당신은 {genre} 평가 전문가입니다."
-                                    }, {
-                                        "role": "user",
-                                        "content": section_prompt
-                                    }],
-                                    max_tokens=500,
-                                    temperature=0.7
-                                )
-                                
-                                feedback = response.choices[0].message.content
-                                
-                                # 피드백을 해당 섹션 끝에 추가
-                                feedbacks.append({
-                                    'type': f'섹션 {idx + 1} 평가',
-                                    'content': feedback,
-                                    'insert_at': section['end']
-                                })
-                                
-                                # API 호출 제한을 위한 짧은 대기
-                                time.sleep(1)
-                                
-                            except Exception as e:
-                                st.warning(f"섹션 {idx + 1} 분석 중 오류: {str(e)}")
+                    feedbacks, _ = run_concurrent_evaluation(
+                        client,
+                        model_choice,
+                        genre,
+                        full_text,
+                        content_with_positions,
+                        custom_instructions=custom_instructions,
+                        max_concurrency=max_concurrency,
+                        on_progress=update_progress,
+                        section_indices=section_indices,
+                        include_overall=include_overall,
+                        batch_size=section_batch_size,
+                        hedge=get_hedge_policy() if hedge_mode else None
+                    )
                     
                     progress_bar.progress(1.0)
                     status_text.text("✅ 분석 완료! 피드백을 문서에 삽입하는 중...")
                     
                     # 피드백을 문서에 삽입
                     if feedbacks:
-                        if insert_feedback_to_doc(docs_service, document_id, feedbacks):
+                        if insert_feedback_to_doc(docs_service, document_id, feedbacks, revision_id):
+                            # 분석한 문단과 삽입한 평가를 기록하여 다음 제출 때 재사용
+                            feedback_by_type = {feedback['type']: feedback['content'] for feedback in feedbacks}
+                            section_feedbacks = {
+                                section['text']: feedback_by_type[f'섹션 {idx + 1} 평가']
+                                for idx, section in enumerate(content_with_positions)
+                                if f'섹션 {idx + 1} 평가' in feedback_by_type
+                            }
+                            paragraph_store.save(
+                                document_id,
+                                store_scope,
+                                section_feedbacks,
+                                [format_feedback_text(feedback) for feedback in feedbacks]
+                            )
+                            
                             st.markdown(f"""
                             <div class='success-box'>
                             <h4>✅ 평가 완료!</h4>
@@ -576,19 +1048,21 @@ if st.button("🚀 평가 요청", type="primary", use_container_width=True):
                                     st.markdown(f"... 그 외 {len(feedbacks) - 3}개의 평가가 더 있습니다.")
                         else:
                             st.warning("⚠️ 피드백을 추가하지 못했습니다. 문서 권한을 확인해주세요.")
+                    elif incremental_mode and analyzed and not changed:
+                        st.success("✅ 지난 평가 이후 바뀐 문단이 없습니다. 이전 피드백을 그대로 확인하세요.")
                     else:
                         st.warning("⚠️ 생성된 피드백이 없습니다.")
                 else:
                     st.error("❌ 문서 내용을 가져올 수 없습니다. 문서 권한을 확인해주세요.")
+                
+                st.session_state.last_run_timings = metrics.finish_run(run)
+
+# 최근 실행의 단계별 소요 시간
+if st.session_state.get('last_run_timings'):
+    with st.sidebar:
+        st.markdown("### ⏱️ 최근 평가 시간")
+        st.caption("  \n".join(metrics.summary_lines(st.session_state.last_run_timings)))
 
 # 푸터
 st.markdown("---")
-st.markdown(
-    """
-    <div style='text-align: center; color: #888;'>
-        <p>Powered by GPT-4o-mini & Google Docs API | 교육 목적으로 제작됨</p>
-        <p>피드백은 문서 내에 파란색 배경으로 표시됩니다</p>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(ui_assets.GENRE_FOOTER, unsafe_allow_html=True)
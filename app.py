@@ -1,11 +1,37 @@
-import streamlit as st
-import anthropic
+import json
+import os
 import re
 import time
-import os
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
-from google.auth.transport.requests import Request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+import streamlit as st
+
+import llm_client
+import llm_scheduler
+import metrics
+import ui_assets
+from chunking import chunk_text, estimate_tokens
+from doc_extractor import DOCUMENT_FIELDS, blocks_to_text, extract_blocks
+from doc_snapshot import DRIVE_VERSION_FIELDS, DocumentSnapshotCache, drive_version
+from feedback_cache import FeedbackCache, make_cache_key
+from feedback_history import FeedbackHistory, parse_label
+from google_clients import get_service_pool
+from hedging import HedgePolicy
+from jobs import STATUS_DONE, STATUS_FAILED, JobManager
+from local_documents import SUPPORTED_EXTENSIONS, read_document
+from prompt_cache import get_prompt_cache_stats
+from rate_limit import drive_write_limiter
+from resilience import (
+    DEFAULT_POLICY,
+    call_with_retry,
+    get_limiter,
+    is_not_applied,
+    is_outcome_unknown,
+    is_throttled,
+)
+from template_index import build_template_index, parse_doc_ids, skipped_tokens
 
 # 페이지 설정
 st.set_page_config(
@@ -15,58 +41,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS 스타일링 (동일)
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        color: #2E86AB;
-        font-size: 2.5rem;
-        margin-bottom: 2rem;
-        font-weight: bold;
-    }
-    .sub-header {
-        text-align: center;
-        color: #666;
-        font-size: 1.2rem;
-        margin-bottom: 2rem;
-    }
-    .success-box {
-        background-color: #d4edda;
-        color: #155724;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #28a745;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        color: #856404;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #ffc107;
-        margin: 1rem 0;
-    }
-    .error-box {
-        background-color: #f8d7da;
-        color: #721c24;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 5px solid #dc3545;
-        margin: 1rem 0;
-    }
-    .stButton > button {
-        background-color: #2E86AB;
-        color: white;
-        border-radius: 10px;
-        border: none;
-        padding: 0.75rem 2rem;
-        font-weight: bold;
-        font-size: 1.1rem;
-        width: 100%;
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS 스타일링 (고정 화면 요소는 ui_assets에서 한 번만 만듦)
+st.markdown(ui_assets.RESEARCH_CSS, unsafe_allow_html=True)
 
 # 세션 상태 초기화
 if 'analysis_complete' not in st.session_state:
@@ -75,154 +51,277 @@ if 'current_doc_id' not in st.session_state:
     st.session_state.current_doc_id = None
 if 'current_doc_url' not in st.session_state:
     st.session_state.current_doc_url = None
+if 'job_id' not in st.session_state:
+    # 새로고침으로 세션이 바뀌어도 주소(?job=...)에 남은 작업에 다시 연결
+    st.session_state.job_id = st.query_params.get("job")
+if 'celebrated_job_id' not in st.session_state:
+    st.session_state.celebrated_job_id = None
+
+# METRICS_PORT가 설정되어 있으면 Prometheus 형식 지표 제공 (프로세스당 한 번만 시작)
+metrics.serve_from_env()
+
+# Google Drive API의 댓글 길이 제한과 배치 요청당 최대 호출 수
+MAX_COMMENT_LENGTH = 30000
+MAX_BATCH_SIZE = 100
+
+# 적용 여부를 모르는 댓글을 확인할 때 서버와 이 컴퓨터의 시계 차이로 놓치지 않도록 두는 여유 (초)
+COMMENT_CLOCK_SKEW = 30
+
+# Google API 권한 범위
+GOOGLE_SCOPES = [
+    'https://www.googleapis.com/auth/documents',
+    'https://www.googleapis.com/auth/drive',
+    'https://www.googleapis.com/auth/drive.file'
+]
+
+def show_message(level, text):
+    """화면에 바로 알림 표시 (화면 스레드에서 쓰는 기본 log, level: success, info, warning, error)
+    
+    작업 스레드에서는 st.*가 보이지 않으므로 job.log처럼 기록하는 함수를 log로 넘깁니다.
+    """
+    getattr(st, level)(text)
 
 class GoogleDocsCommenter:
     def __init__(self):
-        """Google Docs 댓글 추가 클래스"""
-        self.credentials = self._get_credentials()
-        if self.credentials:
+        """Google Docs 댓글 추가 클래스
+
+        인증 정보와 서비스 객체는 프로세스 전체에서 공유하는 풀에서 가져오므로
+        생성할 때 Google API 호출이 발생하지 않습니다.
+        """
+        pool = self._get_service_pool()
+        if pool:
             try:
-                self.docs_service = build('docs', 'v1', credentials=self.credentials)
-                self.drive_service = build('drive', 'v3', credentials=self.credentials)
-                self._test_connection()
+                self.credentials = pool.credentials
+                self.docs_service = pool.docs
+                self.drive_service = pool.drive
             except Exception as e:
                 st.error(f"Google API 서비스 초기화 실패: {str(e)}")
+                self.credentials = None
                 self.docs_service = None
                 self.drive_service = None
         else:
+            self.credentials = None
             self.docs_service = None
             self.drive_service = None
     
-    def _get_credentials(self):
-        """서비스 계정 인증 정보 가져오기"""
+    def _get_service_pool(self):
+        """서비스 계정 인증 정보로 공유 서비스 풀 가져오기"""
         try:
             service_account_info = st.secrets["google_service_account"]
-            scopes = [
-                'https://www.googleapis.com/auth/documents',
-                'https://www.googleapis.com/auth/drive',
-                'https://www.googleapis.com/auth/drive.file'
-            ]
-            
-            credentials = Credentials.from_service_account_info(
-                service_account_info, 
-                scopes=scopes
-            )
-            
-            return credentials
+            return get_service_pool(service_account_info, GOOGLE_SCOPES)
             
         except Exception as e:
             st.sidebar.error(f"Google 인증 실패: {str(e)}")
             return None
     
-    def _test_connection(self):
-        """Google API 연결 테스트"""
-        try:
-            about = self.drive_service.about().get(fields="user").execute()
-            st.sidebar.success("✅ Google API 연결 성공")
-            
-        except Exception as e:
-            st.sidebar.error(f"❌ Google API 연결 실패: {str(e)}")
-            # 상세 오류 정보 표시
-            if 'No access token' in str(e):
-                st.sidebar.error("🔍 Access Token 문제 발견!")
-                st.sidebar.info("JSON 키를 다시 생성해주세요.")
-            raise e
-    
     def is_available(self):
         """Google API 사용 가능 여부 확인"""
         return self.credentials is not None and self.docs_service is not None
     
-    def get_document_content(self, doc_id):
-        """문서 내용 읽기"""
+    def get_document_content(self, doc_id, use_snapshot=True, log=show_message):
+        """문서 내용 읽기
+        
+        Drive 메타데이터의 버전이 지난번에 읽은 것과 같으면 저장해 둔 문서를 쓰고
+        Docs API로 문서 전체를 다시 읽지 않습니다 (use_snapshot=False이면 항상 새로 읽음).
+        알림과 오류는 log(수준, 메시지)로 보냅니다.
+        """
         if not self.is_available():
             return None
             
         try:
-            # 먼저 Drive API로 파일 접근 권한 확인
-            file_metadata = self.drive_service.files().get(
-                fileId=doc_id, 
-                fields="name,permissions"
-            ).execute()
-            
-            st.info(f"📄 문서명: {file_metadata.get('name', '알 수 없음')}")
-            
-            # Docs API로 문서 내용 읽기
-            document = self.docs_service.documents().get(documentId=doc_id).execute()
-            
-            content = ""
-            for element in document.get('body', {}).get('content', []):
-                if 'paragraph' in element:
-                    paragraph = element['paragraph']
-                    for text_run in paragraph.get('elements', []):
-                        if 'textRun' in text_run:
-                            content += text_run['textRun'].get('content', '')
+            with metrics.timed('fetch') as span:
+                # 먼저 Drive API로 파일 접근 권한과 현재 버전 확인
+                file_metadata = call_with_retry('drive.read', self.drive_service.files().get(
+                    fileId=doc_id, 
+                    fields=f"name,permissions,{DRIVE_VERSION_FIELDS}"
+                ).execute, span=span)
+                
+                log('info', f"📄 문서명: {file_metadata.get('name', '알 수 없음')}")
+                
+                version = drive_version(file_metadata)
+                snapshots = get_snapshot_cache()
+                document = snapshots.get(doc_id, version) if use_snapshot else None
+                
+                if document is None:
+                    # Docs API로 문서 내용 읽기 (필요한 필드만 요청)
+                    document = call_with_retry('docs.read', self.docs_service.documents().get(
+                        documentId=doc_id,
+                        fields=DOCUMENT_FIELDS
+                    ).execute, span=span)
+                    snapshots.set(doc_id, version, document)
+                    span.calls = 2
+                    span.bytes_received = metrics.payload_bytes(file_metadata) + metrics.payload_bytes(document)
+                else:
+                    metrics.count('doc_snapshot', result='hit')
+                    span.bytes_received = metrics.payload_bytes(file_metadata)
+                
+                # 문단, 표, 목차를 블록 단위로 추출
+                blocks = extract_blocks(document)
+                content = blocks_to_text(blocks)
             
             return {
                 'title': document.get('title', '제목 없음'),
                 'content': content.strip(),
                 'doc_id': doc_id,
-                'word_count': len(content.split())
+                'word_count': len(content.split()),
+                'blocks': blocks
             }
             
         except Exception as e:
-            st.error(f"문서 읽기 실패: {str(e)}")
+            log('error', f"문서 읽기 실패: {str(e)}")
+            # 상세 오류 정보 표시
+            if 'No access token' in str(e):
+                log('error', "🔍 Access Token 문제 발견! JSON 키를 다시 생성해주세요.")
             return None
     
-    def add_comment(self, doc_id, comment_text):
-        """문서에 댓글 추가 - 수정된 버전"""
+    def _split_comment(self, comment_text):
+        """Google Drive API의 댓글 길이 제한(30,000자)에 맞게 댓글 분할"""
+        if len(comment_text) <= MAX_COMMENT_LENGTH:
+            return [comment_text]
+        
+        # 긴 댓글을 여러 개로 분할 ("(부분 n/m) " 표시가 들어갈 공간을 남겨둠)
+        chunk_size = MAX_COMMENT_LENGTH - 20
+        total_chunks = (len(comment_text) + chunk_size - 1) // chunk_size
+        chunks = []
+        for i in range(0, len(comment_text), chunk_size):
+            chunk_num = (i // chunk_size) + 1
+            chunks.append(f"(부분 {chunk_num}/{total_chunks}) {comment_text[i:i + chunk_size]}")
+        return chunks
+    
+    def add_comments(self, doc_id, comment_texts, log=show_message):
+        """여러 댓글을 배치 요청으로 한 번에 추가
+        
+        긴 댓글은 여러 개로 나누어 함께 보내며, 호출 속도는 공유 토큰 버킷으로 조절합니다.
+        429처럼 처리되지 않은 것이 확실한 요청만 그대로 다시 보내고, 시간 초과나 5xx로 적용 여부를
+        모르는 요청은 문서의 댓글 목록을 확인해 실제로 빠진 댓글만 다시 보냅니다.
+        반환값은 comment_texts와 같은 순서의 성공 여부 리스트이며, 실패 사유는 log(수준, 메시지)로 보냅니다.
+        """
         if not self.is_available():
-            return False
+            return [False] * len(comment_texts)
+        
+        # (댓글 번호, 분할된 내용) 목록
+        pending = []
+        for comment_idx, comment_text in enumerate(comment_texts):
+            for chunk in self._split_comment(comment_text):
+                pending.append((comment_idx, chunk))
+        
+        failed = {}
+        started = time.time()
+        # 이번 호출에서 추가된 것을 확인한 댓글 내용별 개수
+        created = Counter()
+        
+        with metrics.timed('comment') as span:
+            span.calls = len(pending)
+            span.bytes_sent = sum(len(chunk.encode('utf-8')) for _, chunk in pending)
             
-        try:
-            # Google Drive API의 댓글 길이 제한 확인 (30,000자)
-            MAX_COMMENT_LENGTH = 30000
+            token_bucket = drive_write_limiter()
+            concurrency = get_limiter('drive.comments')
             
-            if len(comment_text) > MAX_COMMENT_LENGTH:
-                # 긴 댓글을 여러 개로 분할
-                comments_added = 0
-                total_chunks = (len(comment_text) + MAX_COMMENT_LENGTH - 1) // MAX_COMMENT_LENGTH
+            # (요청 ID, 댓글 번호, 내용) 목록 - 일시적 오류로 실패했고 추가되지 않은 요청만 다음 차례에 다시 보냄
+            remaining = [
+                (f"{comment_idx}-{n}", comment_idx, chunk)
+                for n, (comment_idx, chunk) in enumerate(pending)
+            ]
+            attempt = 0
+            while remaining:
+                attempt += 1
+                errors = {}
                 
-                for i in range(0, len(comment_text), MAX_COMMENT_LENGTH):
-                    chunk_num = (i // MAX_COMMENT_LENGTH) + 1
-                    chunk = comment_text[i:i + MAX_COMMENT_LENGTH]
-                    
-                    # 첫 번째 부분이 아니면 계속 표시 추가
-                    if chunk_num > 1:
-                        chunk = f"(부분 {chunk_num}/{total_chunks}) {chunk}"
-                    else:
-                        chunk = f"(부분 {chunk_num}/{total_chunks}) {chunk}"
-                    
-                    comment_body = {
-                        'content': chunk
-                    }
-                    
-                    result = self.drive_service.comments().create(
-                        fileId=doc_id,
-                        body=comment_body,
-                        fields="*"
-                    ).execute()
+                def on_response(request_id, response, exception):
+                    if exception is not None:
+                        errors[request_id] = exception
+                
+                for batch_start in range(0, len(remaining), MAX_BATCH_SIZE):
+                    batch_items = remaining[batch_start:batch_start + MAX_BATCH_SIZE]
+                    batch = self.drive_service.new_batch_http_request(callback=on_response)
+                    for request_id, comment_idx, chunk in batch_items:
+                        batch.add(
+                            self.drive_service.comments().create(
+                                fileId=doc_id,
+                                body={'content': chunk},
+                                fields="id"
+                            ),
+                            request_id=request_id
+                        )
                     
-                    comments_added += 1
-                    time.sleep(1)  # API 호출 간격
+                    # 배치 안의 요청도 각각 할당량에 포함되므로 요청 수만큼 토큰 사용
+                    token_bucket.acquire(len(batch_items))
+                    with concurrency.slot() as outcome:
+                        try:
+                            batch.execute()
+                        except Exception as e:
+                            for request_id, _, _ in batch_items:
+                                errors[request_id] = e
+                        outcome['throttled'] = any(is_throttled(error) for error in errors.values())
                 
-                return comments_added > 0
-            else:
-                comment_body = {
-                    'content': comment_text
-                }
+                retry = []
+                uncertain = []
+                for item in remaining:
+                    error = errors.get(item[0])
+                    if error is None:
+                        created[item[2].strip()] += 1
+                    elif attempt < DEFAULT_POLICY.max_attempts and is_not_applied(error):
+                        retry.append(item)
+                    elif is_outcome_unknown(error):
+                        uncertain.append(item)
+                    else:
+                        failed.setdefault(item[1], error)
+                        span.add_error(error)
                 
-                result = self.drive_service.comments().create(
-                    fileId=doc_id,
-                    body=comment_body,
-                    fields="*"
-                ).execute()
+                if uncertain:
+                    # 응답만 받지 못하고 실제로는 추가되었을 수 있으므로 댓글 목록에서 확인
+                    try:
+                        found = self._own_comments_since(doc_id, started - COMMENT_CLOCK_SKEW) - created
+                    except Exception as e:
+                        found = None
+                        log('warning', f"⚠️ 댓글 목록을 확인하지 못해 결과를 모르는 댓글은 다시 보내지 않습니다: {str(e)}")
+                    for item in uncertain:
+                        key = item[2].strip()
+                        if found is not None and found[key] > 0:
+                            found[key] -= 1
+                            created[key] += 1
+                        elif found is not None and attempt < DEFAULT_POLICY.max_attempts:
+                            retry.append(item)
+                        else:
+                            failed.setdefault(item[1], errors[item[0]])
+                            span.add_error(errors[item[0]])
                 
-                return True
-            
-        except Exception as e:
-            st.error(f"댓글 추가 실패: {str(e)}")
-            st.error(f"댓글 길이: {len(comment_text)}자")
-            return False
+                if retry:
+                    span.retries += len(retry)
+                    time.sleep(max(DEFAULT_POLICY.delay(attempt, errors[item[0]]) for item in retry))
+                remaining = retry
+        
+        for comment_idx, error in sorted(failed.items()):
+            log('error', f"댓글 추가 실패: {str(error)} (댓글 길이: {len(comment_texts[comment_idx])}자)")
+        
+        return [idx not in failed for idx in range(len(comment_texts))]
+    
+    def _own_comments_since(self, doc_id, since):
+        """since(유닉스 시각) 이후 이 서비스 계정이 문서에 단 댓글의 내용별 개수"""
+        found = Counter()
+        start = datetime.fromtimestamp(since, UTC).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        page_token = None
+        while True:
+            response = call_with_retry('drive.read', self.drive_service.comments().list(
+                fileId=doc_id,
+                startModifiedTime=start,
+                pageSize=100,
+                pageToken=page_token,
+                fields="nextPageToken,comments(content,createdTime,author(me))"
+            ).execute)
+            for comment in response.get('comments', []):
+                created_time = comment.get('createdTime')
+                if not (comment.get('author') or {}).get('me') or not created_time:
+                    continue
+                if datetime.fromisoformat(created_time).timestamp() >= since:
+                    found[comment.get('content', '').strip()] += 1
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return found
+    
+    def add_comment(self, doc_id, comment_text, log=show_message):
+        """문서에 댓글 추가"""
+        return self.add_comments(doc_id, [comment_text], log)[0]
 
 def extract_doc_id(url):
     """구글 문서 URL에서 문서 ID 추출"""
@@ -238,104 +337,411 @@ def extract_doc_id(url):
     return None
 
 def get_anthropic_client():
-    """Anthropic 클라이언트 초기화"""
+    """Anthropic 클라이언트 (모든 세션이 같은 연결 풀을 공유, API 키가 없으면 RuntimeError)"""
     api_key = st.secrets.get("ANTHROPIC_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
-        st.error("❌ Anthropic API 키가 설정되지 않았습니다.")
-        st.stop()
-    return anthropic.Anthropic(api_key=api_key)
+        raise RuntimeError("Anthropic API 키가 설정되지 않았습니다.")
+    return llm_client.get_client(llm_client.provider_for(ANALYSIS_MODEL), api_key)
 
-def analyze_document_content(content):
-    """문서 내용을 분석하여 피드백 생성"""
-    client = get_anthropic_client()
-    
-    system_prompt = """
+@st.cache_resource
+def get_feedback_cache():
+    """프로세스 전체에서 공유하는 피드백 캐시"""
+    return FeedbackCache()
+
+@st.cache_resource
+def get_snapshot_cache():
+    """프로세스 전체에서 공유하는 문서 스냅숏 캐시"""
+    return DocumentSnapshotCache()
+
+@st.cache_resource
+def get_feedback_history():
+    """프로세스 전체에서 공유하는 피드백 히스토리 저장소"""
+    return FeedbackHistory()
+
+@st.cache_resource
+def get_hedge_policy():
+    """프로세스 전체에서 공유하는 중복 전송 기준 (최근 지연 기록과 예산 유지)"""
+    return HedgePolicy()
+
+@st.cache_resource
+def get_template_index(_docs_service):
+    """보고서 템플릿 문단 색인 (한 번만 만들며, 템플릿을 읽지 못하면 예외가 나고 다음에 다시 시도)"""
+    doc_ids = parse_doc_ids(st.secrets.get("TEMPLATE_DOC_IDS", os.getenv("TEMPLATE_DOC_IDS")))
+    return build_template_index(_docs_service, doc_ids)
+
+@st.cache_resource
+def get_job_manager():
+    """프로세스 전체에서 공유하는 백그라운드 작업 관리자 (재실행되어도 유지)"""
+    return JobManager()
+
+# AI 분석 설정
+ANALYSIS_MODEL = "claude-3-5-sonnet-20241022"
+ANALYSIS_MAX_TOKENS = 4000
+ANALYSIS_TEMPERATURE = 0.3
+
+# 전체 평가와 부분 검토가 함께 쓰는 고정 시스템 프롬프트
+# (API 제공자의 프롬프트 캐시는 앞부분이 약 1024 토큰 이상일 때만 동작하므로, 두 작업의 지침과
+# 기준별 세부 채점 기준을 한 블록에 담고 작업 종류와 문서는 사용자 메시지로 보냄)
+FEEDBACK_SYSTEM_PROMPT = """
     당신은 고등학교 국어 교사로서 학생들의 연구 보고서를 검토하는 전문가입니다.
-    다음 기준에 따라 구체적이고 건설적인 피드백을 제공해주세요:
+    다음 기준에 따라 구체적이고 건설적인 피드백을 제공해주세요.
+    요청마다 작업 종류(전체 평가 또는 부분 검토)가 주어지므로, 아래 작업별 지침 중 해당하는 것을 따라주세요.
 
     **피드백 기준:**
     1. **구조와 논리성** (25점): 서론-본론-결론의 논리적 흐름, 목차의 체계성
+       - 상(21~25점): 연구 질문이 서론에서 분명히 제시되고, 본론의 각 장이 그 질문에 답하는 순서로
+         배열되며, 결론이 본론의 내용을 요약하고 질문에 대한 답을 내립니다. 목차와 본문의 제목이 일치합니다.
+       - 중(13~20점): 전체 구성은 갖추었으나 일부 장의 순서가 어색하거나, 장과 장 사이의 연결이
+         약하거나, 결론이 본론과 관계없는 새로운 내용을 담습니다.
+       - 하(0~12점): 연구 질문이 분명하지 않고, 내용이 나열식으로 흩어져 있으며, 서론이나 결론이 빠져 있습니다.
     2. **내용의 충실성** (30점): 주제 탐구의 깊이, 자료의 다양성과 신뢰성
+       - 상(25~30점): 주제를 여러 측면에서 깊이 있게 탐구하고, 학술 자료, 통계, 직접 수행한 조사나
+         실험 등 다양하고 믿을 만한 자료를 근거로 삼으며, 자료를 해석하여 자신의 결론으로 이어갑니다.
+       - 중(15~24점): 자료는 충분하지만 요약에 머물러 해석이 부족하거나, 자료의 출처가 한쪽에
+         치우치거나, 신뢰성을 확인하기 어려운 인터넷 자료에 많이 기댑니다.
+       - 하(0~14점): 자료가 부족하거나 주제와 관련이 적고, 근거 없이 주장만 제시합니다.
     3. **학술적 글쓰기** (20점): 객관적 서술, 적절한 인용, 출처 표기
+       - 상(17~20점): 개인적 감정 표현을 삼가고 객관적으로 서술하며, 직접 인용과 간접 인용을 구분하고,
+         본문의 모든 인용이 참고문헌 목록과 정해진 양식으로 대응합니다.
+       - 중(10~16점): 대체로 객관적이지만 구어체나 주관적 표현이 섞여 있거나, 출처 표기가 일부 빠지거나
+         양식이 일관되지 않습니다.
+       - 하(0~9점): 출처 없이 다른 자료의 내용을 옮겨 쓰거나, 참고문헌 목록이 없습니다.
     4. **창의성과 독창성** (15점): 새로운 관점, 비판적 사고
+       - 상(13~15점): 기존 자료를 비판적으로 검토하여 자신만의 관점이나 새로운 연결을 제시하고,
+         연구의 한계와 후속 연구 방향까지 스스로 제안합니다.
+       - 중(8~12점): 주제 선정이나 일부 해석에서 독창성이 보이지만, 대부분 기존 자료의 결론을 따릅니다.
+       - 하(0~7점): 자료의 내용을 그대로 정리하는 데 그치고 자신의 생각이 드러나지 않습니다.
     5. **형식과 표현** (10점): 맞춤법, 문법, 일관된 형식
+       - 상(9~10점): 맞춤법과 띄어쓰기 오류가 거의 없고, 문장이 간결하며, 표와 그림에 번호와 제목을 붙이고
+         본문에서 언급합니다.
+       - 중(5~8점): 오류가 눈에 띄지만 읽는 데 방해가 되지 않고, 형식이 부분적으로 일관되지 않습니다.
+       - 하(0~4점): 오류가 많아 뜻을 파악하기 어렵거나, 문단 구분과 형식이 정리되어 있지 않습니다.
+
+    **피드백 작성 원칙:**
+    - 각 기준에서 잘된 점을 먼저 짚은 뒤 개선할 점을 제시합니다.
+    - 근거가 되는 문장이나 표현을 짧게 인용하여, 학생이 어느 부분에 대한 피드백인지 알 수 있게 합니다.
+    - 개선할 점마다 학생이 바로 실천할 수 있는 고쳐 쓰기 방법이나 예시를 함께 제안합니다.
+    - 보고서에 없는 내용을 지어내지 않으며, 확인할 수 없는 사실은 확인이 필요하다고 적습니다.
+    - 학생의 노력을 존중하는 정중하고 따뜻한 어조로 씁니다.
+
+    **작업별 지침:**
+    - 전체 평가: 보고서 전체(또는 나누어 검토한 결과 모음)를 바탕으로 다섯 기준을 모두 평가하고
+      추가 제안사항을 덧붙입니다. 각 섹션별로 명확히 구분하여 피드백을 작성하고,
+      섹션 제목은 다음과 같이 시작해주세요:
+      - 1. 구조와 논리성:
+      - 2. 내용의 충실성:
+      - 3. 학술적 글쓰기:
+      - 4. 창의성과 독창성:
+      - 5. 형식과 표현:
+      - 6. 추가 제안사항:
+    - 부분 검토: 긴 보고서를 나눈 한 부분만 보고, 이 부분에서 관찰되는 강점과 개선점을 다섯 기준별로
+      간결하게 정리합니다. 근거가 되는 문장이나 표현을 짧게 인용하고, 해당 사항이 없는 기준은 생략합니다.
+      다른 부분은 보지 못했으므로 보고서 전체의 구성이나 점수에 대한 판단은 하지 않습니다.
 
-    각 섹션별로 명확히 구분하여 피드백을 작성하고, 섹션 제목은 다음과 같이 시작해주세요:
-    - 1. 구조와 논리성:
-    - 2. 내용의 충실성:
-    - 3. 학술적 글쓰기:
-    - 4. 창의성과 독창성:
-    - 5. 형식과 표현:
-    - 6. 추가 제안사항:
-    
     구체적이고 실행 가능한 조언을 제공해주세요.
     """
+
+# 긴 문서 분할 분석 설정 (한 번에 보낼 문서 분량과 부분 분석 동시 실행 수)
+ANALYSIS_CHUNK_TOKENS = 6000
+CHUNK_ANALYSIS_MAX_TOKENS = 1200
+CHUNK_ANALYSIS_CONCURRENCY = 6
+
+def _analysis_cache_key(content):
+    """문서 내용과 분석 설정으로 캐시 키 생성"""
+    return make_cache_key(
+        content,
+        FEEDBACK_SYSTEM_PROMPT,
+        ANALYSIS_MODEL,
+        max_tokens=ANALYSIS_MAX_TOKENS,
+        temperature=ANALYSIS_TEMPERATURE,
+        chunk_tokens=ANALYSIS_CHUNK_TOKENS
+    )
+
+def _analysis_calls(content):
+    """content 분석에 드는 AI 호출 수 (나누어 분석하면 부분 수 + 종합 1회)"""
+    chunks = chunk_text(content, ANALYSIS_CHUNK_TOKENS)
+    return 1 if len(chunks) == 1 else len(chunks) + 1
+
+def estimate_analysis_wait(content):
+    """지금 content 분석을 요청하면 AI 요청 예산(분당 요청·토큰 수)을 받기까지 기다릴 시간 추정 (초)"""
+    calls = _analysis_calls(content)
+    tokens = estimate_tokens(content) + calls * ANALYSIS_MAX_TOKENS
+    return llm_scheduler.estimate_wait(llm_client.provider_for(ANALYSIS_MODEL), tokens, calls)
+
+def strip_template(doc_data, template_index):
+    """템플릿 문단을 그대로 둔 블록을 분석 내용에서 빼기
     
-    try:
-        # 문서 내용이 너무 길 경우 요약
-        if len(content) > 10000:
-            content = content[:10000] + "\n\n[문서가 너무 길어 일부만 분석합니다]"
-        
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4000,  # 토큰 수 증가
-            temperature=0.3,
-            system=system_prompt,
-            messages=[
+    'content'와 'blocks'를 바꾼 새 문서 정보를 반환하며, 'template'에 건너뛴 문단 수,
+    추정 토큰 수, 줄어든 AI 호출 수({'paragraphs', 'tokens', 'calls'})를 담습니다.
+    """
+    kept, skipped = template_index.split(doc_data['blocks'])
+    content = blocks_to_text(kept).strip()
+    saved = {
+        'paragraphs': len(skipped),
+        'tokens': skipped_tokens(skipped),
+        'calls': _analysis_calls(doc_data['content']) - _analysis_calls(content),
+    }
+    return {**doc_data, 'content': content, 'blocks': kept, 'template': saved}
+
+def format_template_savings(saved):
+    """템플릿 제외로 절약한 양 한 줄 요약"""
+    return (f"📎 템플릿 그대로인 문단 {saved['paragraphs']}개 제외 · "
+            f"약 {saved['tokens']:,} 토큰, AI 호출 {saved['calls']}회 절약")
+
+def analyze_document_chunk(client, chunk, chunk_num, total_chunks, hedge=None):
+    """긴 문서의 한 부분을 다섯 기준별로 검토 (map 단계)"""
+    with metrics.timed('analyze_chunk') as span:
+        result = llm_client.complete(
+            ANALYSIS_MODEL,
+            [
                 {
                     "role": "user",
-                    "content": f"다음 학생의 연구 보고서를 분석하여 상세한 피드백을 제공해주세요.\n\n{content}"
+                    "content": f"[작업: 부분 검토]\n다음은 학생 연구 보고서의 {chunk_num}/{total_chunks} 부분입니다.\n\n{chunk}"
                 }
-            ]
+            ],
+            system=FEEDBACK_SYSTEM_PROMPT,
+            max_tokens=CHUNK_ANALYSIS_MAX_TOKENS,
+            temperature=ANALYSIS_TEMPERATURE,
+            client=client,
+            span=span,
+            hedge=hedge,
+            hedge_key='analyze_chunk'
         )
+    return result.text
+
+def _build_analysis_messages(client, content, hedge=None):
+    """분석 요청 메시지 생성
+    
+    문서가 한 번에 보낼 수 있는 분량이면 그대로 보내고, 더 길면 문단 경계에서
+    나눈 부분들을 동시에 검토(map)한 뒤 그 결과를 종합(reduce)하도록 요청합니다.
+    """
+    chunks = chunk_text(content, ANALYSIS_CHUNK_TOKENS)
+    if len(chunks) == 1:
+        return [
+            {
+                "role": "user",
+                "content": f"[작업: 전체 평가]\n다음 학생의 연구 보고서를 분석하여 상세한 피드백을 제공해주세요.\n\n{content}"
+            }
+        ]
+    
+    with ThreadPoolExecutor(max_workers=CHUNK_ANALYSIS_CONCURRENCY) as executor:
+        findings = list(executor.map(
+            metrics.in_current_run(lambda args: analyze_document_chunk(client, args[1], args[0] + 1, len(chunks), hedge)),
+            enumerate(chunks)
+        ))
+    
+    combined = "\n\n".join(
+        f"[{idx + 1}/{len(chunks)} 부분 검토 결과]\n{finding}"
+        for idx, finding in enumerate(findings)
+    )
+    return [
+        {
+            "role": "user",
+            "content": (
+                f"[작업: 전체 평가]\n다음은 긴 학생 연구 보고서를 {len(chunks)}개 부분으로 나누어 검토한 결과입니다.\n"
+                "보고서 전체를 읽은 것처럼 이 결과들을 종합하여 상세한 피드백을 제공해주세요.\n\n"
+                f"{combined}"
+            )
+        }
+    ]
+
+def analyze_document_content(content, use_cache=True, hedge=None, log=show_message):
+    """문서 내용을 분석하여 피드백 생성
+
+    use_cache가 False이면 캐시를 건너뛰고 새로 분석한 결과로 캐시를 갱신합니다.
+    hedge(HedgePolicy)를 넘기면 첫 토큰이 늦은 요청을 한 번 더 보냅니다.
+    알림과 오류는 log(수준, 메시지)로 보내며, 오류가 나면 None을 반환합니다.
+    """
+    cache_key = _analysis_cache_key(content)
+    cache = get_feedback_cache()
+    
+    if use_cache:
+        cached_feedback = cache.get(cache_key)
+        if cached_feedback is not None:
+            log('info', "♻️ 변경되지 않은 문서입니다. 이전 분석 결과를 재사용합니다.")
+            return cached_feedback
+    
+    try:
+        client = get_anthropic_client()
+        messages = _build_analysis_messages(client, content, hedge)
+        with metrics.timed('analyze') as span:
+            result = llm_client.complete(
+                ANALYSIS_MODEL,
+                messages,
+                system=FEEDBACK_SYSTEM_PROMPT,
+                max_tokens=ANALYSIS_MAX_TOKENS,  # 토큰 수 증가
+                temperature=ANALYSIS_TEMPERATURE,
+                client=client,
+                span=span,
+                hedge=hedge,
+                hedge_key='analyze'
+            )
         
-        return message.content[0].text
+        feedback = result.text
+        cache.set(cache_key, feedback)
+        return feedback
         
     except Exception as e:
-        st.error(f"❌ AI 분석 중 오류가 발생했습니다: {str(e)}")
+        log('error', f"❌ AI 분석 중 오류가 발생했습니다: {str(e)}")
         return None
 
-def parse_feedback_sections(feedback_text):
-    """AI 피드백을 섹션별로 파싱 - 개선된 버전"""
-    sections = {
-        "전체 평가": "",
-        "구조와 논리성": "",
-        "내용의 충실성": "",
-        "학술적 글쓰기": "",
-        "창의성과 독창성": "",
-        "형식과 표현": "",
-        "추가 제안사항": ""
-    }
+def stream_document_analysis(content, use_cache=True, log=show_message):
+    """문서 분석 결과를 생성되는 대로 조각(문자열) 단위로 반환하는 제너레이터
+
+    캐시에 결과가 있으면 전체 텍스트를 한 번에 반환하고,
+    스트리밍이 끝까지 완료된 경우에만 결과를 캐시에 저장합니다.
+    오류가 나면 log(수준, 메시지)로 알리고 멈춥니다.
+    """
+    cache_key = _analysis_cache_key(content)
+    cache = get_feedback_cache()
     
-    # 섹션 헤더 패턴 정의
-    section_patterns = {
-        "구조와 논리성": ["구조", "논리", "체계", "서론", "본론", "결론", "흐름"],
-        "내용의 충실성": ["내용", "충실", "깊이", "자료", "근거", "탐구"],
-        "학술적 글쓰기": ["학술", "인용", "출처", "객관", "참고문헌"],
-        "창의성과 독창성": ["창의", "독창", "새로운", "관점", "비판적"],
-        "형식과 표현": ["형식", "표현", "문법", "맞춤법", "어휘"],
-        "추가 제안사항": ["제안", "추가", "향후", "개선", "보완"]
-    }
+    if use_cache:
+        cached_feedback = cache.get(cache_key)
+        if cached_feedback is not None:
+            log('info', "♻️ 변경되지 않은 문서입니다. 이전 분석 결과를 재사용합니다.")
+            yield cached_feedback
+            return
+    
+    try:
+        client = get_anthropic_client()
+        messages = _build_analysis_messages(client, content)
+        parts = []
+        with metrics.timed('analyze', mode='stream') as span:
+            for text in llm_client.stream_text(
+                ANALYSIS_MODEL,
+                messages,
+                system=FEEDBACK_SYSTEM_PROMPT,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                temperature=ANALYSIS_TEMPERATURE,
+                client=client,
+                span=span
+            ):
+                parts.append(text)
+                yield text
+        
+        cache.set(cache_key, ''.join(parts))
+        
+    except Exception as e:
+        log('error', f"❌ AI 분석 중 오류가 발생했습니다: {str(e)}")
+
+# 피드백 섹션 순서
+FEEDBACK_SECTIONS = [
+    "전체 평가",
+    "구조와 논리성",
+    "내용의 충실성",
+    "학술적 글쓰기",
+    "창의성과 독창성",
+    "형식과 표현",
+    "추가 제안사항"
+]
+
+# "1. 구조와 논리성:", "**2. 내용의 충실성** (30점):", "### 6. 추가 제안사항" 형태의 섹션 제목
+SECTION_HEADER_PATTERN = re.compile(
+    r'^[#>*\s-]*[1-6]\s*[.)]\s*\**\s*'
+    r'(' + '|'.join(re.escape(name) for name in FEEDBACK_SECTIONS[1:]) + r')'
+    r'\s*\**\s*(?:\([^)]*\))?\s*\**\s*:?\s*\**\s*(.*)$'
+)
+
+class StreamingSectionParser:
+    """스트리밍으로 도착하는 AI 피드백을 섹션별로 나누는 파서
+    
+    번호가 붙은 섹션 제목이 나타나면 직전 섹션이 끝난 것으로 보고
+    feed()/close()의 반환값으로 (섹션 이름, 내용)을 돌려줍니다.
+    """
+    
+    def __init__(self):
+        self.current_section = FEEDBACK_SECTIONS[0]
+        self.sections = {}
+        self._lines = []
+        self._buffer = ""
+    
+    def _close_current(self):
+        content = '\n'.join(self._lines).strip()
+        self._lines = []
+        if not content:
+            return []
+        if self.current_section in self.sections:
+            self.sections[self.current_section] += "\n" + content
+        else:
+            self.sections[self.current_section] = content
+        return [(self.current_section, content)]
+    
+    def _process_line(self, line):
+        line = line.strip()
+        match = SECTION_HEADER_PATTERN.match(line)
+        if match:
+            closed = self._close_current()
+            self.current_section = match.group(1)
+            remainder = match.group(2).strip()
+            if remainder:
+                self._lines.append(remainder)
+            return closed
+        if line:
+            self._lines.append(line)
+        return []
+    
+    def feed(self, text):
+        """새로 도착한 텍스트 조각을 처리하고 완료된 섹션 목록 반환"""
+        self._buffer += text
+        closed = []
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            closed.extend(self._process_line(line))
+        return closed
+    
+    def close(self):
+        """스트림이 끝났을 때 남은 내용을 처리하고 완료된 섹션 목록 반환"""
+        closed = self._process_line(self._buffer)
+        self._buffer = ""
+        closed.extend(self._close_current())
+        return closed
     
-    lines = feedback_text.split('\n')
+    def current_text(self):
+        """아직 완료되지 않은 현재 섹션의 내용 (화면 표시용)"""
+        return '\n'.join(self._lines + [self._buffer.strip()]).strip()
+
+# 구조화 출력을 쓸 수 없을 때 사용하는 키워드 기반 섹션 구분 (앞쪽 섹션이 우선)
+SECTION_KEYWORDS = {
+    "구조와 논리성": ["구조", "논리", "체계", "서론", "본론", "결론", "흐름"],
+    "내용의 충실성": ["내용", "충실", "깊이", "자료", "근거", "탐구"],
+    "학술적 글쓰기": ["학술", "인용", "출처", "객관", "참고문헌"],
+    "창의성과 독창성": ["창의", "독창", "새로운", "관점", "비판적"],
+    "형식과 표현": ["형식", "표현", "문법", "맞춤법", "어휘"],
+    "추가 제안사항": ["제안", "추가", "향후", "개선", "보완"]
+}
+
+# 모든 키워드를 한 번에 찾는 정규식 (겹쳐 있는 키워드도 모두 찾도록 전방 탐색)과 키워드 → (우선순위, 섹션 이름)
+SECTION_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keywords in SECTION_KEYWORDS.values() for keyword in keywords) + '))'
+)
+SECTION_BY_KEYWORD = {}
+for _priority, (_section_name, _keywords) in enumerate(SECTION_KEYWORDS.items()):
+    for _keyword in _keywords:
+        SECTION_BY_KEYWORD.setdefault(_keyword, (_priority, _section_name))
+
+def _keyword_section(line):
+    """줄 앞부분의 키워드로 섹션 제목 줄인지 판단하여 섹션 이름 반환 (아니면 None)"""
+    # 라인 시작 부분에 섹션 키워드가 있고 ':' 또는 숫자가 포함된 경우
+    if ":" not in line and not any(char.isdigit() for char in line[:5]):
+        return None
+    matches = [SECTION_BY_KEYWORD[keyword] for keyword in SECTION_KEYWORD_PATTERN.findall(line.lower()[:20])]
+    return min(matches)[1] if matches else None
+
+def parse_feedback_sections(feedback_text):
+    """AI 피드백을 섹션별로 파싱 (구조화 출력을 쓸 수 없을 때의 대체 방법)"""
+    sections = {name: "" for name in FEEDBACK_SECTIONS}
     current_section = "전체 평가"
-    section_changed = False
     
-    for line in lines:
+    for line in feedback_text.split('\n'):
         line = line.strip()
         if line:
-            # 섹션 헤더 감지 (더 정확한 매칭)
-            section_changed = False
-            for section_name, keywords in section_patterns.items():
-                # 라인 시작 부분에 섹션 키워드가 있고 ':' 또는 숫자가 포함된 경우
-                if (any(keyword in line.lower()[:20] for keyword in keywords) and 
-                    (":" in line or any(char.isdigit() for char in line[:5]))):
-                    current_section = section_name
-                    section_changed = True
-                    break
+            # 섹션 헤더 감지
+            section_name = _keyword_section(line)
+            if section_name:
+                current_section = section_name
             
             # 현재 섹션에 내용 추가
-            if not section_changed or current_section == "전체 평가":
+            if not section_name or current_section == "전체 평가":
                 sections[current_section] += line + "\n"
     
     # 빈 섹션 제거 및 내용 정리
@@ -350,9 +756,402 @@ def parse_feedback_sections(feedback_text):
     
     return result
 
-def check_system_status():
-    """시스템 상태 확인"""
-    with st.sidebar:
+# 구조화 출력: 도구 입력 필드 → 피드백 섹션 이름
+STRUCTURED_SECTION_FIELDS = {
+    "overall": "전체 평가",
+    "structure": "구조와 논리성",
+    "content": "내용의 충실성",
+    "academic": "학술적 글쓰기",
+    "creativity": "창의성과 독창성",
+    "form": "형식과 표현",
+    "suggestions": "추가 제안사항"
+}
+
+# 평가 기준별 만점 (FEEDBACK_SYSTEM_PROMPT의 배점과 같음)
+RUBRIC_MAX_SCORES = {
+    "structure": 25,
+    "content": 30,
+    "academic": 20,
+    "creativity": 15,
+    "form": 10
+}
+
+FEEDBACK_TOOL = {
+    "name": "submit_feedback",
+    "description": "연구 보고서에 대한 섹션별 피드백과 기준별 점수를 제출합니다.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            **{
+                field: {"type": "string", "description": f"{name}에 대한 피드백"}
+                for field, name in STRUCTURED_SECTION_FIELDS.items()
+            },
+            "scores": {
+                "type": "object",
+                "description": "평가 기준별 점수",
+                "properties": {
+                    field: {"type": "integer", "minimum": 0, "maximum": max_score}
+                    for field, max_score in RUBRIC_MAX_SCORES.items()
+                },
+                "required": list(RUBRIC_MAX_SCORES)
+            }
+        },
+        "required": list(STRUCTURED_SECTION_FIELDS) + ["scores"]
+    }
+}
+
+STRUCTURED_INSTRUCTION = "피드백은 submit_feedback 도구로 제출하고, 각 기준의 점수도 배점 안에서 매겨주세요."
+
+def validate_structured_feedback(data):
+    """도구 입력을 검사하여 {'sections': {섹션: 내용}, 'scores': {섹션: (점수, 만점)}}로 변환
+    
+    필수 필드가 없거나 형식이 맞지 않으면 ValueError를 발생시킵니다.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("구조화 출력이 객체가 아닙니다")
+    
+    sections = {}
+    for field, name in STRUCTURED_SECTION_FIELDS.items():
+        text = data.get(field)
+        if not isinstance(text, str):
+            raise ValueError(f"'{field}' 필드가 없습니다")
+        if text.strip():
+            sections[name] = text.strip()
+    
+    raw_scores = data.get('scores')
+    if not isinstance(raw_scores, dict):
+        raise ValueError("'scores' 필드가 없습니다")
+    scores = {}
+    for field, max_score in RUBRIC_MAX_SCORES.items():
+        score = raw_scores.get(field)
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            raise ValueError(f"'{field}' 점수가 없습니다")
+        scores[STRUCTURED_SECTION_FIELDS[field]] = (min(max_score, max(0, round(score))), max_score)
+    
+    return {'sections': sections, 'scores': scores}
+
+def format_scores(scores):
+    """기준별 점수를 한 줄씩 표시하는 텍스트"""
+    total = sum(score for score, _ in scores.values())
+    total_max = sum(max_score for _, max_score in scores.values())
+    lines = [f"- {name}: {score}/{max_score}점" for name, (score, max_score) in scores.items()]
+    return '\n'.join(lines + [f"- 합계: {total}/{total_max}점"])
+
+def format_feedback_report(title, sections, scores=None):
+    """섹션별 피드백을 마크다운 보고서 파일 내용으로 만들기 (로컬 파일 분석 결과 저장용)"""
+    lines = [f"# 🤖 AI 피드백 - {title}", ""]
+    if scores:
+        lines += ["## 📊 기준별 점수", format_scores(scores), ""]
+    for section_name, content in sections.items():
+        if content:
+            lines += [f"## {section_name}", "", content.strip(), ""]
+    return '\n'.join(lines)
+
+def analyze_document_structured(content, use_cache=True, log=show_message):
+    """문서를 분석하여 섹션별 피드백과 기준별 점수를 구조화된 형태로 반환
+    
+    도구 호출(tool use)로 스키마에 맞는 JSON을 받으므로 키워드 파싱이 필요 없습니다.
+    모델이 형식에 맞지 않게 답하면 일반 텍스트 분석을 다시 실행하고 키워드 파서로
+    나누며, 이때 scores는 None입니다. 오류가 나면 log(수준, 메시지)로 알리고 None을 반환합니다.
+    """
+    cache_key = make_cache_key(
+        content,
+        FEEDBACK_SYSTEM_PROMPT + json.dumps(FEEDBACK_TOOL, ensure_ascii=False),
+        ANALYSIS_MODEL,
+        max_tokens=ANALYSIS_MAX_TOKENS,
+        temperature=ANALYSIS_TEMPERATURE,
+        chunk_tokens=ANALYSIS_CHUNK_TOKENS,
+        output='structured'
+    )
+    cache = get_feedback_cache()
+    
+    if use_cache:
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            log('info', "♻️ 변경되지 않은 문서입니다. 이전 분석 결과를 재사용합니다.")
+            return validate_structured_feedback(json.loads(cached_result))
+    
+    try:
+        client = get_anthropic_client()
+        messages = _build_analysis_messages(client, content)
+        messages[-1] = {
+            "role": "user",
+            "content": f"{messages[-1]['content']}\n\n{STRUCTURED_INSTRUCTION}"
+        }
+        with metrics.timed('analyze', mode='structured') as span:
+            # 도구 호출을 강제하여 스키마에 맞는 입력(JSON)을 받음
+            tool_input = llm_client.complete(
+                ANALYSIS_MODEL,
+                messages,
+                system=FEEDBACK_SYSTEM_PROMPT,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                temperature=ANALYSIS_TEMPERATURE,
+                tool=FEEDBACK_TOOL,
+                client=client,
+                span=span
+            ).tool_input
+        with metrics.timed('parse', mode='structured'):
+            try:
+                result = validate_structured_feedback(tool_input)
+            except ValueError:
+                result = None
+        
+        if result is not None:
+            cache.set(cache_key, json.dumps(tool_input, ensure_ascii=False))
+            return result
+    
+    except Exception as e:
+        log('error', f"❌ AI 분석 중 오류가 발생했습니다: {str(e)}")
+        return None
+    
+    # 형식에 맞지 않는 답변: 일반 텍스트로 다시 분석 (재실행 횟수 기록)
+    metrics.count('analysis_rerun', reason='invalid_structured_output')
+    feedback = analyze_document_content(content, use_cache=use_cache, log=log)
+    if not feedback:
+        return None
+    with metrics.timed('parse', mode='keyword'):
+        sections = parse_feedback_sections(feedback)
+    return {'sections': sections, 'scores': None}
+
+# 작업 진행 상황을 다시 확인하는 간격 (초)
+JOB_POLL_INTERVAL = 1.0
+
+def run_feedback_job(job, commenter, doc_id, stream_mode=True, use_cache=True, structured=False, hedge=None,
+                     student_label=None):
+    """백그라운드 작업: 문서 읽기 → AI 분석 → 섹션별 댓글 추가
+    
+    작업 스레드에서 실행되므로 화면에 출력하지 않고 job에 진행 상황을 기록합니다.
+    실시간 모드에서는 섹션이 완성될 때마다 바로 댓글로 추가하고, 구조화 모드에서는
+    섹션별 피드백과 기준별 점수를 JSON으로 받습니다 (실시간 모드가 우선).
+    hedge는 일반 모드의 분석 요청에만 적용됩니다.
+    결과에는 단계별 소요 시간 요약('timings')과 점수('scores')가 포함됩니다.
+    끝난 분석은 student_label("3학년 2반 김OO")의 학급·학생으로 피드백 히스토리에 기록합니다.
+    요청이 몰려 AI 요청 예산을 기다리는 동안에는 예상 대기 시간을 상태 메시지로 보여줍니다.
+    """
+    def show_wait(seconds):
+        job.update(message=f"⏳ 요청이 몰려 차례를 기다리는 중입니다 (약 {seconds:.0f}초)")
+    
+    with metrics.track_run() as run, llm_scheduler.scheduling(on_wait=show_wait):
+        result = _run_feedback_job(job, commenter, doc_id, stream_mode, use_cache, structured, hedge)
+    result['timings'] = run.summary()
+    record_history(job.log, doc_id, result, student_label)
+    return result
+
+def record_history(log, doc_id, result, student_label=None):
+    """분석 결과를 피드백 히스토리에 기록 (실패해도 분석 결과에는 영향 없음, log(수준, 메시지)로 알림)"""
+    class_name, student = parse_label(student_label, fallback=result['title'])
+    try:
+        get_feedback_history().record(
+            doc_id, result['title'], result['word_count'], result['sections'],
+            scores=result['scores'], timings=result['timings'],
+            class_name=class_name, student=student
+        )
+    except Exception as e:
+        log('warning', f"⚠️ 피드백 히스토리를 기록하지 못했습니다: {str(e)}")
+
+def analyze_uploaded_file(uploaded, student_label=None):
+    """업로드한 보고서 파일(Word, PDF, 텍스트)을 구글 문서 없이 바로 분석
+    
+    결과는 댓글 대신 화면과 내려받기 파일로 보여주며 피드백 히스토리에도 기록합니다.
+    """
+    with metrics.track_run() as run:
+        try:
+            with metrics.timed('fetch', source='file'):
+                doc_data = read_document(uploaded)
+        except Exception as e:
+            st.error(f"❌ 파일을 읽지 못했습니다: {str(e)}")
+            return
+        if not doc_data['content']:
+            st.warning("⚠️ 파일에서 읽을 수 있는 내용이 없습니다.")
+            return
+        
+        # 템플릿 문단을 그대로 둔 부분은 분석하지 않음 (템플릿은 구글 문서이므로 Google API를 쓸 수 있을 때만)
+        commenter = GoogleDocsCommenter()
+        template_index = None
+        if commenter.is_available():
+            try:
+                template_index = get_template_index(commenter.docs_service)
+            except Exception as e:
+                st.warning(f"⚠️ 보고서 템플릿을 읽지 못해 모든 문단을 분석합니다: {str(e)}")
+        if template_index:
+            doc_data = strip_template(doc_data, template_index)
+            if doc_data['template']['paragraphs']:
+                st.info(format_template_savings(doc_data['template']))
+            if not doc_data['content']:
+                st.warning("⚠️ 템플릿 외에 작성한 내용이 없습니다. 보고서를 작성한 뒤 다시 시도해주세요.")
+                return
+        
+        with st.spinner(f"🤖 {doc_data['title']} 분석 중..."):
+            feedback = analyze_document_content(doc_data['content'])
+        if not feedback:
+            st.error("❌ AI 분석 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+            return
+        
+        with metrics.timed('parse', mode='keyword'):
+            feedback_sections = parse_feedback_sections(feedback)
+    
+    result = {
+        'title': doc_data['title'],
+        'word_count': doc_data['word_count'],
+        'sections': feedback_sections,
+        'scores': None,
+        'timings': run.summary()
+    }
+    record_history(show_message, doc_data['doc_id'], result, student_label)
+    
+    st.success(f"✅ 분석 완료: {doc_data['title']} ({doc_data['word_count']:,}단어)")
+    for section_name, content in feedback_sections.items():
+        if content:
+            st.markdown(f"**{section_name}**\n\n{content}")
+    st.download_button(
+        "📥 피드백 보고서 내려받기",
+        format_feedback_report(doc_data['title'], feedback_sections),
+        file_name=f"{doc_data['title']}_AI피드백.md",
+        mime="text/markdown"
+    )
+
+def _run_feedback_job(job, commenter, doc_id, stream_mode, use_cache, structured, hedge):
+    job.update(0.05, "📖 구글 문서 내용을 읽는 중...")
+    doc_data = commenter.get_document_content(doc_id, use_snapshot=use_cache, log=job.log)
+    if not doc_data:
+        raise RuntimeError("문서를 읽지 못했습니다. 공유 설정을 확인해주세요.")
+    job.log('success', f"✅ 문서 읽기 성공: {doc_data['title']}")
+    
+    # 템플릿 문단을 그대로 둔 부분은 분석하지 않음
+    try:
+        template_index = get_template_index(commenter.docs_service)
+    except Exception as e:
+        template_index = None
+        job.log('warning', f"⚠️ 보고서 템플릿을 읽지 못해 모든 문단을 분석합니다: {str(e)}")
+    if template_index:
+        doc_data = strip_template(doc_data, template_index)
+        if doc_data['template']['paragraphs']:
+            job.log('info', format_template_savings(doc_data['template']))
+        if not doc_data['content']:
+            raise RuntimeError("템플릿 외에 작성한 내용이 없습니다. 보고서를 작성한 뒤 다시 시도해주세요.")
+    
+    success_count = 0
+    scores = None
+    wait = estimate_analysis_wait(doc_data['content'])
+    if wait >= 1:
+        job.log('info', f"⏳ 지금 분석 요청이 많아 시작까지 약 {wait:.0f}초 걸릴 수 있습니다")
+    job.update(0.15, "🤖 AI가 문서를 분석하고 있습니다...")
+    
+    if stream_mode:
+        parser = StreamingSectionParser()
+        last_closed = time.perf_counter()
+        
+        def post(closed_sections):
+            nonlocal success_count, last_closed
+            for section_name, section_content in closed_sections:
+                # 섹션 하나가 완성되기까지 걸린 시간
+                now = time.perf_counter()
+                metrics.observe('section', now - last_closed)
+                last_closed = now
+                job.set_section(section_name, parser.sections[section_name])
+                job.update(message=f"📝 {section_name} 댓글 추가 중...")
+                comment_text = f"🤖 AI 피드백 - {section_name}\n\n{section_content}"
+                if commenter.add_comment(doc_id, comment_text, log=job.log):
+                    success_count += 1
+                    job.log('success', f"✅ {section_name} 댓글 추가 완료")
+                else:
+                    job.log('error', f"❌ {section_name} 댓글 추가 실패")
+                job.update(0.15 + 0.85 * len(parser.sections) / len(FEEDBACK_SECTIONS))
+        
+        for text in stream_document_analysis(doc_data['content'], use_cache=use_cache, log=job.log):
+            post(parser.feed(text))
+            job.set_section(parser.current_section, parser.current_text())
+            job.update(message=f"✍️ {parser.current_section} 작성 중...")
+        post(parser.close())
+        
+        if not parser.sections:
+            raise RuntimeError("AI 분석 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+        feedback_sections = parser.sections
+    
+    else:
+        if structured:
+            analysis = analyze_document_structured(doc_data['content'], use_cache=use_cache, log=job.log)
+            if not analysis:
+                raise RuntimeError("AI 분석 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+            feedback_sections, scores = analysis['sections'], analysis['scores']
+        else:
+            feedback = analyze_document_content(doc_data['content'], use_cache=use_cache, hedge=hedge, log=job.log)
+            if not feedback:
+                raise RuntimeError("AI 분석 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+            
+            with metrics.timed('parse', mode='keyword'):
+                feedback_sections = parse_feedback_sections(feedback)
+        
+        section_comments = []
+        for section_name, content in feedback_sections.items():
+            if content:
+                job.set_section(section_name, content)
+                comment_text = f"🤖 AI 피드백 - {section_name}\n\n{content}"
+                if scores and section_name == FEEDBACK_SECTIONS[0]:
+                    comment_text += f"\n\n📊 기준별 점수\n{format_scores(scores)}"
+                section_comments.append((section_name, comment_text))
+        
+        job.update(0.8, f"📝 {len(section_comments)}개 섹션 댓글을 한 번에 추가 중...")
+        results = commenter.add_comments(doc_id, [text for _, text in section_comments], log=job.log)
+        for (section_name, _), added in zip(section_comments, results):
+            if added:
+                success_count += 1
+                job.log('success', f"✅ {section_name} 댓글 추가 완료")
+            else:
+                job.log('error', f"❌ {section_name} 댓글 추가 실패")
+    
+    job.update(1.0, "✅ 분석 완료")
+    return {
+        'title': doc_data['title'],
+        'success_count': success_count,
+        'scores': scores,
+        'sections': feedback_sections,
+        'word_count': doc_data['word_count'],
+        'template': doc_data.get('template')
+    }
+
+def render_job(snapshot, doc_url):
+    """작업 진행 상황과 결과 표시"""
+    st.markdown("---")
+    
+    if snapshot['status'] == STATUS_FAILED:
+        st.progress(snapshot['progress'])
+    else:
+        st.progress(snapshot['progress'], text=snapshot['message'])
+    
+    for level, text in snapshot['events']:
+        getattr(st, level)(text)
+    
+    if snapshot['result'] and snapshot['result'].get('scores'):
+        st.markdown("### 📊 기준별 점수")
+        st.markdown(format_scores(snapshot['result']['scores']))
+    
+    if snapshot['sections']:
+        st.markdown("### 📝 AI 피드백")
+        for section_name, text in snapshot['sections'].items():
+            st.markdown(f"**{section_name}**\n\n{text}")
+    
+    if snapshot['status'] == STATUS_FAILED:
+        st.error(f"❌ {snapshot['error']}")
+    elif snapshot['status'] == STATUS_DONE:
+        success_count = snapshot['result']['success_count']
+        if success_count > 0:
+            # 풍선 효과는 작업마다 한 번만
+            if st.session_state.celebrated_job_id != snapshot['id']:
+                st.balloons()
+                st.session_state.celebrated_job_id = snapshot['id']
+            st.success(f"🎉 총 {success_count}개 댓글이 추가되었습니다!")
+            if doc_url:
+                st.link_button("📝 구글 문서에서 댓글 확인하기", doc_url)
+        
+        # 단계별 소요 시간
+        with st.sidebar:
+            st.markdown("### ⏱️ 최근 분석 시간")
+            st.caption("  \n".join(metrics.summary_lines(snapshot['result']['timings'])))
+
+def check_system_status(area):
+    """시스템 상태 확인 (area: 사이드바에 미리 잡아 둔 자리)"""
+    with area:
         st.markdown("### 🔧 시스템 상태")
         
         # Anthropic API 체크
@@ -371,7 +1170,7 @@ def check_system_status():
             if google_config:
                 st.success("✅ 구글 API 설정 확인됨")
                 
-                # Google 연결 테스트
+                # 공유 서비스 풀 확인 (네트워크 호출 없음)
                 commenter = GoogleDocsCommenter()
                 if commenter.is_available():
                     st.success("✅ 구글 댓글 기능 활성화")
@@ -381,37 +1180,69 @@ def check_system_status():
                 st.warning("⚠️ 구글 댓글 기능 비활성화")
         except Exception as e:
             st.error(f"❌ 구글 연결 오류: {str(e)}")
+        
+        # 피드백 캐시 상태
+        cache_stats = get_feedback_cache().stats()
+        st.caption(
+            f"♻️ 피드백 캐시: 적중 {cache_stats['hits']}회 · "
+            f"미적중 {cache_stats['misses']}회 · 저장 {cache_stats['size']}건"
+        )
+        
+        # 바뀌지 않아 다시 읽지 않은 문서
+        snapshot_stats = get_snapshot_cache().stats()
+        st.caption(
+            f"📄 문서 스냅숏: 재사용 {snapshot_stats['hits']}회 · "
+            f"새로 읽음 {snapshot_stats['misses']}회 · 저장 {snapshot_stats['size']}건"
+        )
+        
+        # 교사용 대시보드에 쌓인 기록
+        history_stats = get_feedback_history().stats()
+        st.caption(
+            f"📚 피드백 히스토리: {history_stats['runs']:,}건 · 학급 {history_stats['classes']}개 "
+            f"(대시보드: streamlit run dashboard.py)"
+        )
+
+        # 프롬프트 앞부분 캐시 적중률 (API 제공자 측 캐시)
+        prompt_stats = get_prompt_cache_stats('anthropic').snapshot()
+        if prompt_stats['requests']:
+            st.caption(
+                f"🧠 프롬프트 캐시: 입력 토큰의 {prompt_stats['hit_rate']:.0%} 재사용 · "
+                f"캐시 토큰 {prompt_stats['cached_tokens']:,}개 / 요청 {prompt_stats['requests']}회"
+            )
+        
+        # AI 요청 예산 대기 현황
+        schedule_stats = llm_scheduler.get_scheduler(llm_client.provider_for(ANALYSIS_MODEL)).stats()
+        if schedule_stats['queued']:
+            st.caption(
+                f"🚦 요청 예산 대기: {schedule_stats['queued']}/{schedule_stats['granted']}회 · "
+                f"평균 {schedule_stats['waited_seconds'] / schedule_stats['queued']:.1f}초 · "
+                f"지금 대기 {schedule_stats['waiting']}건"
+            )
+        
+        # 느린 요청 중복 전송 현황
+        hedge_stats = get_hedge_policy().stats.snapshot()
+        if hedge_stats['hedged']:
+            st.caption(
+                f"🏎️ 중복 전송: {hedge_stats['hedged']}회 (요청의 {hedge_stats['hedge_rate']:.0%}) · "
+                f"먼저 도착 {hedge_stats['hedge_wins']}회 · 약 {hedge_stats['saved_seconds']:.1f}초 단축"
+            )
 
 def main():
-    # 시스템 상태 확인
-    check_system_status()
+    # 시스템 상태는 사이드바 맨 위에 자리만 잡고 본문을 그린 뒤에 채움
+    status_area = st.sidebar.container()
     
     # 헤더
-    st.markdown('<h1 class="main-header">📝 연구 보고서 AI 피드백 시스템</h1>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-header">구글 문서 링크를 입력하면 AI가 상세한 피드백을 댓글로 달아드립니다</p>', unsafe_allow_html=True)
+    st.markdown(ui_assets.RESEARCH_HEADER, unsafe_allow_html=True)
     
     # 사용 안내
     with st.expander("📋 사용 방법 및 참고 자료", expanded=False):
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("""
-            ### 📖 사용 방법
-            1. **구글 문서 준비**: 연구 보고서를 구글 문서로 작성
-            2. **공유 설정**: "링크가 있는 모든 사용자 - 댓글 작성자" 권한 설정
-            3. **링크 입력**: 아래에 구글 문서 링크 붙여넣기
-            4. **분석 시작**: "피드백 분석 시작" 버튼 클릭
-            5. **결과 확인**: 구글 문서에 추가된 댓글 확인 및 활용
-            """)
+            st.markdown(ui_assets.RESEARCH_USAGE)
         
         with col2:
-            st.markdown("""
-            ### 🔗 참고 자료
-            - [📋 탐구 보고서 계획서](https://docs.google.com/document/d/1aAUtsWK8daVP1TVnd9Zn_WE-FNvG8a2FaXXWzL2oPt4/edit?usp=sharing)
-            - [📖 보고서 작성 가이드](https://docs.google.com/document/d/16PuheEpWW8l6bbHwLCYCbeMpti_lk59qlqLYzxsRjD4/edit?usp=sharing)
-            - [💡 예시 주제 목록](https://docs.google.com/document/d/1SvYyqBKpvOUNGfGTHs_xdGfs5TK3ppdDnnZeyM3Aw-E/edit?usp=sharing)
-            - [📄 보고서 템플릿](https://docs.google.com/document/d/1lvZ916Xo5WTw7Gzuvv3kXBbRvrV6PW9buDQWK5byCKU/edit?usp=sharing)
-            """)
+            st.markdown(ui_assets.RESEARCH_LINKS)
     
     st.markdown("---")
     
@@ -425,6 +1256,11 @@ def main():
         help="구글 문서의 전체 URL을 입력해주세요",
         label_visibility="collapsed"
     )
+    student_label = st.text_input(
+        "학급·이름 (선택)",
+        placeholder="예: 3학년 2반 김OO",
+        help="입력하면 교사용 대시보드에서 학급별·학생별 피드백 기록을 볼 수 있습니다"
+    )
     
     # 문서 링크 검증
     if doc_url:
@@ -442,15 +1278,33 @@ def main():
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         analyze_button = st.button("🚀 피드백 분석 시작", type="primary", disabled=not st.session_state.current_doc_id)
+        stream_mode = st.checkbox(
+            "⚡ 실시간 모드",
+            value=True,
+            help="AI가 섹션을 작성하는 대로 화면에 보여주고 바로 댓글로 추가합니다"
+        )
+        structured_mode = st.checkbox(
+            "📐 기준별 점수 포함 (구조화 출력)",
+            disabled=stream_mode,
+            help="섹션별 피드백과 기준별 점수를 정해진 형식으로 받아 섹션을 정확하게 나눕니다 (실시간 모드를 끄면 사용 가능)"
+        )
+        bypass_cache = st.checkbox(
+            "♻️ 이전 분석 결과 무시하고 새로 분석",
+            help="문서가 바뀌지 않았어도 AI 분석을 다시 실행합니다"
+        )
+        hedge_mode = st.checkbox(
+            "🏎️ 느린 요청 중복 전송",
+            disabled=stream_mode or structured_mode,
+            help="AI 응답이 평소보다 늦으면 같은 요청을 한 번 더 보내 먼저 도착한 결과를 사용합니다 (일반 모드에서 사용 가능)"
+        )
     
     # 분석 실행
     if analyze_button and st.session_state.current_doc_id:
-        st.markdown("---")
-        
         # Google Docs 연동 초기화
         commenter = GoogleDocsCommenter()
         
         if not commenter.is_available():
+            st.markdown("---")
             st.warning("⚠️ Google API를 사용할 수 없습니다. 데모 모드로 실행됩니다.")
             
             # 데모 모드
@@ -473,73 +1327,60 @@ def main():
                 st.info("💡 실제 운영 시 이 피드백이 구글 문서에 댓글로 추가됩니다.")
         
         else:
-            # 실제 모드
+            # 실제 모드: 백그라운드 작업으로 실행 (화면이 다시 실행되어도 계속 진행)
             doc_id = st.session_state.current_doc_id
+            job_manager = get_job_manager()
             
-            # 문서 내용 읽기
-            with st.spinner("📖 구글 문서 내용을 읽는 중..."):
-                doc_data = commenter.get_document_content(doc_id)
+            # 같은 문서를 이미 분석 중이면 새로 시작하지 않고 그 작업에 연결
+            running_job = job_manager.find(doc_id)
+            if running_job is not None and running_job.active:
+                st.info("⏳ 이 문서는 이미 분석 중입니다. 진행 중인 작업에 연결합니다.")
             
-            if doc_data:
-                st.success(f"✅ 문서 읽기 성공: {doc_data['title']}")
-                
-                # AI 분석
-                with st.spinner("🤖 AI가 문서를 분석하고 있습니다..."):
-                    feedback = analyze_document_content(doc_data['content'])
-                
-                if feedback:
-                    # 피드백 섹션 파싱
-                    feedback_sections = parse_feedback_sections(feedback)
-                    
-                    # 댓글 추가
-                    st.markdown("### 📝 구글 문서에 댓글 추가 중...")
-                    
-                    success_count = 0
-                    total_sections = len(feedback_sections)
-                    
-                    # 프로그레스 바 추가
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    for idx, (section_name, content) in enumerate(feedback_sections.items()):
-                        if content:
-                            status_text.text(f"📝 {section_name} 댓글 추가 중...")
-                            comment_text = f"🤖 AI 피드백 - {section_name}\n\n{content}"
-                            
-                            # 댓글 길이 확인
-                            if len(comment_text) > 1000:
-                                st.info(f"📏 {section_name} 섹션 길이: {len(comment_text)}자")
-                            
-                            if commenter.add_comment(doc_id, comment_text):
-                                success_count += 1
-                                st.success(f"✅ {section_name} 댓글 추가 완료")
-                            else:
-                                st.error(f"❌ {section_name} 댓글 추가 실패")
-                            
-                            # 프로그레스 바 업데이트
-                            progress_bar.progress((idx + 1) / total_sections)
-                            time.sleep(2)  # API 호출 간격
-                    
-                    progress_bar.empty()
-                    status_text.empty()
-                    
-                    if success_count > 0:
-                        st.balloons()
-                        st.success(f"🎉 총 {success_count}개 댓글이 추가되었습니다!")
-                        st.link_button("📝 구글 문서에서 댓글 확인하기", doc_url)
+            job = job_manager.submit(
+                doc_id, run_feedback_job, commenter, doc_id,
+                stream_mode=stream_mode, use_cache=not bypass_cache,
+                structured=structured_mode and not stream_mode,
+                hedge=get_hedge_policy() if hedge_mode and not (stream_mode or structured_mode) else None,
+                student_label=student_label
+            )
+            st.session_state.job_id = job.id
     
     elif analyze_button and not st.session_state.current_doc_id:
         st.error("❌ 유효한 구글 문서 링크를 먼저 입력해주세요.")
     
+    # 내려받아 둔 파일은 구글 문서 없이 바로 분석
+    with st.expander("📁 파일로 분석하기 (Word, PDF, 텍스트)", expanded=False):
+        uploaded = st.file_uploader(
+            "보고서 파일",
+            type=[extension.lstrip('.') for extension in SUPPORTED_EXTENSIONS],
+            help="구글 문서 대신 파일 내용을 분석합니다. 피드백은 댓글 대신 파일로 내려받습니다 (PDF는 pypdf 설치 필요)"
+        )
+        if st.button("📄 파일 분석 시작", disabled=uploaded is None):
+            analyze_uploaded_file(uploaded, student_label)
+    
+    # 진행 중이거나 끝난 작업 표시 (재실행·재접속한 세션도 같은 작업에 다시 연결)
+    job_manager = get_job_manager()
+    job = job_manager.get(st.session_state.job_id)
+    current_doc_id = st.session_state.current_doc_id
+    if current_doc_id and (job is None or job.key != current_doc_id):
+        job = job_manager.find(current_doc_id)
+    
+    if job is not None:
+        st.session_state.job_id = job.id
+        st.query_params["job"] = job.id
+        render_job(job.snapshot(), f"https://docs.google.com/document/d/{job.key}/edit")
+    
     # 푸터
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #666; margin-top: 2rem; padding: 1rem; background-color: #f8f9fa; border-radius: 10px;">
-        <p><strong>🏫 완도고등학교</strong></p>
-        <p>📧 개발: 국어교사 공지훈 | 💡 이 도구는 완도고등학교 학생들의 연구 보고서 작성을 돕기 위해 개발되었습니다</p>
-        <p><small>⚠️ AI 피드백은 참고용이며, 최종 판단은 학생과 교사가 함께 해야 합니다</small></p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(ui_assets.RESEARCH_FOOTER, unsafe_allow_html=True)
+    
+    # 시스템 상태 확인 (Google 서비스 풀을 처음 만들면 라이브러리를 불러오므로 본문을 먼저 그림)
+    check_system_status(status_area)
+    
+    # 작업이 끝날 때까지 주기적으로 화면을 다시 그려 진행 상황 갱신
+    if job is not None and job.active:
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,409 @@
+"""학년 전체 보고서를 한 번에 분석하는 배치 실행기
+
+Streamlit 화면 없이 명단 파일의 구글 문서들을 여러 작업자로 동시에 처리합니다.
+문서마다 진행 상황을 저널 파일에 기록하므로, 중간에 멈추거나 중단된 실행을
+같은 저널로 다시 시작하면 이미 끝난 문서와 단계는 건너뜁니다.
+
+사용 예:
+    python batch_runner.py roster.csv --workers 8 --journal journals/2학년.jsonl
+
+명단 파일은 한 줄에 문서 하나이며, 구글 문서 링크가 들어 있는 칸을 찾아 사용합니다.
+(예: "3학년 2반 김OO,https://docs.google.com/document/d/.../edit")
+링크 대신 내 컴퓨터의 파일 경로(.docx, .pdf, .txt, .md)를 적거나 명단 대신 폴더를 넘기면
+구글 API를 거치지 않고 파일을 읽어 분석하며, 피드백은 댓글 대신 --report-dir에
+마크다운 보고서 파일로 저장합니다. 폴더를 넘기면 파일 이름이 명단의 이름 칸이 됩니다.
+Google 서비스 계정과 Anthropic API 키는 앱과 같은 .streamlit/secrets.toml에서 읽습니다.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import app
+import llm_scheduler
+import local_documents
+import metrics
+from feedback_history import parse_label
+from hedging import HedgePolicy
+from prompt_cache import get_prompt_cache_stats
+
+STAGES = ("fetch", "analyze", "parse", "comment")
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class RunJournal:
+    """문서별 진행 상황을 한 줄씩 추가하는 JSON Lines 저널"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self):
+        """저널을 읽어 문서별 최신 상태 반환"""
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 기록 도중 중단되어 잘린 마지막 줄은 무시
+                    continue
+
+                state = states.setdefault(record['doc_id'], {'status': None, 'posted': set()})
+                event = record['event']
+                if event == 'analyzed':
+                    state['feedback'] = record['feedback']
+                    state['title'] = record.get('title')
+                    state['word_count'] = record.get('word_count')
+                elif event == 'commented':
+                    state['posted'].update(record['sections'])
+                elif event in (STATUS_DONE, STATUS_FAILED):
+                    state['status'] = event
+        return states
+
+    def record(self, doc_id, event, **data):
+        """이벤트를 저널 끝에 추가하고 디스크에 즉시 반영"""
+        record = {'doc_id': doc_id, 'event': event, 'ts': time.time(), **data}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class StageTimer:
+    """단계별 처리 시간 수집"""
+
+    def __init__(self):
+        self.durations = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.durations[stage].append(seconds)
+
+    def summary(self):
+        """단계별 (횟수, 평균, p50, p95) 반환"""
+        result = {}
+        for stage, values in self.durations.items():
+            if values:
+                ordered = sorted(values)
+                result[stage] = (
+                    len(ordered),
+                    sum(ordered) / len(ordered),
+                    percentile(ordered, 50),
+                    percentile(ordered, 95),
+                )
+        return result
+
+
+class TemplateSavings:
+    """템플릿 문단을 건너뛰어 절약한 양 합계"""
+
+    def __init__(self):
+        self.documents = 0
+        self.paragraphs = 0
+        self.tokens = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def add(self, saved):
+        with self._lock:
+            self.documents += 1
+            self.paragraphs += saved['paragraphs']
+            self.tokens += saved['tokens']
+            self.calls += saved['calls']
+
+
+def percentile(ordered, pct):
+    """정렬된 값 목록의 백분위수"""
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def read_roster(path):
+    """명단 파일에서 (이름, 링크, 문서 ID) 목록 읽기
+
+    로컬 파일 경로가 적힌 줄은 'path'가 들어간 항목이 되며, 상대 경로는 명단 파일 위치 기준입니다.
+    path가 폴더이면 폴더 안의 지원하는 파일 전체를 파일 이름을 이름 칸으로 삼아 읽습니다.
+    로컬 파일 항목의 'name'은 명단 기준 상대 경로(확장자 포함)로, 보고서 파일 이름에 씁니다.
+    """
+    if os.path.isdir(path):
+        return [
+            {'label': os.path.splitext(os.path.relpath(file_path, path))[0], 'url': None,
+             'path': file_path, 'name': os.path.relpath(file_path, path),
+             'doc_id': local_documents.local_doc_id(file_path)}
+            for file_path in local_documents.find_documents(path)
+        ]
+
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    seen = set()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.reader(f):
+            cells = [cell.strip() for cell in row if cell.strip()]
+            if not cells or cells[0].startswith('#'):
+                continue
+
+            url = next((cell for cell in cells if app.extract_doc_id(cell)), None)
+            local = next((cell for cell in cells if local_documents.is_supported(cell)), None) if url is None else None
+            if url is None and local is None:
+                continue
+
+            if url is not None:
+                entry = {'url': url, 'doc_id': app.extract_doc_id(url)}
+            else:
+                file_path = os.path.join(base, local)
+                entry = {'url': None, 'path': file_path, 'name': local,
+                         'doc_id': local_documents.local_doc_id(file_path)}
+            if entry['doc_id'] in seen:
+                continue
+            seen.add(entry['doc_id'])
+
+            source = url or local
+            entry['label'] = ' '.join(cell for cell in cells if cell != source) or (
+                os.path.splitext(os.path.basename(local))[0] if local else entry['doc_id']
+            )
+            entries.append(entry)
+    return entries
+
+
+def write_report(report_dir, entry, title, feedback_sections):
+    """로컬 파일의 피드백을 마크다운 보고서로 저장하고 경로 반환
+
+    보고서 이름은 명단 기준 상대 경로를 확장자까지 이어 붙여 만들므로
+    1반/kim.docx와 2반/kim.docx, kim.docx와 kim.pdf가 서로 덮어쓰지 않습니다.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    relative = os.path.normpath(entry.get('name') or entry['path'])
+    name = '_'.join(part for part in relative.split(os.sep) if part not in ('', '.', '..'))
+    path = os.path.join(report_dir, f"{name}_AI피드백.md")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(app.format_feedback_report(title, feedback_sections))
+    return path
+
+
+def entry_log(entry):
+    """app 함수에 넘길 log: 경고와 오류만 문서 이름과 함께 출력"""
+    def log(level, text):
+        if level in ('warning', 'error'):
+            print(f"{text} ({entry['label']})")
+    return log
+
+
+def process_document(entry, state, journal, timer, use_cache=True, hedge=None,
+                     template_index=None, savings=None, report_dir="reports"):
+    """문서 하나를 읽기 → 분석 → 파싱 → 댓글 추가 순서로 처리 (이미 끝난 단계는 건너뜀)
+
+    로컬 파일 항목('path')은 파일을 직접 읽고, 댓글 대신 report_dir에 보고서 파일을 씁니다.
+    template_index를 넘기면 템플릿 문단을 그대로 둔 부분은 분석하지 않고 절약량을 savings에 더합니다.
+    끝난 문서는 명단 이름의 학급·학생으로 피드백 히스토리에 기록합니다.
+    AI 요청은 배치 마감으로 예산을 기다리므로 같은 프로세스의 화면 요청보다 뒤로 밀릴 수 있습니다.
+    반환값은 (제목, 이 문서의 절약량 또는 None)입니다.
+    """
+    with metrics.track_run() as run, llm_scheduler.scheduling(target_seconds=llm_scheduler.BATCH_TARGET_SECONDS):
+        title, saved, word_count, feedback_sections = _process_document(
+            entry, state, journal, timer, use_cache, hedge, template_index, savings, report_dir
+        )
+
+    class_name, student = parse_label(entry['label'], fallback=title)
+    try:
+        app.get_feedback_history().record(
+            entry['doc_id'], title, word_count or 0, feedback_sections,
+            timings=run.summary(), class_name=class_name, student=student, source="batch"
+        )
+    except Exception as e:
+        print(f"⚠️ {entry['label']}: 피드백 히스토리를 기록하지 못했습니다: {str(e)}")
+    return title, saved
+
+
+def _process_document(entry, state, journal, timer, use_cache, hedge, template_index, savings, report_dir):
+    doc_id = entry['doc_id']
+    local_path = entry.get('path')
+    log = entry_log(entry)
+    commenter = None
+    if local_path is None:
+        commenter = app.GoogleDocsCommenter()
+        if not commenter.is_available():
+            raise RuntimeError("Google API를 사용할 수 없습니다")
+
+    feedback = state.get('feedback')
+    title = state.get('title')
+    word_count = state.get('word_count')
+    saved = None
+
+    if feedback is None:
+        started = time.perf_counter()
+        if local_path:
+            doc_data = local_documents.read_document(local_path)
+        else:
+            doc_data = commenter.get_document_content(doc_id, use_snapshot=use_cache, log=log)
+        timer.add('fetch', time.perf_counter() - started)
+        if not doc_data:
+            raise RuntimeError("문서 읽기 실패")
+        title = doc_data['title']
+        word_count = doc_data['word_count']
+
+        if template_index:
+            doc_data = app.strip_template(doc_data, template_index)
+            saved = doc_data['template']
+            if savings is not None:
+                savings.add(saved)
+            if not doc_data['content']:
+                raise RuntimeError("템플릿 외에 작성한 내용 없음")
+
+        started = time.perf_counter()
+        feedback = app.analyze_document_content(doc_data['content'], use_cache=use_cache, hedge=hedge, log=log)
+        timer.add('analyze', time.perf_counter() - started)
+        if not feedback:
+            raise RuntimeError("AI 분석 실패")
+
+        journal.record(doc_id, 'analyzed', title=title, feedback=feedback,
+                       word_count=doc_data['word_count'], template=doc_data.get('template'))
+
+    started = time.perf_counter()
+    feedback_sections = app.parse_feedback_sections(feedback)
+    timer.add('parse', time.perf_counter() - started)
+
+    # 이전 실행에서 이미 추가한 섹션은 다시 올리지 않음
+    pending = [
+        (section_name, f"🤖 AI 피드백 - {section_name}\n\n{content}")
+        for section_name, content in feedback_sections.items()
+        if content and section_name not in state['posted']
+    ]
+
+    if pending and local_path:
+        started = time.perf_counter()
+        report_path = write_report(report_dir, entry, title, feedback_sections)
+        timer.add('comment', time.perf_counter() - started)
+        journal.record(doc_id, 'commented', sections=[section_name for section_name, _ in pending],
+                       report=report_path)
+    elif pending:
+        started = time.perf_counter()
+        results = commenter.add_comments(doc_id, [text for _, text in pending], log=log)
+        timer.add('comment', time.perf_counter() - started)
+
+        posted = [section_name for (section_name, _), added in zip(pending, results) if added]
+        if posted:
+            journal.record(doc_id, 'commented', sections=posted)
+        if len(posted) < len(pending):
+            raise RuntimeError(f"댓글 추가 실패: {len(pending) - len(posted)}개 섹션")
+
+    journal.record(doc_id, STATUS_DONE, title=title)
+    return title, saved, word_count, feedback_sections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="명단의 구글 문서들을 한 번에 AI 피드백 분석")
+    parser.add_argument("roster", help="문서 링크·파일 경로 명단 파일 (CSV 또는 한 줄에 하나) 또는 보고서 파일 폴더")
+    parser.add_argument("--journal", default="batch_journal.jsonl",
+                        help="진행 상황 저널 경로 (같은 경로로 다시 실행하면 이어서 처리)")
+    parser.add_argument("--workers", type=int, default=8, help="동시에 처리할 문서 수")
+    parser.add_argument("--no-cache", action="store_true", help="피드백 캐시와 문서 스냅숏을 쓰지 않고 새로 읽어 분석")
+    parser.add_argument("--retry-failed", action="store_true", help="이전에 실패한 문서도 다시 처리")
+    parser.add_argument("--hedge", action="store_true",
+                        help="응답이 평소보다 늦은 AI 요청을 한 번 더 보내 먼저 도착한 결과 사용")
+    parser.add_argument("--no-template", action="store_true",
+                        help="템플릿 문단을 그대로 둔 부분도 모두 분석")
+    parser.add_argument("--report-dir", default="reports",
+                        help="로컬 파일 분석 결과(마크다운 보고서)를 저장할 폴더")
+    args = parser.parse_args(argv)
+
+    entries = read_roster(args.roster)
+    journal = RunJournal(args.journal)
+    states = journal.load()
+    timer = StageTimer()
+    hedge = HedgePolicy() if args.hedge else None
+    savings = TemplateSavings()
+
+    # 템플릿은 구글 문서이므로 로컬 파일만 있는 명단이면 Google API로 색인하지 않음
+    template_index = None
+    if not args.no_template and not all(entry.get('path') for entry in entries):
+        try:
+            template_index = app.get_template_index(app.GoogleDocsCommenter().docs_service)
+            print(f"📎 보고서 템플릿 문단 {len(template_index)}개 색인")
+        except Exception as e:
+            print(f"⚠️ 보고서 템플릿을 읽지 못해 모든 문단을 분석합니다: {str(e)}")
+
+    todo = []
+    skipped = 0
+    for entry in entries:
+        state = states.get(entry['doc_id'], {'status': None, 'posted': set()})
+        if state['status'] == STATUS_DONE or (state['status'] == STATUS_FAILED and not args.retry_failed):
+            skipped += 1
+            continue
+        todo.append((entry, state))
+
+    print(f"📋 전체 {len(entries)}개 문서 중 {len(todo)}개 처리 (이미 처리됨: {skipped}개)")
+
+    done_count = 0
+    failed_count = 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(process_document, entry, state, journal, timer, not args.no_cache, hedge,
+                            template_index, savings, args.report_dir): entry
+            for entry, state in todo
+        }
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                title, saved = future.result()
+                done_count += 1
+                line = f"✅ [{done_count + failed_count}/{len(todo)}] {entry['label']}: {title}"
+                if saved and saved['paragraphs']:
+                    line += f" (템플릿 문단 {saved['paragraphs']}개 제외 · 약 {saved['tokens']:,} 토큰, 호출 {saved['calls']}회 절약)"
+                print(line)
+            except Exception as e:
+                failed_count += 1
+                journal.record(entry['doc_id'], STATUS_FAILED, error=str(e))
+                print(f"❌ [{done_count + failed_count}/{len(todo)}] {entry['label']}: {str(e)}")
+
+    elapsed = time.perf_counter() - started
+    throughput = done_count / (elapsed / 60) if elapsed > 0 else 0.0
+
+    print()
+    print(f"🎉 완료 {done_count}개 · 실패 {failed_count}개 · 소요 {elapsed:.1f}초 · 처리량 {throughput:.1f}개/분")
+    print("⏱️ 단계별 지연 시간 (횟수 / 평균 / p50 / p95, 초)")
+    for stage, (count, mean, p50, p95) in timer.summary().items():
+        print(f"  {stage:<8} {count:>4}회  {mean:7.2f}  {p50:7.2f}  {p95:7.2f}")
+    prompt_stats = get_prompt_cache_stats('anthropic').snapshot()
+    if prompt_stats['requests']:
+        print(f"🧠 프롬프트 캐시: 입력 토큰 {prompt_stats['input_tokens']:,}개 중 "
+              f"{prompt_stats['cached_tokens']:,}개 재사용 ({prompt_stats['hit_rate']:.0%})")
+    if savings.paragraphs:
+        print(f"📎 템플릿 제외: {savings.documents}개 문서에서 문단 {savings.paragraphs}개 · "
+              f"약 {savings.tokens:,} 토큰, AI 호출 {savings.calls}회 절약")
+    schedule_stats = llm_scheduler.get_scheduler(app.llm_client.provider_for(app.ANALYSIS_MODEL)).stats()
+    if schedule_stats['queued']:
+        print(f"🚦 요청 예산 대기: 요청 {schedule_stats['granted']}회 중 {schedule_stats['queued']}회 · "
+              f"합계 {schedule_stats['waited_seconds']:.1f}초 (ANTHROPIC_RPM/ANTHROPIC_TPM으로 한도 조정)")
+    if hedge is not None:
+        hedge_stats = hedge.stats.snapshot()
+        print(f"🏎️ 중복 전송: 요청 {hedge_stats['requests']}회 중 {hedge_stats['hedged']}회 "
+              f"(먼저 도착 {hedge_stats['hedge_wins']}회, 예산 초과로 생략 {hedge_stats['over_budget']}회) · "
+              f"약 {hedge_stats['saved_seconds']:.1f}초 단축")
+
+    return 0 if failed_count == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
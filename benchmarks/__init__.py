@@ -0,0 +1,4 @@
+"""오프라인 성능 측정 스크립트 모음
+
+저장소 최상위 폴더에서 `python -m benchmarks.<스크립트 이름>` 형태로 실행합니다.
+"""
@@ -0,0 +1,88 @@
+"""문서 내용 추출 성능 비교
+
+기존 방식(전체 응답을 받아 문단 textRun만 `content +=`로 이어 붙임)과
+새 방식(필드 마스크로 줄인 응답을 구조 단위로 한 번에 추출)을 비교합니다.
+
+사용 예:
+    python -m benchmarks.bench_extract --pages 50
+"""
+import argparse
+import json
+import time
+
+from benchmarks.fieldmask import apply_fields_mask
+from benchmarks.synthetic import make_docs_document, make_report
+from doc_extractor import DOCUMENT_FIELDS, blocks_to_text, extract_blocks
+
+
+def legacy_extract(document):
+    """변경 전 GoogleDocsCommenter.get_document_content의 추출 방식"""
+    content = ""
+    for element in document.get('body', {}).get('content', []):
+        if 'paragraph' in element:
+            paragraph = element['paragraph']
+            for text_run in paragraph.get('elements', []):
+                if 'textRun' in text_run:
+                    content += text_run['textRun'].get('content', '')
+    return content
+
+
+def structural_extract(document):
+    """새 추출 방식"""
+    return blocks_to_text(extract_blocks(document))
+
+
+def _best_time(func, document, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(document)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(pages=50, repeat=5, seed=0):
+    """추출 시간과 응답 크기 측정 결과 반환"""
+    full_document = make_docs_document(make_report(pages, seed=seed), seed=seed)
+    masked_document = apply_fields_mask(full_document, DOCUMENT_FIELDS)
+
+    full_bytes = len(json.dumps(full_document, ensure_ascii=False).encode('utf-8'))
+    masked_bytes = len(json.dumps(masked_document, ensure_ascii=False).encode('utf-8'))
+
+    # 응답 JSON 파싱 시간도 추출 비용에 포함
+    full_json = json.dumps(full_document, ensure_ascii=False)
+    masked_json = json.dumps(masked_document, ensure_ascii=False)
+
+    legacy_seconds = _best_time(lambda raw: legacy_extract(json.loads(raw)), full_json, repeat)
+    new_seconds = _best_time(lambda raw: structural_extract(json.loads(raw)), masked_json, repeat)
+
+    legacy_text = legacy_extract(full_document)
+    new_text = structural_extract(masked_document)
+
+    return {
+        'pages': pages,
+        'payload_bytes_before': full_bytes,
+        'payload_bytes_after': masked_bytes,
+        'extract_ms_before': legacy_seconds * 1000,
+        'extract_ms_after': new_seconds * 1000,
+        'chars_before': len(legacy_text),
+        'chars_after': len(new_text),
+        'blocks_after': len(extract_blocks(masked_document)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="문서 내용 추출 성능 비교")
+    parser.add_argument("--pages", type=int, default=50, help="합성 문서 쪽수")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 측정 횟수 (최솟값 사용)")
+    args = parser.parse_args(argv)
+
+    result = run(args.pages, args.repeat)
+    print(f"📄 합성 문서 {result['pages']}쪽")
+    print(f"  응답 크기   : {result['payload_bytes_before'] / 1024:9.1f} KB → {result['payload_bytes_after'] / 1024:9.1f} KB")
+    print(f"  추출 시간   : {result['extract_ms_before']:9.2f} ms → {result['extract_ms_after']:9.2f} ms")
+    print(f"  추출 글자 수: {result['chars_before']:9d}    → {result['chars_after']:9d} (표 포함, 블록 {result['blocks_after']}개)")
+
+
+if __name__ == "__main__":
+    main()
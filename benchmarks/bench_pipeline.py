@@ -0,0 +1,324 @@
+"""앱 전체 흐름 오프라인 벤치마크
+
+실제 Google/Anthropic/OpenAI 대신 benchmarks.fakes의 대역을 주입하여
+두 앱의 분석 흐름을 처음부터 끝까지 실행하고 다음 값을 측정합니다.
+
+- 소요 시간(wall time), 첫 댓글까지 걸린 시간(실시간 모드)
+- 엔드포인트별 API 호출 수와 429 응답 수
+- 주고받은 바이트 수
+- 최대 메모리 사용량 (tracemalloc 기준)
+- 입력 토큰 중 프롬프트 캐시에서 읽은 비율 (대역도 실제 API와 같은 최소 길이 기준을 적용)
+
+측정 대상 흐름:
+- research        : app.py (읽기 → 분석 → 섹션 파싱 → 댓글 일괄 추가)
+- research-stream : app.py 실시간 모드 (스트리밍 분석 → 섹션 완성 즉시 댓글 추가)
+- research-structured : app.py 구조화 출력 모드 (도구 호출로 섹션·점수 JSON 수신 → 댓글 일괄 추가)
+- genre           : app(os.ver).py (읽기 → 전체/섹션 동시 평가 → 문서에 삽입)
+- research-hedge, genre-hedge : 위 흐름에서 느린 요청 중복 전송 사용 (--pipelines로 지정할 때만 실행)
+- research-resubmit, genre-resubmit : 바뀌지 않은 문서를 다시 제출 (문서 스냅숏 재사용, --pipelines로 지정할 때만 실행)
+
+앱 모듈을 불러오므로 requirements.txt의 패키지가 설치되어 있어야 합니다.
+네트워크 요청은 발생하지 않습니다.
+
+사용 예:
+    python -m benchmarks.bench_pipeline --pages 1,10,50,100 --json bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --rate-429 0.05
+    python -m benchmarks.bench_pipeline --pipelines genre,genre-hedge --tail-rate 0.05
+    python -m benchmarks.bench_pipeline --pipelines research,research-resubmit,genre,genre-resubmit
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.fakes import (
+    EndpointConfig,
+    FakeAnthropic,
+    FakeBackend,
+    FakeDocsService,
+    FakeDriveService,
+    FakeOpenAI,
+    patched,
+)
+from benchmarks.synthetic import make_docs_document, make_report
+from doc_extractor import blocks_to_text
+from doc_snapshot import DocumentSnapshotCache
+from feedback_cache import FeedbackCache
+from hedging import HedgePolicy
+from prompt_cache import get_prompt_cache_stats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIPELINES = ("research", "research-stream", "research-structured", "genre")
+DOCUMENT_ID = "bench-doc"
+
+
+def load_research_app():
+    """app.py 모듈 불러오기 (Streamlit 런타임 없이 실행되므로 화면 출력은 무시됨)"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import app
+    return app
+
+
+def load_genre_app():
+    """app(os.ver).py 모듈 불러오기 (파일 이름 때문에 경로로 직접 불러옴)"""
+    if 'app_os_ver' in sys.modules:
+        return sys.modules['app_os_ver']
+    spec = importlib.util.spec_from_file_location('app_os_ver', os.path.join(ROOT, 'app(os.ver).py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['app_os_ver'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _commenter(app_module, backend, documents):
+    """네트워크 없이 대역 서비스를 사용하는 GoogleDocsCommenter"""
+    commenter = object.__new__(app_module.GoogleDocsCommenter)
+    commenter.credentials = object()
+    commenter.docs_service = FakeDocsService(backend, documents)
+    commenter.drive_service = FakeDriveService(backend, documents)
+    return commenter
+
+
+def bench_hedge_policy(backend, endpoint):
+    """벤치마크용 중복 전송 기준 (설정한 LLM 지연 시간의 3배가 지나면 중복 전송)"""
+    latency = backend.config(endpoint).latency
+    return HedgePolicy(initial_delay=latency * 3, min_delay=latency * 1.5, min_samples=5)
+
+
+def research_snapshots(documents):
+    """이전 제출에서 문서를 이미 읽어 둔 스냅숏 캐시 (지연 없는 별도 대역으로 읽어 측정에서 제외)"""
+    snapshots = DocumentSnapshotCache(':memory:')
+    app_module = load_research_app()
+    with patched(app_module, get_snapshot_cache=lambda: snapshots):
+        _commenter(app_module, FakeBackend(), documents).get_document_content(DOCUMENT_ID)
+    return snapshots
+
+
+def genre_snapshots(documents):
+    """research_snapshots의 글쓰기 평가 앱 버전"""
+    snapshots = DocumentSnapshotCache(':memory:')
+    load_genre_app().get_document_content(FakeDocsService(FakeBackend(), documents), DOCUMENT_ID, snapshots)
+    return snapshots
+
+
+def run_research(backend, documents, marks, hedge=None, snapshots=None):
+    app_module = load_research_app()
+    commenter = _commenter(app_module, backend, documents)
+    snapshots = snapshots or DocumentSnapshotCache(':memory:')
+    with patched(app_module,
+                 get_anthropic_client=lambda: FakeAnthropic(backend),
+                 get_feedback_cache=lambda: FeedbackCache(':memory:'),
+                 get_snapshot_cache=lambda: snapshots):
+        doc_data = commenter.get_document_content(DOCUMENT_ID)
+        feedback = app_module.analyze_document_content(doc_data['content'], use_cache=False, hedge=hedge)
+        sections = app_module.parse_feedback_sections(feedback)
+        texts = [f"🤖 AI 피드백 - {name}\n\n{content}" for name, content in sections.items() if content]
+        results = commenter.add_comments(DOCUMENT_ID, texts)
+        marks.setdefault('first_feedback', time.perf_counter())
+    return sum(results)
+
+
+def run_research_stream(backend, documents, marks):
+    app_module = load_research_app()
+    commenter = _commenter(app_module, backend, documents)
+    snapshots = DocumentSnapshotCache(':memory:')
+    posted = 0
+    with patched(app_module,
+                 get_anthropic_client=lambda: FakeAnthropic(backend),
+                 get_feedback_cache=lambda: FeedbackCache(':memory:'),
+                 get_snapshot_cache=lambda: snapshots):
+        doc_data = commenter.get_document_content(DOCUMENT_ID)
+        parser = app_module.StreamingSectionParser()
+
+        def post(closed_sections):
+            nonlocal posted
+            for name, content in closed_sections:
+                if commenter.add_comment(DOCUMENT_ID, f"🤖 AI 피드백 - {name}\n\n{content}"):
+                    posted += 1
+                    marks.setdefault('first_feedback', time.perf_counter())
+
+        for text in app_module.stream_document_analysis(doc_data['content'], use_cache=False):
+            post(parser.feed(text))
+        post(parser.close())
+    return posted
+
+
+def run_research_structured(backend, documents, marks):
+    app_module = load_research_app()
+    commenter = _commenter(app_module, backend, documents)
+    snapshots = DocumentSnapshotCache(':memory:')
+    with patched(app_module,
+                 get_anthropic_client=lambda: FakeAnthropic(backend),
+                 get_feedback_cache=lambda: FeedbackCache(':memory:'),
+                 get_snapshot_cache=lambda: snapshots):
+        doc_data = commenter.get_document_content(DOCUMENT_ID)
+        analysis = app_module.analyze_document_structured(doc_data['content'], use_cache=False)
+        texts = [f"🤖 AI 피드백 - {name}\n\n{content}" for name, content in analysis['sections'].items()]
+        results = commenter.add_comments(DOCUMENT_ID, texts)
+        marks.setdefault('first_feedback', time.perf_counter())
+    return sum(results)
+
+
+def run_genre(backend, documents, marks, hedge=None, snapshots=None):
+    genre_app = load_genre_app()
+    docs_service = FakeDocsService(backend, documents)
+    title, content_with_positions, revision_id = genre_app.get_document_content(docs_service, DOCUMENT_ID, snapshots)
+    full_text = blocks_to_text(content_with_positions)
+    feedbacks, errors = genre_app.run_concurrent_evaluation(
+        FakeOpenAI(backend), "gpt-4o-mini", "보고서", full_text, content_with_positions,
+        batch_size=genre_app.DEFAULT_SECTION_BATCH_SIZE, hedge=hedge
+    )
+    if feedbacks and genre_app.insert_feedback_to_doc(docs_service, DOCUMENT_ID, feedbacks, revision_id):
+        marks.setdefault('first_feedback', time.perf_counter())
+        return len(feedbacks)
+    return 0
+
+
+RUNNERS = {
+    "research": run_research,
+    "research-stream": run_research_stream,
+    "research-structured": run_research_structured,
+    "genre": run_genre,
+    "research-hedge": lambda backend, documents, marks: run_research(
+        backend, documents, marks, hedge=bench_hedge_policy(backend, 'anthropic.messages.stream')),
+    "genre-hedge": lambda backend, documents, marks: run_genre(
+        backend, documents, marks, hedge=bench_hedge_policy(backend, 'openai.chat.completions')),
+    "research-resubmit": lambda backend, documents, marks: run_research(
+        backend, documents, marks, snapshots=research_snapshots(documents)),
+    "genre-resubmit": lambda backend, documents, marks: run_genre(
+        backend, documents, marks, snapshots=genre_snapshots(documents)),
+}
+
+
+def prompt_cache_totals():
+    """두 제공자의 (입력 토큰, 캐시에서 읽은 토큰) 누적 합계"""
+    snapshots = [get_prompt_cache_stats(provider).snapshot() for provider in ('anthropic', 'openai')]
+    return sum(s['input_tokens'] for s in snapshots), sum(s['cached_tokens'] for s in snapshots)
+
+
+def run_case(pipeline, pages, configs, seed=0):
+    """한 가지 흐름과 문서 길이에 대한 측정 결과 반환"""
+    report = make_report(pages, seed=seed)
+    documents = {DOCUMENT_ID: make_docs_document(report, seed=seed, document_id=DOCUMENT_ID)}
+    backend = FakeBackend(configs, seed=seed)
+    marks = {}
+
+    input_before, cached_before = prompt_cache_totals()
+    tracemalloc.start()
+    started = time.perf_counter()
+    error = None
+    try:
+        outputs = RUNNERS[pipeline](backend, documents, marks)
+    except Exception as e:
+        outputs = 0
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    input_after, cached_after = prompt_cache_totals()
+
+    stats = backend.stats.snapshot()
+    return {
+        'pipeline': pipeline,
+        'pages': pages,
+        'wall_s': wall,
+        'first_feedback_s': marks['first_feedback'] - started if 'first_feedback' in marks else None,
+        'outputs': outputs,
+        'api_calls': sum(stats['calls'].values()),
+        'calls': stats['calls'],
+        'throttled': stats['throttled'],
+        'bytes_sent': stats['bytes_sent'],
+        'bytes_received': stats['bytes_received'],
+        'peak_mb': peak / (1024 * 1024),
+        'prompt_cache_hit': (cached_after - cached_before) / (input_after - input_before)
+        if input_after > input_before else 0.0,
+        'error': error,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """기준 결과보다 tolerance 비율 이상 나빠진 항목 목록"""
+    previous = {(row['pipeline'], row['pages']): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row['pipeline'], row['pages']))
+        if not before:
+            continue
+        for metric in ('wall_s', 'api_calls', 'bytes_sent', 'bytes_received', 'peak_mb'):
+            if before[metric] and row[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{row['pipeline']} {row['pages']}쪽 {metric}: {before[metric]:.3f} → {row[metric]:.3f}"
+                )
+    return regressions
+
+
+def print_table(results):
+    print(f"{'흐름':<20}{'쪽':>4}{'시간(s)':>9}{'첫 피드백':>10}{'호출':>6}{'429':>5}"
+          f"{'송신KB':>9}{'수신KB':>9}{'메모리MB':>9}{'캐시%':>7}  결과")
+    for row in results:
+        first = f"{row['first_feedback_s']:.2f}" if row['first_feedback_s'] is not None else "-"
+        outcome = row['error'] or f"{row['outputs']}개 피드백"
+        print(f"{row['pipeline']:<20}{row['pages']:>4}{row['wall_s']:>9.2f}{first:>10}"
+              f"{row['api_calls']:>6}{sum(row['throttled'].values()):>5}"
+              f"{row['bytes_sent'] / 1024:>9.1f}{row['bytes_received'] / 1024:>9.1f}"
+              f"{row['peak_mb']:>9.1f}{row['prompt_cache_hit'] * 100:>7.1f}  {outcome}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="앱 전체 흐름 오프라인 벤치마크")
+    parser.add_argument("--pages", default="1,10,50,100", help="합성 문서 쪽수 목록 (쉼표 구분, 1~100)")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="측정할 흐름 (쉼표 구분)")
+    parser.add_argument("--google-latency-ms", type=float, default=80, help="Google API 응답 지연")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="LLM 응답 지연")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="지연 시간에 더할 무작위 지연 최댓값")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 응답 비율 (0~1)")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="몇 배로 느려지는 LLM 요청 비율 (0~1)")
+    parser.add_argument("--tail-factor", type=float, default=10.0, help="느려진 요청의 지연 시간 배수")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀로 판단할 악화 비율")
+    args = parser.parse_args(argv)
+
+    google = EndpointConfig(args.google_latency_ms / 1000, args.jitter_ms / 1000, args.rate_429)
+    llm = EndpointConfig(args.llm_latency_ms / 1000, args.jitter_ms / 1000, args.rate_429,
+                         tail_rate=args.tail_rate, tail_factor=args.tail_factor)
+    configs = {
+        'docs.get': google,
+        'docs.batchUpdate': google,
+        'drive.files.get': google,
+        'drive.comments.create': google,
+        'drive.about.get': google,
+        'drive.batch': google,
+        'anthropic.messages': llm,
+        'anthropic.messages.stream': llm,
+        'openai.chat.completions': llm,
+    }
+
+    pages_list = [min(100, max(1, int(p))) for p in args.pages.split(',') if p.strip()]
+    pipelines = [p.strip() for p in args.pipelines.split(',') if p.strip()]
+
+    results = [run_case(pipeline, pages, configs) for pipeline in pipelines for pages in pages_list]
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n⚠️ 성능 회귀:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n✅ 기준 결과 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""앱 시작 시간 벤치마크
+
+두 Streamlit 앱을 새 프로세스에서 처음 실행할 때(콜드 스타트) 다음 값을 측정합니다.
+
+- import(s)  : 앱 파일 맨 위 import 문을 실행하는 데 걸린 시간 (streamlit 자체는 제외)
+- 첫 화면(s) : 스크립트 실행을 시작해서 처음 보이는 요소(제목 등)를 그리기까지 걸린 시간
+- 전체(s)    : 버튼을 누르지 않은 첫 화면 스크립트 한 번을 끝까지 실행한 시간
+- 첫 화면 전에 불러온 무거운 SDK (Google, Anthropic, OpenAI, httpx)
+
+외부 패키지 각각을 불러오는 데 걸리는 시간도 함께 보여줍니다.
+측정마다 새 프로세스를 띄우고, 여러 번 반복하여 중앙값을 사용합니다.
+
+스크립트는 streamlit.testing.v1.AppTest로 실행하므로 requirements.txt의 패키지가
+설치되어 있어야 합니다. 버튼을 누르지 않으므로 네트워크 요청은 발생하지 않습니다.
+
+사용 예:
+    python -m benchmarks.bench_startup --repeat 5 --json startup.json
+    python -m benchmarks.bench_startup --baseline startup.json
+"""
+import argparse
+import ast
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = {
+    'research': "app.py",
+    'genre': "app(os.ver).py",
+}
+
+# 첫 화면 전에 불러오지 않아야 하는 패키지
+HEAVY_MODULES = ("googleapiclient", "google.oauth2", "anthropic", "openai", "httpx")
+
+# 불러오는 시간을 따로 재는 외부 패키지
+MODULES = ("streamlit", "googleapiclient.discovery", "google.oauth2.service_account", "anthropic", "openai", "httpx")
+
+# 화면에 요소를 그리는 streamlit 함수 (처음 호출된 시점을 첫 화면으로 봄)
+RENDER_FUNCTIONS = (
+    "title", "header", "subheader", "markdown", "write", "text", "caption",
+    "info", "success", "warning", "error", "text_input", "button", "selectbox", "expander",
+)
+
+
+def _loaded(names):
+    return [name for name in names if name in sys.modules]
+
+
+def measure_imports(path):
+    """앱 파일 맨 위 import 문만 실행하는 데 걸린 시간"""
+    import streamlit  # noqa: F401  (streamlit을 불러오는 시간은 앱과 무관하므로 제외)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    code = compile(ast.Module(body=imports, type_ignores=[]), path, 'exec')
+    started = time.perf_counter()
+    exec(code, {'__name__': 'bench_startup_imports'})
+    return {'import_s': time.perf_counter() - started, 'heavy_imported': _loaded(HEAVY_MODULES)}
+
+
+def measure_render(path, timeout):
+    """AppTest로 첫 화면을 그리며 첫 요소까지의 시간과 전체 실행 시간 측정"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    already_loaded = set(_loaded(HEAVY_MODULES))
+    marks = {}
+
+    def watch(func):
+        def wrapper(*args, **kwargs):
+            # CSS만 담은 markdown은 보이는 요소가 아님
+            visible = not (args and isinstance(args[0], str) and args[0].lstrip().startswith("<style"))
+            if visible and 'first_render' not in marks:
+                marks['first_render'] = time.perf_counter()
+                marks['heavy'] = [name for name in _loaded(HEAVY_MODULES) if name not in already_loaded]
+            return func(*args, **kwargs)
+        return wrapper
+
+    for name in RENDER_FUNCTIONS:
+        setattr(st, name, watch(getattr(st, name)))
+
+    app_test = AppTest.from_file(path, default_timeout=timeout)
+    started = time.perf_counter()
+    app_test.run()
+    finished = time.perf_counter()
+
+    first_render = marks.get('first_render')
+    return {
+        'first_render_s': first_render - started if first_render is not None else None,
+        'script_s': finished - started,
+        'heavy_before_render': marks.get('heavy', []),
+        'exceptions': [str(element.value) for element in app_test.exception],
+    }
+
+
+def measure_module(name):
+    started = time.perf_counter()
+    importlib.import_module(name)
+    return {'import_s': time.perf_counter() - started}
+
+
+def _child(args):
+    """새 프로세스에서 측정 하나를 실행하고 JSON 출력"""
+    mode, target = args
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    if mode == 'imports':
+        result = measure_imports(os.path.join(ROOT, APPS[target]))
+    elif mode == 'render':
+        result = measure_render(os.path.join(ROOT, APPS[target]), timeout=60)
+    else:
+        result = measure_module(target)
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def _run_child(mode, target):
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, target],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "측정 실패")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def run_app(name, repeat):
+    """앱 하나의 import·첫 화면 시간 (반복 측정의 중앙값)"""
+    imports = [_run_child('imports', name) for _ in range(repeat)]
+    renders = [_run_child('render', name) for _ in range(repeat)]
+    return {
+        'app': name,
+        'import_s': _median([r['import_s'] for r in imports]),
+        'first_render_s': _median([r['first_render_s'] for r in renders]),
+        'script_s': _median([r['script_s'] for r in renders]),
+        'heavy_imported': imports[-1]['heavy_imported'],
+        'heavy_before_render': renders[-1]['heavy_before_render'],
+        'exceptions': renders[-1]['exceptions'],
+    }
+
+
+def run_module(name, repeat):
+    """외부 패키지 하나를 불러오는 시간 (설치되어 있지 않으면 None)"""
+    try:
+        seconds = _median([_run_child('module', name)['import_s'] for _ in range(repeat)])
+    except RuntimeError:
+        seconds = None
+    return {'module': name, 'import_s': seconds}
+
+
+def compare(results, baseline, tolerance):
+    """기준 결과보다 tolerance 비율 이상 나빠진 항목 목록"""
+    previous = {row['app']: row for row in baseline['apps']}
+    regressions = []
+    for row in results['apps']:
+        before = previous.get(row['app'])
+        if not before:
+            continue
+        for metric in ('import_s', 'first_render_s'):
+            if before[metric] and row[metric] and row[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{row['app']} {metric}: {before[metric]:.3f} → {row[metric]:.3f}")
+    return regressions
+
+
+def _seconds(value):
+    return f"{value:.3f}" if value is not None else "-"
+
+
+def print_table(results):
+    print(f"{'앱':<10}{'import(s)':>11}{'첫 화면(s)':>12}{'전체(s)':>10}  첫 화면 전 SDK")
+    for row in results['apps']:
+        heavy = ', '.join(row['heavy_before_render']) or "없음"
+        print(f"{row['app']:<10}{_seconds(row['import_s']):>11}{_seconds(row['first_render_s']):>12}"
+              f"{_seconds(row['script_s']):>10}  {heavy}")
+        for error in row['exceptions']:
+            print(f"  ⚠️ 실행 중 예외: {error}")
+    print()
+    print(f"{'패키지':<32}{'import(s)':>11}")
+    for row in results['modules']:
+        print(f"{row['module']:<32}{_seconds(row['import_s']):>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="앱 시작 시간 벤치마크")
+    parser.add_argument("--apps", default=",".join(APPS), help="측정할 앱 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (중앙값 사용)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀로 판단할 악화 비율")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child)
+        return 0
+
+    repeat = max(1, args.repeat)
+    apps = [name.strip() for name in args.apps.split(',') if name.strip()]
+    results = {
+        'apps': [run_app(name, repeat) for name in apps],
+        'modules': [run_module(name, repeat) for name in MODULES],
+    }
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n⚠️ 성능 회귀:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n✅ 기준 결과 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,520 @@
+"""Google API와 LLM API의 오프라인 대역(fake)
+
+실제 서비스 대신 앱 코드에 주입하여 네트워크 없이 전체 흐름을 실행합니다.
+엔드포인트마다 지연 시간, 가끔 몇 배로 느려지는 요청(꼬리 지연)의 비율과
+429(요청 한도 초과) 발생 비율을 설정할 수 있고,
+호출 횟수와 주고받은 바이트 수를 기록합니다.
+
+대역이 흉내내는 호출:
+- Docs: documents().get, documents().batchUpdate
+- Drive: files().get, comments().create, about().get, new_batch_http_request
+- Anthropic: messages.create, messages.stream
+- OpenAI: chat.completions.create (stream=True 포함)
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from benchmarks.fieldmask import apply_fields_mask
+from chunking import estimate_tokens
+from prompt_cache import MIN_CACHEABLE_TOKENS
+
+
+class EndpointConfig:
+    """엔드포인트별 지연 시간(초), 꼬리 지연(tail_rate 비율의 요청이 tail_factor배 느림), 429 응답 비율"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, retry_after=1, tail_rate=0.0, tail_factor=1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+
+
+class FakeStats:
+    """엔드포인트별 호출 수, 429 수, 송수신 바이트 집계"""
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, request_payload, response_payload, throttled=False):
+        sent = _payload_size(request_payload)
+        received = _payload_size(response_payload)
+        with self._lock:
+            self.calls[endpoint] += 1
+            if throttled:
+                self.throttled[endpoint] += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'throttled': dict(self.throttled),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+            }
+
+
+def _payload_size(payload):
+    if payload is None:
+        return 0
+    if isinstance(payload, (bytes, str)):
+        return len(payload.encode('utf-8') if isinstance(payload, str) else payload)
+    return len(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class FakeBackend:
+    """모든 대역이 공유하는 설정, 난수, 통계"""
+
+    def __init__(self, configs=None, seed=0):
+        self.configs = configs or {}
+        self.stats = FakeStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def config(self, endpoint):
+        return self.configs.get(endpoint) or self.configs.get('default') or EndpointConfig()
+
+    def _random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def call(self, endpoint, request_payload, respond, error_factory):
+        """지연 시간을 흉내낸 뒤 429 또는 정상 응답을 반환"""
+        config = self.config(endpoint)
+        delay = config.latency + config.jitter * self._random()
+        if config.tail_rate and self._random() < config.tail_rate:
+            delay *= config.tail_factor
+        if delay > 0:
+            time.sleep(delay)
+
+        if config.rate_429 and self._random() < config.rate_429:
+            self.stats.record(endpoint, request_payload, None, throttled=True)
+            raise error_factory(config.retry_after)
+
+        response = respond()
+        self.stats.record(endpoint, request_payload, response)
+        return response
+
+
+# ---------------------------------------------------------------- 오류 객체
+
+class FakeRateLimitError(Exception):
+    """SDK가 설치되어 있지 않을 때 사용하는 429 오류"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"429 Too Many Requests (retry after {retry_after}s)")
+        self.status_code = 429
+        self.retry_after = retry_after
+        self.response = _FakeHTTPResponse(429, {'retry-after': str(retry_after)})
+
+
+class _FakeHTTPResponse:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.status = status_code
+        self.headers = headers
+        self.reason = "Too Many Requests"
+
+    def get(self, key, default=None):
+        return self.headers.get(key, default)
+
+
+def google_rate_limit_error(retry_after):
+    """googleapiclient의 HttpError(429) 생성"""
+    try:
+        import httplib2
+        from googleapiclient.errors import HttpError
+    except ImportError:
+        return FakeRateLimitError(retry_after)
+    resp = httplib2.Response({'status': 429, 'retry-after': str(retry_after)})
+    resp.reason = "Too Many Requests"
+    content = json.dumps({'error': {'code': 429, 'message': 'Rate Limit Exceeded'}}).encode('utf-8')
+    return HttpError(resp, content)
+
+
+def google_revision_conflict_error(revision_id):
+    """writeControl.requiredRevisionId가 최신 수정본과 다를 때의 HttpError(400) 생성"""
+    message = f"The required revision ID '{revision_id}' does not match the latest revision."
+    try:
+        import httplib2
+        from googleapiclient.errors import HttpError
+    except ImportError:
+        error = Exception(message)
+        error.status_code = 400
+        return error
+    resp = httplib2.Response({'status': 400})
+    resp.reason = "Bad Request"
+    content = json.dumps({'error': {'code': 400, 'message': message}}).encode('utf-8')
+    return HttpError(resp, content)
+
+
+def anthropic_rate_limit_error(retry_after):
+    """anthropic SDK의 RateLimitError 생성"""
+    try:
+        import anthropic
+        import httpx
+    except ImportError:
+        return FakeRateLimitError(retry_after)
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(429, headers={'retry-after': str(retry_after)}, request=request)
+    return anthropic.RateLimitError("rate_limit_error", response=response, body=None)
+
+
+def openai_rate_limit_error(retry_after):
+    """openai SDK의 RateLimitError 생성"""
+    try:
+        import httpx
+        import openai
+    except ImportError:
+        return FakeRateLimitError(retry_after)
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={'retry-after': str(retry_after)}, request=request)
+    return openai.RateLimitError("rate_limit_exceeded", response=response, body=None)
+
+
+# ---------------------------------------------------------------- Google 대역
+
+class _FakeRequest:
+    """googleapiclient.http.HttpRequest처럼 execute()로 실행되는 요청"""
+
+    def __init__(self, backend, endpoint, payload, respond):
+        self.backend = backend
+        self.endpoint = endpoint
+        self.payload = payload
+        self.respond = respond
+
+    def execute(self, http=None, num_retries=0):
+        return self.backend.call(self.endpoint, self.payload, self.respond, google_rate_limit_error)
+
+
+class _FakeBatchHttpRequest:
+    """BatchHttpRequest 대역: 한 번의 HTTP 왕복으로 여러 요청을 처리"""
+
+    def __init__(self, backend, callback=None):
+        self.backend = backend
+        self.callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        request_id = request_id or str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback or self.callback))
+
+    def execute(self, http=None):
+        payload = [request.payload for _, request, _ in self._requests]
+        self.backend.call('drive.batch', payload, lambda: None, google_rate_limit_error)
+        for request_id, request, callback in self._requests:
+            config = self.backend.config(request.endpoint)
+            try:
+                if config.rate_429 and self.backend._random() < config.rate_429:
+                    self.backend.stats.record(request.endpoint, request.payload, None, throttled=True)
+                    raise google_rate_limit_error(config.retry_after)
+                response = request.respond()
+                self.backend.stats.record(request.endpoint, request.payload, response)
+                exception = None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class _Collection:
+    def __init__(self, methods):
+        self._methods = methods
+
+    def __getattr__(self, name):
+        try:
+            return self._methods[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class FakeDocsService:
+    """Docs API 대역 (documents 저장소를 가지고 batchUpdate 요청 수를 기록)"""
+
+    def __init__(self, backend, documents):
+        self.backend = backend
+        self.documents_store = documents
+        self.batch_updates = []
+        self._lock = threading.Lock()
+
+    def documents(self):
+        return _Collection({'get': self._get, 'batchUpdate': self._batch_update})
+
+    def _get(self, documentId, fields=None, **kwargs):
+        def respond():
+            document = self.documents_store[documentId]
+            return apply_fields_mask(document, fields) if fields else document
+        return _FakeRequest(self.backend, 'docs.get', {'documentId': documentId, 'fields': fields}, respond)
+
+    def _batch_update(self, documentId, body):
+        def respond():
+            with self._lock:
+                document = self.documents_store[documentId]
+                required = (body.get('writeControl') or {}).get('requiredRevisionId')
+                if required and required != document.get('revisionId', 'rev-0'):
+                    raise google_revision_conflict_error(required)
+                self.batch_updates.append(body)
+                revision = int(str(document.get('revisionId', 'rev-0')).split('-')[-1]) + 1
+                document['revisionId'] = f"rev-{revision}"
+            return {
+                'documentId': documentId,
+                'replies': [{} for _ in body.get('requests', [])],
+                'writeControl': {'requiredRevisionId': document['revisionId']},
+            }
+        return _FakeRequest(self.backend, 'docs.batchUpdate', {'documentId': documentId, 'body': body}, respond)
+
+
+class FakeDriveService:
+    """Drive API 대역"""
+
+    def __init__(self, backend, documents):
+        self.backend = backend
+        self.documents_store = documents
+        self.comments_store = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def files(self):
+        return _Collection({'get': self._files_get})
+
+    def comments(self):
+        return _Collection({'create': self._comments_create})
+
+    def about(self):
+        return _Collection({'get': self._about_get})
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatchHttpRequest(self.backend, callback)
+
+    def _files_get(self, fileId, fields=None, **kwargs):
+        def respond():
+            document = self.documents_store[fileId]
+            metadata = {
+                'id': fileId,
+                'name': document.get('title'),
+                'modifiedTime': document.get('modifiedTime', '2026-01-01T00:00:00.000Z'),
+                'version': str(document.get('revisionId', 'rev-1')).split('-')[-1],
+                'permissions': [{'role': 'writer', 'type': 'user'}],
+            }
+            return apply_fields_mask(metadata, fields) if fields else metadata
+        return _FakeRequest(self.backend, 'drive.files.get', {'fileId': fileId, 'fields': fields}, respond)
+
+    def _comments_create(self, fileId, body, fields=None, **kwargs):
+        def respond():
+            with self._lock:
+                self.comments_store[fileId].append(body)
+                comment_id = f"comment-{len(self.comments_store[fileId])}"
+            return {'id': comment_id, 'content': body.get('content')}
+        return _FakeRequest(self.backend, 'drive.comments.create', {'fileId': fileId, 'body': body}, respond)
+
+    def _about_get(self, fields=None, **kwargs):
+        return _FakeRequest(
+            self.backend, 'drive.about.get', {'fields': fields},
+            lambda: {'user': {'emailAddress': 'bench@example.com'}}
+        )
+
+
+# ---------------------------------------------------------------- LLM 대역
+
+FEEDBACK_SECTION_TITLES = [
+    "구조와 논리성", "내용의 충실성", "학술적 글쓰기", "창의성과 독창성", "형식과 표현", "추가 제안사항",
+]
+
+_FEEDBACK_SENTENCE = "서론에서 제시한 연구 문제가 본론의 분석과 잘 연결되어 있으며, 근거 자료를 조금 더 보완하면 좋겠습니다. "
+
+
+def fake_feedback_text(sentences_per_section=4):
+    """앱이 기대하는 섹션 형식의 피드백 텍스트"""
+    lines = ["전반적으로 주제 의식이 분명한 보고서입니다.", ""]
+    for number, title in enumerate(FEEDBACK_SECTION_TITLES, start=1):
+        lines.append(f"{number}. {title}:")
+        lines.append(_FEEDBACK_SENTENCE * sentences_per_section)
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def fake_tool_input(tool, sentences_per_section=4):
+    """도구 입력 스키마를 채운 구조화 피드백 (점수는 만점의 80%)"""
+    schema = tool['input_schema']['properties']
+    result = {}
+    for field, spec in schema.items():
+        if spec.get('type') == 'string':
+            result[field] = _FEEDBACK_SENTENCE * sentences_per_section
+        elif spec.get('type') == 'object':
+            result[field] = {
+                name: int(item.get('maximum', 10) * 0.8) for name, item in spec['properties'].items()
+            }
+    return result
+
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _anthropic_text(kwargs):
+    # 전체 평가와 부분 검토는 같은 system 블록을 쓰고 사용자 메시지의 작업 종류로 구분됨
+    if '작업: 부분 검토' in str(kwargs['messages'][-1]['content']):
+        return "구조와 논리성: 이 부분의 흐름은 자연스럽습니다.\n내용의 충실성: 근거 자료가 부족합니다."
+    return fake_feedback_text()
+
+
+class _PrefixCache:
+    """같은 앞부분(prefix)이 다시 오면 캐시된 것으로 보고하는 제공자 측 캐시 흉내"""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, prefix):
+        """(캐시에서 읽은 토큰, 새로 저장한 토큰) 반환"""
+        tokens = estimate_tokens(prefix)
+        if tokens < MIN_CACHEABLE_TOKENS:
+            return 0, 0
+        with self._lock:
+            if prefix in self._seen:
+                return tokens, 0
+            self._seen.add(prefix)
+            return 0, tokens
+
+
+def _input_tokens(kwargs):
+    return estimate_tokens(json.dumps(kwargs.get('messages', []), ensure_ascii=False, default=str)) + \
+        estimate_tokens(str(kwargs.get('system', '')))
+
+
+class _FakeAnthropicStream:
+    def __init__(self, message, config):
+        self._message = message
+        self._text = message.content[0].text
+        self._config = config
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        # 첫 토큰까지는 설정된 지연 시간, 이후는 바로바로 도착
+        piece = 40
+        for i in range(0, len(self._text), piece):
+            yield self._text[i:i + piece]
+
+    def get_final_message(self):
+        return self._message
+
+    def close(self):
+        pass
+
+
+class FakeAnthropic:
+    """anthropic.Anthropic 대역"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.messages = _Obj(create=self._create, stream=self._stream)
+        self._prefix_cache = _PrefixCache()
+
+    def _message(self, kwargs):
+        tools = kwargs.get('tools')
+        if tools:
+            # 도구 호출 강제: 텍스트 대신 도구 입력 하나를 반환
+            tool_input = fake_tool_input(tools[0])
+            text = json.dumps(tool_input, ensure_ascii=False)
+            content = [_Obj(type='tool_use', id='toolu_fake', name=tools[0]['name'], input=tool_input)]
+        else:
+            text = _anthropic_text(kwargs)
+            content = [_Obj(type='text', text=text)]
+        system = kwargs.get('system')
+        cache_read = cache_write = 0
+        if isinstance(system, list) and any('cache_control' in block for block in system):
+            cache_read, cache_write = self._prefix_cache.lookup(''.join(block.get('text', '') for block in system))
+        return _Obj(
+            content=content,
+            usage=_Obj(input_tokens=_input_tokens(kwargs) - cache_read - cache_write,
+                       output_tokens=estimate_tokens(text),
+                       cache_creation_input_tokens=cache_write, cache_read_input_tokens=cache_read),
+            stop_reason='end_turn',
+            model=kwargs.get('model'),
+        )
+
+    def _create(self, **kwargs):
+        return self.backend.call('anthropic.messages', kwargs, lambda: self._message(kwargs),
+                                 anthropic_rate_limit_error)
+
+    def _stream(self, **kwargs):
+        message = self.backend.call('anthropic.messages.stream', kwargs, lambda: self._message(kwargs),
+                                    anthropic_rate_limit_error)
+        return _FakeAnthropicStream(message, self.backend.config('anthropic.messages.stream'))
+
+
+_SECTION_FEEDBACK = "이 부분은 글의 도입부에 해당하며 주장이 분명합니다. 근거를 하나 더 제시하면 설득력이 높아집니다."
+_PARAGRAPH_ID_PATTERN = re.compile(r'^\s*\[(P\d+)\]\s*$', re.MULTILINE)
+
+
+class FakeOpenAI:
+    """openai.OpenAI 대역"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.chat = _Obj(completions=_Obj(create=self._create))
+        self._prefix_cache = _PrefixCache()
+
+    def _create(self, **kwargs):
+        def respond():
+            # OpenAI는 앞부분이 같으면 자동으로 캐시 (여기서는 system 메시지 단위로 흉내)
+            cached, _ = self._prefix_cache.lookup(kwargs['messages'][0]['content'])
+            text = _SECTION_FEEDBACK
+            if (kwargs.get('response_format') or {}).get('type') == 'json_object':
+                # 묶음 평가: 프롬프트의 [P번호] 문단마다 피드백 하나
+                ids = _PARAGRAPH_ID_PATTERN.findall(kwargs['messages'][-1]['content'])
+                text = json.dumps({'feedbacks': [{'id': pid, 'feedback': _SECTION_FEEDBACK} for pid in ids]},
+                                  ensure_ascii=False)
+            elif kwargs.get('max_tokens', 0) >= 3000:
+                text = fake_feedback_text(sentences_per_section=2)
+            usage = _Obj(prompt_tokens=_input_tokens(kwargs), completion_tokens=estimate_tokens(text),
+                         prompt_tokens_details=_Obj(cached_tokens=cached))
+            if kwargs.get('stream'):
+                return _fake_openai_chunks(text, usage)
+            return _Obj(
+                choices=[_Obj(message=_Obj(content=text), finish_reason='stop')],
+                usage=usage,
+                model=kwargs.get('model'),
+            )
+        return self.backend.call('openai.chat.completions', kwargs, respond, openai_rate_limit_error)
+
+
+def _fake_openai_chunks(text, usage, piece=40):
+    """stream=True 응답: 텍스트 조각들과 마지막 사용량 조각 (stream_options.include_usage 형식)"""
+    chunks = [
+        _Obj(choices=[_Obj(delta=_Obj(content=text[i:i + piece]), finish_reason=None)], usage=None)
+        for i in range(0, len(text), piece)
+    ]
+    chunks.append(_Obj(choices=[], usage=usage))
+    return chunks
+
+
+@contextmanager
+def patched(obj, **attrs):
+    """객체 속성을 잠시 바꾸었다가 되돌리기"""
+    originals = {name: getattr(obj, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    try:
+        yield obj
+    finally:
+        for name, value in originals.items():
+            setattr(obj, name, value)
@@ -0,0 +1,67 @@
+"""Google API 필드 마스크(fields 매개변수) 적용
+
+실제 API 서버가 돌려주는 부분 응답을 오프라인에서 재현하기 위해 사용합니다.
+"a,b(c,d/e)" 형식의 마스크를 해석합니다.
+"""
+
+
+def parse_fields_mask(mask):
+    """필드 마스크를 {필드: 하위 마스크 또는 None(전체)} 트리로 변환"""
+    tree, pos = _parse(mask.replace(' ', ''), 0)
+    if pos != len(mask.replace(' ', '')):
+        raise ValueError(f"잘못된 필드 마스크: {mask}")
+    return tree
+
+
+def _parse(mask, pos):
+    tree = {}
+    name = ''
+    while pos < len(mask):
+        char = mask[pos]
+        if char == ',':
+            _add_path(tree, name, None)
+            name = ''
+            pos += 1
+        elif char == '(':
+            subtree, pos = _parse(mask, pos + 1)
+            _add_path(tree, name, subtree)
+            name = ''
+            pos += 1  # ')'
+            if pos < len(mask) and mask[pos] == ',':
+                pos += 1
+        elif char == ')':
+            break
+        else:
+            name += char
+            pos += 1
+    _add_path(tree, name, None)
+    return tree, pos
+
+
+def _add_path(tree, name, subtree):
+    if not name:
+        return
+    # "textRun/content"는 "textRun(content)"와 같습니다
+    parts = name.split('/')
+    for part in parts[:-1]:
+        node = tree.get(part)
+        if node is None:
+            node = tree[part] = {}
+        tree = node
+    tree[parts[-1]] = subtree
+
+
+def apply_fields_mask(obj, mask):
+    """응답 객체에서 마스크에 포함된 필드만 남긴 사본 반환"""
+    tree = parse_fields_mask(mask) if isinstance(mask, str) else mask
+    return _apply(obj, tree)
+
+
+def _apply(obj, tree):
+    if tree is None:
+        return obj
+    if isinstance(obj, list):
+        return [_apply(item, tree) for item in obj]
+    if isinstance(obj, dict):
+        return {key: _apply(obj[key], subtree) for key, subtree in tree.items() if key in obj}
+    return obj
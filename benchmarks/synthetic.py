@@ -0,0 +1,219 @@
+"""합성 한국어 보고서 생성기
+
+실제 학생 문서 없이 성능을 측정할 수 있도록 1~100쪽 분량의 한국어 보고서와
+그에 해당하는 Google Docs API(documents().get) 응답 JSON을 만듭니다.
+같은 seed를 주면 항상 같은 문서가 만들어집니다.
+"""
+import random
+
+# 한 쪽당 대략적인 글자 수 (A4, 11pt 기준)
+CHARS_PER_PAGE = 1200
+
+SECTION_HEADINGS = [
+    "1. 서론",
+    "2. 이론적 배경",
+    "3. 연구 방법",
+    "4. 연구 결과",
+    "5. 논의",
+    "6. 결론",
+]
+
+_SUBJECTS = [
+    "청소년의 미디어 이용 습관은", "본 연구의 설문 결과는", "선행 연구에 따르면 이 현상은",
+    "지역 사회의 인구 구조 변화는", "실험 집단의 평균 점수는", "해양 생태계의 변화 양상은",
+    "학생들의 독서 시간은", "면담 참여자들의 응답은", "K-Pop 가사에 나타난 가치관은",
+    "완도 지역의 양식 산업은", "인공지능 도구의 활용은", "통계 자료의 추세는",
+]
+_PREDICATES = [
+    "지난 5년간 꾸준히 증가하는 경향을 보였다.", "통계적으로 유의미한 차이를 나타내지 않았다.",
+    "사회적 맥락에 따라 다르게 해석될 수 있다.", "연구 문제와 밀접한 관련이 있는 것으로 나타났다.",
+    "추가적인 자료 수집을 통해 검증할 필요가 있다.", "기존 이론의 설명과 부분적으로 일치한다.",
+    "응답자의 연령과 성별에 따라 차이를 보였다.", "장기적인 관점에서 더 깊이 탐구할 가치가 있다.",
+    "표 1에 제시된 결과와 같은 방향을 가리킨다.", "연구의 한계를 고려하여 신중하게 해석해야 한다.",
+]
+_CONNECTIVES = ["또한", "그러나", "따라서", "한편", "특히", "이와 같이", "반면에", "예를 들어"]
+
+
+def _sentence(rng):
+    connective = rng.choice(_CONNECTIVES) + " " if rng.random() < 0.4 else ""
+    return connective + rng.choice(_SUBJECTS) + " " + rng.choice(_PREDICATES)
+
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def _table(rng, table_number):
+    header = ["구분", "2021년", "2022년", "2023년"]
+    rows = [header]
+    for label in ["응답자 수", "평균 점수", "표준편차", "증가율(%)"]:
+        rows.append([label] + [str(rng.randint(10, 500)) for _ in range(3)])
+    return {'caption': f"표 {table_number}. 연도별 조사 결과", 'rows': rows}
+
+
+def make_report(pages, seed=0):
+    """pages쪽 분량의 합성 보고서 생성
+
+    반환값: {'title', 'blocks': [('heading'|'paragraph', 텍스트) 또는 ('table', 표)]}
+    """
+    rng = random.Random(seed)
+    target_chars = max(1, pages) * CHARS_PER_PAGE
+    blocks = [('heading', "탐구 보고서: 청소년 미디어 이용과 학습 태도의 관계")]
+    total = 0
+    table_number = 0
+    section_idx = 0
+    sections = len(SECTION_HEADINGS)
+
+    while total < target_chars:
+        # 문서 길이에 맞춰 섹션 제목을 고르게 배치
+        if section_idx < sections and total >= target_chars * section_idx / sections:
+            blocks.append(('heading', SECTION_HEADINGS[section_idx]))
+            section_idx += 1
+
+        text = _paragraph(rng)
+        blocks.append(('paragraph', text))
+        total += len(text)
+
+        # 대략 3쪽마다 표 하나
+        if rng.random() < 0.06:
+            table_number += 1
+            table = _table(rng, table_number)
+            blocks.append(('paragraph', table['caption']))
+            blocks.append(('table', table['rows']))
+
+    for heading in SECTION_HEADINGS[section_idx:]:
+        blocks.append(('heading', heading))
+        blocks.append(('paragraph', _paragraph(rng)))
+
+    return {'title': f"합성 보고서 ({pages}쪽)", 'blocks': blocks}
+
+
+def report_text(report):
+    """보고서 전체 텍스트 (표는 '셀 | 셀' 줄로 표현)"""
+    lines = []
+    for kind, value in report['blocks']:
+        if kind == 'table':
+            lines.extend(' | '.join(row) for row in value)
+        else:
+            lines.append(value)
+    return '\n'.join(lines)
+
+
+def report_paragraphs(report):
+    """보고서 문단 목록 (app(os.ver).py의 content_with_positions 형태, 위치는 글자 기준)"""
+    paragraphs = []
+    position = 1
+    for kind, value in report['blocks']:
+        text = ('\n'.join(' | '.join(row) for row in value) if kind == 'table' else value) + '\n'
+        paragraphs.append({'text': text, 'start': position, 'end': position + len(text)})
+        position += len(text)
+    return paragraphs
+
+
+def _utf16_len(text):
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _text_style(rng):
+    """실제 응답처럼 글꼴, 크기, 색상 등의 스타일 정보를 붙임"""
+    return {
+        'weightedFontFamily': {'fontFamily': rng.choice(["Nanum Gothic", "Malgun Gothic", "Arial"]), 'weight': 400},
+        'fontSize': {'magnitude': rng.choice([10, 11, 12]), 'unit': 'PT'},
+        'foregroundColor': {'color': {'rgbColor': {'red': 0.1, 'green': 0.1, 'blue': 0.1}}},
+    }
+
+
+def _paragraph_element(rng, text, start, style_type):
+    """textRun 여러 개로 나뉜 문단 구조 요소 생성"""
+    text = text + '\n'
+    runs = []
+    position = start
+    remaining = text
+    while remaining:
+        # 서식이 바뀌는 지점마다 textRun이 나뉘는 것을 흉내냄
+        size = min(len(remaining), rng.randint(20, 120))
+        piece, remaining = remaining[:size], remaining[size:]
+        length = _utf16_len(piece)
+        runs.append({
+            'startIndex': position,
+            'endIndex': position + length,
+            'textRun': {'content': piece, 'textStyle': _text_style(rng)},
+        })
+        position += length
+
+    return {
+        'startIndex': start,
+        'endIndex': position,
+        'paragraph': {
+            'elements': runs,
+            'paragraphStyle': {
+                'namedStyleType': style_type,
+                'direction': 'LEFT_TO_RIGHT',
+                'lineSpacing': 160,
+                'spaceAbove': {'magnitude': 6, 'unit': 'PT'},
+                'spaceBelow': {'magnitude': 6, 'unit': 'PT'},
+            },
+        },
+    }, position
+
+
+def _table_element(rng, rows, start):
+    """표 구조 요소 생성 (Docs 인덱스 규칙: 표/행/셀 시작마다 1칸)"""
+    position = start + 1
+    table_rows = []
+    for row in rows:
+        row_start = position
+        position += 1
+        cells = []
+        for cell_text in row:
+            cell_start = position
+            position += 1
+            paragraph, position = _paragraph_element(rng, cell_text, position, 'NORMAL_TEXT')
+            cells.append({
+                'startIndex': cell_start,
+                'endIndex': position,
+                'content': [paragraph],
+                'tableCellStyle': {'rowSpan': 1, 'columnSpan': 1, 'contentAlignment': 'TOP'},
+            })
+        table_rows.append({'startIndex': row_start, 'endIndex': position, 'tableCells': cells})
+    position += 1
+    return {
+        'startIndex': start,
+        'endIndex': position,
+        'table': {'rows': len(rows), 'columns': len(rows[0]), 'tableRows': table_rows},
+    }, position
+
+
+def make_docs_document(report, seed=0, document_id="synthetic-doc", revision_id="rev-1"):
+    """합성 보고서를 documents().get 전체 응답 형태의 JSON으로 변환"""
+    rng = random.Random(seed)
+    content = [{'endIndex': 1, 'sectionBreak': {'sectionStyle': {'columnSeparatorStyle': 'NONE'}}}]
+    position = 1
+    for kind, value in report['blocks']:
+        if kind == 'table':
+            element, position = _table_element(rng, value, position)
+        else:
+            style_type = 'HEADING_1' if kind == 'heading' else 'NORMAL_TEXT'
+            element, position = _paragraph_element(rng, value, position, style_type)
+        content.append(element)
+
+    return {
+        'documentId': document_id,
+        'title': report['title'],
+        'revisionId': revision_id,
+        'body': {'content': content},
+        'documentStyle': {
+            'pageSize': {'height': {'magnitude': 841.9, 'unit': 'PT'}, 'width': {'magnitude': 595.3, 'unit': 'PT'}},
+            'marginTop': {'magnitude': 72, 'unit': 'PT'},
+            'marginBottom': {'magnitude': 72, 'unit': 'PT'},
+        },
+        'namedStyles': {
+            'styles': [
+                {'namedStyleType': name, 'textStyle': _text_style(rng), 'paragraphStyle': {'direction': 'LEFT_TO_RIGHT'}}
+                for name in ['NORMAL_TEXT', 'TITLE', 'HEADING_1', 'HEADING_2', 'HEADING_3']
+            ]
+        },
+        'lists': {},
+        'inlineObjects': {},
+        'suggestionsViewMode': 'SUGGESTIONS_INLINE',
+    }
@@ -0,0 +1,74 @@
+"""토큰 예산에 맞춘 문서 분할
+
+긴 문서를 잘라내지 않고 전체를 분석할 수 있도록, 문단 경계를 지키면서
+정해진 토큰 수를 넘지 않는 조각(chunk)으로 나눕니다.
+토크나이저 없이 쓸 수 있도록 토큰 수는 보수적으로 추정합니다.
+"""
+import math
+import re
+
+# 한글/한자/가나는 글자 하나를 토큰 하나로, 그 밖의 문자는 4글자를 토큰 하나로 계산
+_CJK_PATTERN = re.compile(r'[ᄀ-ᇿ぀-ヿ㄰-㆏㐀-鿿가-힯]')
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?。])\s+')
+
+
+def estimate_tokens(text):
+    """텍스트의 대략적인 토큰 수 (실제보다 약간 크게 추정)"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    other = len(text) - cjk - text.count(' ')
+    return cjk + math.ceil(max(other, 0) / 4)
+
+
+def _split_long_paragraph(paragraph, max_tokens):
+    """예산보다 긴 문단을 문장 단위로, 그래도 길면 글자 단위로 나누기"""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for sentence in _SENTENCE_END_PATTERN.split(paragraph):
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if tokens > max_tokens:
+            # 문장 하나가 예산을 넘으면 글자 수로 자름
+            if current:
+                pieces.append(' '.join(current))
+                current, current_tokens = [], 0
+            step = max(1, len(sentence) * max_tokens // tokens)
+            pieces.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(' '.join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def chunk_paragraphs(paragraphs, max_tokens):
+    """문단 목록을 토큰 예산 이하의 조각(문단 목록)들로 묶기"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for paragraph in paragraphs:
+        tokens = estimate_tokens(paragraph)
+        pieces = [paragraph] if tokens <= max_tokens else _split_long_paragraph(paragraph, max_tokens)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(text, max_tokens):
+    """텍스트를 줄(문단) 경계에서 나누어 토큰 예산 이하의 조각 목록 반환"""
+    paragraphs = [line for line in text.split('\n') if line.strip()]
+    return ['\n'.join(chunk) for chunk in chunk_paragraphs(paragraphs, max_tokens)] or ['']
@@ -0,0 +1,131 @@
+import time
+from datetime import datetime
+
+import streamlit as st
+
+import ui_assets
+from feedback_history import FeedbackHistory, score_percent
+from local_documents import LOCAL_DOC_PREFIX, is_local_doc_id
+
+# 페이지 설정
+st.set_page_config(
+    page_title="교사용 피드백 대시보드",
+    page_icon="📊",
+    layout="wide"
+)
+
+st.markdown(ui_assets.RESEARCH_CSS, unsafe_allow_html=True)
+
+# 학생별 최근 실행 목록에 보여 줄 개수
+RECENT_RUNS = 20
+
+@st.cache_resource
+def get_feedback_history():
+    """프로세스 전체에서 공유하는 피드백 히스토리 저장소 (읽기 전용으로 사용)"""
+    return FeedbackHistory()
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+def format_percent(row):
+    percent = score_percent(row)
+    return f"{percent:.0%}" if percent is not None else "-"
+
+def average(total, count):
+    return total / count if count else 0
+
+def class_table(classes):
+    """학급별 합계 표"""
+    return [
+        {
+            '학급': row['class_name'],
+            '학생 수': row['students'],
+            '분석 횟수': row['runs'],
+            '평균 단어 수': round(average(row['words'], row['runs'])),
+            '평균 점수': format_percent(row),
+            '평균 분석 시간(초)': round(average(row['seconds'], row['runs']), 1),
+            '토큰 (입력/출력)': f"{row['input_tokens']:,} / {row['output_tokens']:,}",
+            '마지막 분석': format_time(row['last_run_at']),
+        }
+        for row in classes
+    ]
+
+def student_table(students):
+    """학급 학생별 합계 표"""
+    return [
+        {
+            '학생': row['student'],
+            '분석 횟수': row['runs'],
+            '최근 문서': row['last_title'] or '-',
+            '최근 단어 수': row['last_word_count'],
+            '평균 점수': format_percent(row),
+            '토큰 (입력/출력)': f"{row['input_tokens']:,} / {row['output_tokens']:,}",
+            '처음 분석': format_time(row['first_run_at']),
+            '마지막 분석': format_time(row['last_run_at']),
+        }
+        for row in students
+    ]
+
+def document_link(doc_id):
+    """구글 문서는 링크, 로컬 파일은 파일 경로"""
+    if is_local_doc_id(doc_id):
+        return f"📁 {doc_id[len(LOCAL_DOC_PREFIX):]}"
+    return f"[문서 열기](https://docs.google.com/document/d/{doc_id}/edit)"
+
+def render_student(history, class_name, student):
+    """학생 한 명의 최근 분석 기록 (피드백 본문은 펼칠 때만 읽음)"""
+    runs = history.student_runs(class_name, student, limit=RECENT_RUNS)
+    st.markdown(f"### 🧑‍🎓 {student}의 최근 분석 {len(runs)}건")
+    for run in runs:
+        label = f"{format_time(run['created_at'])} · {run['title'] or run['doc_id']} · {run['word_count']:,}단어"
+        if run['max_score']:
+            label += f" · {run['score']}/{run['max_score']}점"
+        with st.expander(label):
+            st.caption(
+                f"분석 {run['total_seconds']:.1f}초 · 토큰 입력 {run['input_tokens']:,} / 출력 {run['output_tokens']:,} · "
+                f"{document_link(run['doc_id'])}"
+            )
+            scores = history.run_scores(run['id'])
+            if scores:
+                st.markdown("  \n".join(f"- {name}: {score}/{max_score}점" for name, (score, max_score) in scores.items()))
+            for section, content in history.run_sections(run['id']).items():
+                st.markdown(f"**{section}**\n\n{content}")
+
+def main():
+    st.markdown('<h1 class="main-header">📊 교사용 피드백 대시보드</h1>', unsafe_allow_html=True)
+    
+    history = get_feedback_history()
+    started = time.perf_counter()
+    
+    classes = history.classes()
+    if not classes:
+        st.info("아직 기록된 분석이 없습니다. 피드백 앱이나 배치 실행기로 보고서를 분석하면 여기에 표시됩니다.")
+        return
+    
+    # 학급별 통계
+    st.markdown("### 🏫 학급별 통계")
+    st.dataframe(class_table(classes), use_container_width=True, hide_index=True)
+    
+    class_name = st.selectbox("학급 선택", [row['class_name'] for row in classes])
+    
+    # 기준별 평균 점수
+    criteria = history.criteria(class_name)
+    if criteria:
+        st.markdown("### 📐 기준별 평균 점수")
+        columns = st.columns(len(criteria))
+        for column, row in zip(columns, criteria):
+            column.metric(row['criterion'], format_percent(row), help=f"점수가 있는 분석 {row['count']}건 기준")
+    
+    # 학생별 통계
+    students = history.students(class_name)
+    st.markdown(f"### 👥 {class_name} 학생별 기록 ({len(students)}명)")
+    st.dataframe(student_table(students), use_container_width=True, hide_index=True)
+    
+    student = st.selectbox("학생 선택", [row['student'] for row in students])
+    if student:
+        render_student(history, class_name, student)
+    
+    st.caption(f"⏱️ 조회 {(time.perf_counter() - started) * 1000:.0f}ms · 전체 기록 {history.stats()['runs']:,}건")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Google Docs 문서 구조에서 텍스트 추출
+
+documents().get 응답의 본문을 한 번만 훑으면서 문단, 표, 목차(및 표 안에
+중첩된 구조)를 블록 단위로 꺼냅니다. 텍스트는 리스트에 모았다가 join으로
+합치므로 문서 길이에 비례하는 시간만 걸립니다.
+
+응답 크기를 줄이기 위해 DOCUMENT_FIELDS 필드 마스크로 필요한 필드만 요청합니다.
+"""
+
+# 문단에서 필요한 필드 (위치와 텍스트만)
+_PARAGRAPH_FIELDS = "startIndex,endIndex,paragraph(elements(textRun(content)))"
+
+# 표 셀 안의 구조 (중첩된 표는 전체 필드를 받음)
+_CELL_CONTENT_FIELDS = f"content({_PARAGRAPH_FIELDS},table,tableOfContents)"
+
+# 본문 구조 요소
+_BODY_CONTENT_FIELDS = (
+    f"{_PARAGRAPH_FIELDS},"
+    f"table(tableRows(tableCells({_CELL_CONTENT_FIELDS}))),"
+    f"tableOfContents(content({_PARAGRAPH_FIELDS}))"
+)
+
+DOCUMENT_FIELDS = f"title,revisionId,body(content({_BODY_CONTENT_FIELDS}))"
+
+KIND_PARAGRAPH = "paragraph"
+KIND_TABLE = "table"
+KIND_TOC = "toc"
+
+
+def _paragraph_text(paragraph):
+    """문단의 textRun 내용을 이어 붙인 텍스트"""
+    return ''.join(
+        element['textRun'].get('content', '')
+        for element in paragraph.get('elements', [])
+        if 'textRun' in element
+    )
+
+
+def _content_text(content):
+    """구조 요소 목록 전체의 텍스트 (표 셀처럼 한 덩어리로 다룰 때 사용)"""
+    return ''.join(block['text'] for block in iter_blocks(content))
+
+
+def _table_text(table):
+    """표를 '셀 | 셀 | 셀' 형태의 줄로 변환"""
+    lines = []
+    for row in table.get('tableRows', []):
+        cells = [
+            ' '.join(_content_text(cell.get('content', [])).split())
+            for cell in row.get('tableCells', [])
+        ]
+        if any(cells):
+            lines.append(' | '.join(cells))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def iter_blocks(content, kind=KIND_PARAGRAPH):
+    """구조 요소 목록에서 텍스트 블록({'text', 'start', 'end', 'kind'})을 차례로 생성
+
+    표와 목차는 각각 하나의 블록이 되며, start/end는 해당 구조 요소 전체의 위치입니다.
+    공백만 있는 블록은 건너뜁니다.
+    """
+    for element in content:
+        if 'paragraph' in element:
+            text = _paragraph_text(element['paragraph'])
+            block_kind = kind
+        elif 'table' in element:
+            text = _table_text(element['table'])
+            block_kind = KIND_TABLE
+        elif 'tableOfContents' in element:
+            text = _content_text(element['tableOfContents'].get('content', []))
+            block_kind = KIND_TOC
+        else:
+            # sectionBreak 등 텍스트가 없는 요소
+            continue
+
+        if text.strip():
+            yield {
+                'text': text,
+                'start': element.get('startIndex', 0),
+                'end': element.get('endIndex', 0),
+                'kind': block_kind,
+            }
+
+
+def extract_blocks(document):
+    """documents().get 응답에서 본문 블록 목록 추출"""
+    return list(iter_blocks(document.get('body', {}).get('content', [])))
+
+
+def blocks_to_text(blocks):
+    """블록 목록을 하나의 텍스트로 합치기"""
+    return ''.join(block['text'] for block in blocks)
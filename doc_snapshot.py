@@ -0,0 +1,134 @@
+"""문서 스냅숏 캐시 (바뀌지 않은 문서는 다시 읽지 않기)
+
+학생들이 같은 문서를 몇 분 간격으로 다시 제출하면 내용이 그대로인데도 매번
+문서 전체를 다시 읽게 됩니다. 마지막으로 읽은 documents().get 응답(필드 마스크를
+적용한 것)을 문서 ID별로 저장해 두고, 가벼운 메타데이터 요청으로 바뀌었는지만
+확인하여 버전이 같으면 저장된 문서를 그대로 씁니다.
+
+- 탐구 보고서 앱: Drive files().get의 version(수정될 때마다 증가)과 modifiedTime
+- 글쓰기 평가 앱: Docs documents().get(fields='revisionId')
+  (drive.file 권한으로는 학생 문서의 Drive 메타데이터를 읽을 수 없음)
+
+버전 키에는 DOCUMENT_FIELDS의 해시도 들어가므로, 필드 마스크를 바꾸면 예전 마스크로
+저장된 문서(새로 요청하는 필드가 빠진 것)는 쓰지 않고 다시 읽습니다.
+
+SQLite 파일에 저장되어 앱을 다시 시작해도 유지됩니다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from doc_extractor import DOCUMENT_FIELDS
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "doc_snapshots.sqlite3"
+)
+DEFAULT_MAX_ENTRIES = 500
+
+# 바뀌었는지 확인할 때 요청하는 필드
+DRIVE_VERSION_FIELDS = "version,modifiedTime"
+DOCS_VERSION_FIELDS = "revisionId"
+
+# 저장된 문서를 요청할 때 쓴 필드 마스크 (마스크가 바뀌면 버전 키도 바뀜)
+FIELDS_HASH = hashlib.sha1(DOCUMENT_FIELDS.encode('utf-8')).hexdigest()[:12]
+
+
+def drive_version(metadata):
+    """Drive 파일 메타데이터의 버전 키 (알 수 없으면 None)"""
+    version = metadata.get('version')
+    modified = metadata.get('modifiedTime')
+    if version is None and modified is None:
+        return None
+    return f"drive:{version}:{modified}:{FIELDS_HASH}"
+
+
+def docs_version(document):
+    """Docs 문서(또는 revisionId만 요청한 응답)의 버전 키 (알 수 없으면 None)"""
+    revision_id = document.get('revisionId')
+    return f"docs:{revision_id}:{FIELDS_HASH}" if revision_id else None
+
+
+class DocumentSnapshotCache:
+    """문서 ID별 마지막 문서 구조 (오래 쓰지 않은 문서부터 정리)"""
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS doc_snapshots (
+                doc_id TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                document TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, doc_id, version):
+        """저장된 문서가 version과 같으면 반환 (없거나 바뀌었으면 None)"""
+        if version is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document FROM doc_snapshots WHERE doc_id = ? AND version = ?", (doc_id, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE doc_snapshots SET last_access = ? WHERE doc_id = ?", (time.time(), doc_id)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def has(self, doc_id):
+        """저장된 문서가 있는지 (없으면 버전 확인 요청 없이 바로 전체를 읽으면 됨)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM doc_snapshots WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return row is not None
+
+    def set(self, doc_id, version, document):
+        """문서 저장 (버전을 알 수 없으면 저장하지 않음)"""
+        if version is None:
+            return
+        now = time.time()
+        value = json.dumps(document, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO doc_snapshots (doc_id, version, document, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (doc_id, version, value, now, now)
+            )
+            self._conn.execute("""
+                DELETE FROM doc_snapshots WHERE doc_id IN (
+                    SELECT doc_id FROM doc_snapshots
+                    ORDER BY last_access DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def forget(self, doc_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM doc_snapshots WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
+
+    def stats(self):
+        """적중/실패 횟수와 저장된 문서 수 반환"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM doc_snapshots").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
@@ -0,0 +1,125 @@
+"""AI 피드백 결과 캐시
+
+내용이 바뀌지 않은 문서를 다시 분석할 때 LLM 호출을 건너뛰기 위한 영구 캐시입니다.
+키는 정규화된 문서 내용, 시스템 프롬프트, 모델 이름, 샘플링 설정의 해시이며
+SQLite 파일에 저장되어 앱을 다시 시작해도 유지됩니다.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "feedback_cache.sqlite3"
+)
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # 7일
+
+
+def normalize_text(text):
+    """공백 차이만 있는 문서가 같은 키를 갖도록 내용 정규화"""
+    lines = [re.sub(r'\s+', ' ', line).strip() for line in text.splitlines()]
+    return '\n'.join(line for line in lines if line)
+
+
+def make_cache_key(content, system_prompt, model, **params):
+    """문서 내용과 요청 설정으로 캐시 키 생성"""
+    payload = json.dumps({
+        'content': normalize_text(content),
+        'system': normalize_text(system_prompt),
+        'model': model,
+        'params': params,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FeedbackCache:
+    """LRU/TTL 방식으로 오래된 항목을 정리하는 SQLite 기반 피드백 캐시"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS feedback_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_feedback_cache_last_access ON feedback_cache(last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """캐시된 피드백 반환 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM feedback_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM feedback_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE feedback_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """피드백 저장 후 용량을 넘으면 가장 오래 사용하지 않은 항목부터 삭제"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feedback_cache (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM feedback_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+                )
+            self._conn.execute("""
+                DELETE FROM feedback_cache WHERE key IN (
+                    SELECT key FROM feedback_cache
+                    ORDER BY last_access DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def clear(self):
+        """모든 캐시 항목 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM feedback_cache")
+            self._conn.commit()
+
+    def stats(self):
+        """적중/실패 횟수와 저장된 항목 수 반환"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM feedback_cache").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
@@ -0,0 +1,324 @@
+"""학생별 피드백 히스토리 저장소 (교사용 대시보드의 데이터)
+
+분석이 끝날 때마다 문서 ID, 제목, 단어 수, 섹션별 피드백, 기준별 점수,
+단계별 소요 시간과 토큰 사용량을 SQLite 파일에 한 건씩 기록합니다.
+
+- WAL 모드로 열어, 앱이 기록하는 동안에도 대시보드(다른 프로세스)가 막히지 않고 읽습니다
+- 피드백 본문은 run_sections에 따로 두고, 목록 조회는 본문을 읽지 않습니다
+- 학급별·학생별·기준별 합계(rollup)는 기록할 때 같은 트랜잭션에서 갱신하므로
+  대시보드는 실행 기록 수천 건을 훑지 않고 합계 표 몇 줄만 읽습니다
+
+학급과 학생은 "3학년 2반 김OO" 같은 표시 이름을 parse_label로 나누어 정하며,
+학급을 알 수 없으면 UNASSIGNED_CLASS로 묶습니다.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_HISTORY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "feedback_history.sqlite3"
+)
+
+UNASSIGNED_CLASS = "미지정"
+
+_CLASS_PATTERN = re.compile(r'(\d+)\s*학년\s*(\d+)\s*반')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL,
+    title TEXT,
+    class_name TEXT NOT NULL,
+    student TEXT NOT NULL,
+    source TEXT NOT NULL,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    total_seconds REAL NOT NULL DEFAULT 0,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    score INTEGER,
+    max_score INTEGER,
+    timings TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_student ON runs (class_name, student, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_doc ON runs (doc_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+
+CREATE TABLE IF NOT EXISTS run_sections (
+    run_id INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (run_id, section)
+);
+
+CREATE TABLE IF NOT EXISTS run_scores (
+    run_id INTEGER NOT NULL,
+    criterion TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    PRIMARY KEY (run_id, criterion)
+);
+
+CREATE TABLE IF NOT EXISTS class_rollup (
+    class_name TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    students INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    scored_runs INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    last_run_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS student_rollup (
+    class_name TEXT NOT NULL,
+    student TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    scored_runs INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    first_run_at REAL NOT NULL,
+    last_run_at REAL NOT NULL,
+    last_run_id INTEGER NOT NULL,
+    last_word_count INTEGER NOT NULL,
+    last_title TEXT,
+    PRIMARY KEY (class_name, student)
+);
+
+CREATE TABLE IF NOT EXISTS criterion_rollup (
+    class_name TEXT NOT NULL,
+    criterion TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    PRIMARY KEY (class_name, criterion)
+);
+"""
+
+
+def parse_label(label, fallback=None):
+    """표시 이름을 (학급, 학생)으로 나누기
+
+    "3학년 2반 김OO" → ("3학년 2반", "김OO"). 학급이 없으면 (UNASSIGNED_CLASS, 이름),
+    이름도 비어 있으면 fallback(문서 제목 등)을 학생으로 씁니다.
+    """
+    label = (label or '').strip()
+    match = _CLASS_PATTERN.search(label)
+    if match:
+        class_name = f"{match.group(1)}학년 {match.group(2)}반"
+        student = (label[:match.start()] + label[match.end():]).strip(" ,-_/")
+    else:
+        class_name = UNASSIGNED_CLASS
+        student = label
+    return class_name, student or fallback or "이름 없음"
+
+
+def token_totals(timings):
+    """metrics 실행 요약의 (입력 토큰, 출력 토큰) 합계"""
+    input_tokens = output_tokens = 0
+    for _, _, stage_input, stage_output in (timings or {}).get('stages', {}).values():
+        input_tokens += stage_input
+        output_tokens += stage_output
+    return input_tokens, output_tokens
+
+
+def score_percent(row):
+    """합계 행의 평균 점수 비율 (점수가 없으면 None)"""
+    return row['score'] / row['max_score'] if row['max_score'] else None
+
+
+class FeedbackHistory:
+    """분석 실행 기록과 학급·학생별 합계"""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def record(self, doc_id, title, word_count, sections, scores=None, timings=None,
+               class_name=None, student=None, source="research"):
+        """분석 한 건 기록 (scores: {기준: (점수, 만점)}, timings: metrics 실행 요약)
+
+        기록한 실행의 ID를 반환합니다.
+        """
+        class_name = class_name or UNASSIGNED_CLASS
+        student = student or title or doc_id
+        input_tokens, output_tokens = token_totals(timings)
+        total_seconds = (timings or {}).get('total_seconds', 0.0)
+        score = sum(value for value, _ in scores.values()) if scores else None
+        max_score = sum(maximum for _, maximum in scores.values()) if scores else None
+        timings_json = json.dumps(timings, ensure_ascii=False) if timings else None
+        scored = 1 if scores else 0
+        now = time.time()
+
+        with self._lock, self._conn:
+            run_id = self._conn.execute(
+                "INSERT INTO runs (doc_id, title, class_name, student, source, word_count, total_seconds, "
+                "input_tokens, output_tokens, score, max_score, timings, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, title, class_name, student, source, word_count, total_seconds,
+                 input_tokens, output_tokens, score, max_score, timings_json, now)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO run_sections (run_id, section, content) VALUES (?, ?, ?)",
+                [(run_id, section, content) for section, content in sections.items() if content]
+            )
+            if scores:
+                self._conn.executemany(
+                    "INSERT INTO run_scores (run_id, criterion, score, max_score) VALUES (?, ?, ?, ?)",
+                    [(run_id, criterion, value, maximum) for criterion, (value, maximum) in scores.items()]
+                )
+
+            new_student = self._conn.execute(
+                "SELECT 1 FROM student_rollup WHERE class_name = ? AND student = ?", (class_name, student)
+            ).fetchone() is None
+            self._conn.execute("""
+                INSERT INTO student_rollup (class_name, student, runs, words, seconds, input_tokens,
+                    output_tokens, scored_runs, score, max_score, first_run_at, last_run_at,
+                    last_run_id, last_word_count, last_title)
+                VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (class_name, student) DO UPDATE SET
+                    runs = runs + 1,
+                    words = words + excluded.words,
+                    seconds = seconds + excluded.seconds,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    scored_runs = scored_runs + excluded.scored_runs,
+                    score = score + excluded.score,
+                    max_score = max_score + excluded.max_score,
+                    last_run_at = excluded.last_run_at,
+                    last_run_id = excluded.last_run_id,
+                    last_word_count = excluded.last_word_count,
+                    last_title = excluded.last_title
+            """, (class_name, student, word_count, total_seconds, input_tokens, output_tokens,
+                  scored, score or 0, max_score or 0, now, now, run_id, word_count, title))
+            self._conn.execute("""
+                INSERT INTO class_rollup (class_name, runs, students, words, seconds, input_tokens,
+                    output_tokens, scored_runs, score, max_score, last_run_at)
+                VALUES (?, 1, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (class_name) DO UPDATE SET
+                    runs = runs + 1,
+                    students = students + ?,
+                    words = words + excluded.words,
+                    seconds = seconds + excluded.seconds,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    scored_runs = scored_runs + excluded.scored_runs,
+                    score = score + excluded.score,
+                    max_score = max_score + excluded.max_score,
+                    last_run_at = excluded.last_run_at
+            """, (class_name, word_count, total_seconds, input_tokens, output_tokens,
+                  scored, score or 0, max_score or 0, now, 1 if new_student else 0))
+            if scores:
+                self._conn.executemany("""
+                    INSERT INTO criterion_rollup (class_name, criterion, count, score, max_score)
+                    VALUES (?, ?, 1, ?, ?)
+                    ON CONFLICT (class_name, criterion) DO UPDATE SET
+                        count = count + 1,
+                        score = score + excluded.score,
+                        max_score = max_score + excluded.max_score
+                """, [(class_name, criterion, value, maximum) for criterion, (value, maximum) in scores.items()])
+        return run_id
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def classes(self):
+        """학급별 합계 (실행 수, 학생 수, 단어·시간·토큰·점수 합계)"""
+        return self._query("SELECT * FROM class_rollup ORDER BY class_name")
+
+    def criteria(self, class_name):
+        """학급의 기준별 점수 합계"""
+        return self._query(
+            "SELECT * FROM criterion_rollup WHERE class_name = ? ORDER BY criterion", (class_name,)
+        )
+
+    def students(self, class_name):
+        """학급 학생별 합계 (마지막 실행 정보 포함)"""
+        return self._query(
+            "SELECT * FROM student_rollup WHERE class_name = ? ORDER BY student", (class_name,)
+        )
+
+    def student_runs(self, class_name, student, limit=20):
+        """학생의 최근 실행 목록 (피드백 본문 제외, 최근 것부터)"""
+        return self._query(
+            "SELECT id, doc_id, title, source, word_count, total_seconds, input_tokens, output_tokens, "
+            "score, max_score, created_at FROM runs "
+            "WHERE class_name = ? AND student = ? ORDER BY created_at DESC LIMIT ?",
+            (class_name, student, limit)
+        )
+
+    def run_sections(self, run_id):
+        """실행 하나의 섹션별 피드백 {섹션: 내용} (기록한 순서)"""
+        rows = self._query(
+            "SELECT section, content FROM run_sections WHERE run_id = ? ORDER BY rowid", (run_id,)
+        )
+        return {row['section']: row['content'] for row in rows}
+
+    def run_scores(self, run_id):
+        """실행 하나의 기준별 점수 {기준: (점수, 만점)}"""
+        rows = self._query(
+            "SELECT criterion, score, max_score FROM run_scores WHERE run_id = ? ORDER BY rowid", (run_id,)
+        )
+        return {row['criterion']: (row['score'], row['max_score']) for row in rows}
+
+    def rebuild_rollups(self):
+        """실행 기록에서 합계 표를 다시 계산 (합계가 어긋났을 때 복구용)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM student_rollup")
+            self._conn.execute("DELETE FROM class_rollup")
+            self._conn.execute("DELETE FROM criterion_rollup")
+            self._conn.execute("""
+                INSERT INTO student_rollup
+                SELECT r.class_name, r.student, COUNT(*), SUM(r.word_count), SUM(r.total_seconds),
+                    SUM(r.input_tokens), SUM(r.output_tokens), COUNT(r.score),
+                    COALESCE(SUM(r.score), 0), COALESCE(SUM(r.max_score), 0),
+                    MIN(r.created_at), MAX(r.created_at), last.id, last.word_count, last.title
+                FROM runs r
+                JOIN runs last ON last.id = (
+                    SELECT id FROM runs
+                    WHERE class_name = r.class_name AND student = r.student
+                    ORDER BY created_at DESC, id DESC LIMIT 1
+                )
+                GROUP BY r.class_name, r.student
+            """)
+            self._conn.execute("""
+                INSERT INTO class_rollup
+                SELECT class_name, SUM(runs), COUNT(*), SUM(words), SUM(seconds), SUM(input_tokens),
+                    SUM(output_tokens), SUM(scored_runs), SUM(score), SUM(max_score), MAX(last_run_at)
+                FROM student_rollup GROUP BY class_name
+            """)
+            self._conn.execute("""
+                INSERT INTO criterion_rollup
+                SELECT r.class_name, s.criterion, COUNT(*), SUM(s.score), SUM(s.max_score)
+                FROM run_scores s JOIN runs r ON r.id = s.run_id
+                GROUP BY r.class_name, s.criterion
+            """)
+
+    def stats(self):
+        """저장된 실행 수와 학급 수"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(runs), 0), COUNT(*) FROM class_rollup"
+            ).fetchone()
+        return {'runs': row[0], 'classes': row[1]}
@@ -0,0 +1,117 @@
+"""프로세스 전체에서 공유하는 Google API 클라이언트 풀
+
+Streamlit은 위젯을 조작할 때마다 스크립트를 다시 실행하므로, 실행할 때마다
+build('docs', 'v1') / build('drive', 'v3')를 호출하면 디스커버리 문서 파싱과
+인증 준비를 매번 반복하게 됩니다. 이 모듈은 서비스 계정별로 인증 정보와
+서비스 객체를 한 번만 만들고 모든 세션이 함께 사용하도록 합니다.
+
+- 디스커버리 문서는 google-api-python-client에 포함된 정적 문서를 사용합니다
+  (네트워크 요청 없음).
+- 토큰은 첫 API 요청 시점에 발급되며 만료되면 그때 갱신합니다.
+- httplib2.Http는 스레드 안전하지 않으므로 HTTP 연결은 스레드마다 따로 둡니다.
+- Google 라이브러리는 불러오는 데 시간이 오래 걸리므로 처음 풀을 만들 때 불러옵니다
+  (앱 첫 화면 표시를 늦추지 않도록).
+"""
+import threading
+
+HTTP_TIMEOUT_SECONDS = 60
+
+
+class ThreadLocalAuthorizedHttp:
+    """스레드마다 별도의 연결을 쓰는 인증 HTTP 객체
+
+    googleapiclient가 요구하는 httplib2 호환 인터페이스(request, close,
+    credentials)만 제공하며, 실제 요청은 현재 스레드의 AuthorizedHttp로 보냅니다.
+    """
+
+    def __init__(self, credentials, timeout=HTTP_TIMEOUT_SECONDS):
+        self.credentials = credentials
+        self.timeout = timeout
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+
+    def _ensure_valid_credentials(self):
+        """토큰이 없거나 만료되었을 때 한 스레드만 갱신하도록 보장"""
+        if self.credentials.valid:
+            return
+        import google_auth_httplib2
+        import httplib2
+        with self._refresh_lock:
+            if not self.credentials.valid:
+                self.credentials.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=self.timeout)))
+
+    def _thread_http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials,
+                http=httplib2.Http(timeout=self.timeout)
+            )
+            self._local.http = http
+        return http
+
+    def request(self, *args, **kwargs):
+        self._ensure_valid_credentials()
+        return self._thread_http().request(*args, **kwargs)
+
+    def close(self):
+        http = getattr(self._local, 'http', None)
+        if http is not None:
+            http.close()
+            self._local.http = None
+
+
+class GoogleServicePool:
+    """하나의 서비스 계정에 대한 인증 정보와 API 서비스 객체 묶음"""
+
+    def __init__(self, service_account_info, scopes):
+        from google.oauth2.service_account import Credentials
+        self.credentials = Credentials.from_service_account_info(
+            dict(service_account_info),
+            scopes=list(scopes)
+        )
+        self.http = ThreadLocalAuthorizedHttp(self.credentials)
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def service(self, name, version):
+        """API 서비스 객체 반환 (프로세스당 한 번만 생성)"""
+        from googleapiclient.discovery import build, build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+        key = (name, version)
+        with self._lock:
+            if key not in self._services:
+                discovery_doc = get_static_doc(name, version)
+                if discovery_doc is not None:
+                    self._services[key] = build_from_document(discovery_doc, http=self.http)
+                else:
+                    # 라이브러리에 포함되지 않은 API만 네트워크로 디스커버리 문서를 받습니다
+                    self._services[key] = build(name, version, http=self.http, cache_discovery=False)
+            return self._services[key]
+
+    @property
+    def docs(self):
+        return self.service('docs', 'v1')
+
+    @property
+    def drive(self):
+        return self.service('drive', 'v3')
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_service_pool(service_account_info, scopes):
+    """서비스 계정과 권한 범위별로 공유 풀 반환"""
+    key = (
+        service_account_info.get('client_email'),
+        service_account_info.get('private_key_id'),
+        tuple(sorted(scopes)),
+    )
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = GoogleServicePool(service_account_info, scopes)
+        return _pools[key]
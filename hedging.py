@@ -0,0 +1,289 @@
+"""느린 AI 요청을 한 번 더 보내 꼬리 지연 줄이기 (hedged request)
+
+수업 시간처럼 요청이 몰리면 일부 요청만 중앙값의 몇 배씩 걸리고, 전체 분석은
+가장 느린 요청을 기다리게 됩니다. 요청이 최근 첫 토큰 지연 시간의 상위
+백분위수(기본 95%)가 지나도록 첫 토큰을 받지 못하면 같은 요청(또는 보조 모델
+요청)을 하나 더 보내고, 먼저 끝난 결과를 쓰고 나머지는 취소합니다.
+
+- 중복 전송은 전체 요청 수의 일정 비율(예산) 안에서만 합니다
+- 시도 함수는 요청 예산을 받아 보내기 직전에 attempt.begin()을, 연결을 연 뒤
+  attempt.attach(close)를, 받은 조각마다 attempt.received()를 호출합니다.
+  지연 시간은 begin()부터 재므로 예산을 기다린 시간은 첫 토큰 지연에 들어가지 않습니다
+- 진 시도는 attempt.cancel()이 등록된 스트림을 바로 닫으므로, 첫 토큰을 기다리며 멈춰 있던
+  시도도 연결·작업 스레드·요청 예산을 곧바로 돌려줍니다 (제공자 쪽 생성도 멈춤)
+- 중복 전송·승리 횟수와 줄어든 시간(추정)은 HedgePolicy.stats와 지표로 남습니다
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+DEFAULT_PERCENTILE = 0.95
+DEFAULT_MIN_DELAY = 1.0       # 지연 기록이 빠르더라도 이보다 일찍 중복 전송하지 않음 (초)
+DEFAULT_INITIAL_DELAY = 5.0   # 지연 기록이 충분히 쌓이기 전에 쓰는 기준 (초)
+DEFAULT_MIN_SAMPLES = 10
+DEFAULT_WINDOW = 200
+DEFAULT_BUDGET_RATIO = 0.1    # 요청 10개당 중복 전송 1번
+DEFAULT_BUDGET_BURST = 3
+
+HEDGE_WORKERS = 64
+
+_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+
+
+class AttemptCancelled(Exception):
+    """요청 예산을 받기 전에 취소된 시도"""
+
+
+class LatencyTracker:
+    """최근 첫 토큰 지연 시간 기록 (스레드 안전)"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples=DEFAULT_MIN_SAMPLES):
+        """q(0~1) 백분위수 (기록이 min_samples개보다 적으면 None)"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeBudget:
+    """요청마다 ratio만큼 쌓이고 중복 전송 한 번에 1씩 쓰는 예산 (최대 burst)"""
+
+    def __init__(self, ratio=DEFAULT_BUDGET_RATIO, burst=DEFAULT_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def add_request(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class HedgeStats:
+    """중복 전송 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+        self.saved_seconds = 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'over_budget': self.over_budget,
+                'saved_seconds': self.saved_seconds,
+                'hedge_rate': self.hedged / self.requests if self.requests else 0.0,
+            }
+
+
+class HedgePolicy:
+    """중복 전송 기준과 예산 (프로세스 전체에서 하나를 공유해야 지연 기록이 쌓임)
+
+    secondary_model을 지정하면 중복 요청을 그 모델(다른 제공자도 가능)로 보냅니다.
+    """
+
+    def __init__(self, percentile=DEFAULT_PERCENTILE, min_delay=DEFAULT_MIN_DELAY,
+                 initial_delay=DEFAULT_INITIAL_DELAY, min_samples=DEFAULT_MIN_SAMPLES,
+                 budget_ratio=DEFAULT_BUDGET_RATIO, budget_burst=DEFAULT_BUDGET_BURST,
+                 secondary_model=None, secondary_client=None):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.secondary_model = secondary_model
+        self.secondary_client = secondary_client
+        self.budget = HedgeBudget(budget_ratio, budget_burst)
+        self.stats = HedgeStats()
+        self._trackers = {}
+        self._lock = threading.Lock()
+
+    def tracker(self, key):
+        with self._lock:
+            if key not in self._trackers:
+                self._trackers[key] = LatencyTracker()
+            return self._trackers[key]
+
+    def delay(self, key):
+        """key(모델, 요청 종류 등) 요청을 중복 전송하기까지 기다릴 시간"""
+        observed = self.tracker(key).percentile(self.percentile, self.min_samples)
+        if observed is None:
+            return self.initial_delay
+        return max(self.min_delay, observed)
+
+
+class Attempt:
+    """시도 하나의 진행 상황 (시도 함수가 작업 스레드에서 갱신)"""
+
+    def __init__(self, label, cond):
+        self.label = label
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        self.begun = False
+        self.first_token_seconds = None
+        self.received_chars = 0
+        self.finished_seconds = None
+        self.result = None
+        self.error = None
+        self._close = None
+        self._cond = cond
+
+    def begin(self):
+        """요청 예산을 받아 실제로 보내기 시작함 (지연 시간은 여기서부터, 이미 취소되었으면 AttemptCancelled)"""
+        with self._cond:
+            if self.cancelled.is_set():
+                raise AttemptCancelled()
+            self.started = time.perf_counter()
+            self.begun = True
+            self._cond.notify_all()
+
+    def attach(self, close):
+        """취소할 때 다른 스레드에서 닫을 스트림 등록 (이미 취소되었으면 바로 닫음)"""
+        with self._cond:
+            self._close = close
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            close()
+
+    def cancel(self):
+        """시도 취소: 받고 있던 스트림을 닫아 다음 조각을 기다리던 시도도 바로 멈추게 함"""
+        with self._cond:
+            self.cancelled.set()
+            close = None if self.done else self._close
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                # 닫는 중 오류는 시도 함수 쪽에서 오류로 끝나므로 무시
+                pass
+
+    def received(self, text):
+        """조각 하나를 받음 (첫 조각이면 첫 토큰 시간 기록)"""
+        with self._cond:
+            if self.first_token_seconds is None:
+                self.first_token_seconds = time.perf_counter() - self.started
+                self._cond.notify_all()
+            self.received_chars += len(text)
+
+    @property
+    def done(self):
+        return self.finished_seconds is not None
+
+    def _finish(self, result=None, error=None):
+        with self._cond:
+            self.result = result
+            self.error = error
+            self.finished_seconds = time.perf_counter() - self.started
+            self._cond.notify_all()
+
+
+def _start(label, func, cond):
+    attempt = Attempt(label, cond)
+
+    def run():
+        try:
+            attempt._finish(result=func(attempt))
+        except Exception as e:
+            attempt._finish(error=e)
+    _executor.submit(metrics.in_current_run(run))
+    return attempt
+
+
+def _estimate_saved(primary, hedge, result_chars):
+    """보조 요청이 이겼을 때 원래 요청을 기다렸다면 더 걸렸을 시간 (추정)
+
+    원래 요청이 글을 받고 있었으면 그 속도로 남은 분량을 받는 시간,
+    첫 토큰도 받지 못했으면 적어도 보조 요청이 첫 토큰 뒤 글을 받는 데 걸린 시간만큼입니다.
+    """
+    if primary.first_token_seconds is not None and primary.received_chars:
+        elapsed = time.perf_counter() - primary.started - primary.first_token_seconds
+        rate = primary.received_chars / elapsed if elapsed > 0 else 0
+        remaining = max(0, result_chars - primary.received_chars)
+        return remaining / rate if rate else 0.0
+    return max(0.0, hedge.finished_seconds - (hedge.first_token_seconds or 0.0))
+
+
+def run_hedged(policy, key, primary, secondary):
+    """primary(attempt)를 실행하고 첫 토큰이 늦으면 secondary(attempt)도 실행하여 먼저 끝난 결과 반환
+
+    두 함수 모두 결과 텍스트(또는 (텍스트, 부가 정보))를 반환해야 하며,
+    모두 실패하면 원래 요청의 오류를 발생시킵니다.
+    """
+    cond = threading.Condition()
+    policy.budget.add_request()
+    policy.stats.add(requests=1)
+    tracker = policy.tracker(key)
+
+    first = _start('primary', primary, cond)
+    attempts = [first]
+    with cond:
+        # 요청 예산을 기다리는 동안은 느린 것이 아니므로, 실제로 보낸 뒤부터 지연 기준만큼 기다림
+        cond.wait_for(lambda: first.begun or first.done)
+        timeout = max(0.0, first.started + policy.delay(key) - time.perf_counter())
+        cond.wait_for(lambda: first.first_token_seconds is not None or first.done, timeout=timeout)
+        slow = first.first_token_seconds is None and not first.done
+
+    if slow:
+        if policy.budget.try_spend():
+            policy.stats.add(hedged=1)
+            metrics.count('llm_hedge', outcome='sent')
+            attempts.append(_start('hedge', secondary, cond))
+        else:
+            policy.stats.add(over_budget=1)
+            metrics.count('llm_hedge', outcome='over_budget')
+
+    with cond:
+        cond.wait_for(lambda: any(a.done and a.error is None for a in attempts) or all(a.done for a in attempts))
+        finished = [a for a in attempts if a.done and a.error is None]
+        winner = min(finished, key=lambda a: a.started + a.finished_seconds) if finished else None
+
+    for attempt in attempts:
+        if attempt is not winner:
+            attempt.cancel()
+        if attempt.first_token_seconds is not None:
+            tracker.record(attempt.first_token_seconds)
+        elif attempt.begun and attempt.error is None:
+            # 첫 토큰을 받지 못하고 취소된 시도는 그때까지의 시간을 기록 (느린 쪽으로 기준이 움직이도록)
+            tracker.record(time.perf_counter() - attempt.started)
+
+    if winner is None:
+        raise first.error
+
+    if winner is not first:
+        result_text = winner.result[0] if isinstance(winner.result, tuple) else winner.result
+        saved = _estimate_saved(first, winner, len(result_text or ''))
+        policy.stats.add(hedge_wins=1, saved_seconds=saved)
+        metrics.count('llm_hedge', outcome='won')
+        metrics.observe('hedge_saved', saved)
+    elif len(attempts) > 1:
+        metrics.count('llm_hedge', outcome='lost')
+    return winner.result
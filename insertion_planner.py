@@ -0,0 +1,165 @@
+"""문서 안에 피드백을 끼워 넣는 batchUpdate 요청 계획
+
+Docs batchUpdate의 요청은 순서대로 적용되므로, 뒤쪽(큰 인덱스)부터 삽입해야
+아직 처리하지 않은 앞쪽 위치가 밀리지 않습니다.
+
+- 삽입 위치를 내림차순으로 정렬하고, 같은 위치의 삽입은 하나로 합칩니다
+- Docs 인덱스는 UTF-16 코드 단위이므로 이모지처럼 한 글자가 두 단위인 문자도 정확히 셉니다
+- 요청이 많으면 크기가 정해진 여러 묶음으로 나눕니다. 앞 묶음이 모두 뒤쪽 위치이므로
+  다음 묶음의 인덱스는 그대로 유효하고, 묶음마다 writeControl.requiredRevisionId로
+  직전 수정본을 지정해 그 사이 학생이 문서를 고쳤는지 확인합니다
+- 문서가 바뀌었으면 남은 삽입만 기준 문단(anchor)의 새 위치로 옮겨 다시 계획합니다
+- 응답을 받지 못한 batchUpdate는 이미 적용되었을 수 있으므로(전부 적용 또는 전부 미적용이어도
+  다시 보내면 두 번 들어감) 다시 읽은 문서에 그대로 들어 있는 삽입은 빼고 다시 계획합니다
+
+사용 예:
+    items = [{'index': 10, 'text': "...", 'anchor': ("문단 내용", 'end')}]
+    for batch in split_batches(plan_insertions(items)):
+        body = {'requests': build_requests(batch, style)}
+"""
+import json
+
+from doc_extractor import KIND_TABLE
+from feedback_cache import normalize_text
+from resilience import status_code
+
+DEFAULT_MAX_BATCH_REQUESTS = 100
+DEFAULT_MAX_BATCH_BYTES = 256 * 1024
+
+EDGE_START = "start"
+EDGE_END = "end"
+
+
+def utf16_len(text):
+    """Docs 인덱스 기준(UTF-16 코드 단위) 길이"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def plan_insertions(items):
+    """삽입 항목을 위치 내림차순으로 정렬하고 같은 위치끼리 합치기
+
+    items는 {'index', 'text', 'anchor'} 목록이며, 같은 위치의 항목은
+    목록에 나온 순서대로 이어 붙입니다. 반환값은
+    {'index', 'text', 'length', 'items'} 목록입니다.
+    """
+    merged = {}
+    for item in items:
+        merged.setdefault(item['index'], []).append(item)
+
+    plan = []
+    for index in sorted(merged, reverse=True):
+        text = ''.join(item['text'] for item in merged[index])
+        plan.append({
+            'index': index,
+            'text': text,
+            'length': utf16_len(text),
+            'items': merged[index],
+        })
+    return plan
+
+
+def build_requests(insertions, text_style=None, fields=None):
+    """계획한 삽입을 insertText(+updateTextStyle) 요청 목록으로 변환"""
+    requests = []
+    for insertion in insertions:
+        requests.append({
+            'insertText': {
+                'location': {'index': insertion['index']},
+                'text': insertion['text'],
+            }
+        })
+        if text_style:
+            requests.append({
+                'updateTextStyle': {
+                    'range': {
+                        'startIndex': insertion['index'],
+                        'endIndex': insertion['index'] + insertion['length'],
+                    },
+                    'textStyle': text_style,
+                    'fields': fields or ','.join(text_style),
+                }
+            })
+    return requests
+
+
+def split_batches(plan, requests_per_insertion=2, max_requests=DEFAULT_MAX_BATCH_REQUESTS,
+                  max_bytes=DEFAULT_MAX_BATCH_BYTES):
+    """내림차순 순서를 유지한 채 요청 수와 크기가 제한을 넘지 않도록 나누기
+
+    삽입 하나가 제한보다 크면 그 삽입만 담은 묶음이 됩니다.
+    """
+    batches = []
+    current = []
+    current_requests = 0
+    current_bytes = 0
+    for insertion in plan:
+        size = len(json.dumps(insertion['text'], ensure_ascii=False).encode('utf-8'))
+        if current and (current_requests + requests_per_insertion > max_requests
+                        or current_bytes + size > max_bytes):
+            batches.append(current)
+            current, current_requests, current_bytes = [], 0, 0
+        current.append(insertion)
+        current_requests += requests_per_insertion
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def leading_anchor(blocks):
+    """문서 맨 앞에 넣을 피드백(전체 평가)의 (위치, 기준 문단)
+
+    표의 시작 위치에는 텍스트를 넣을 수 없으므로(batchUpdate 전체가 거절됨)
+    표가 아닌 첫 블록의 시작에 넣고, 표만 있으면 첫 표 바로 뒤에 넣습니다.
+    """
+    for block in blocks:
+        if block['kind'] != KIND_TABLE:
+            return block['start'], (block['text'], EDGE_START)
+    return blocks[0]['end'], (blocks[0]['text'], EDGE_END)
+
+
+def is_revision_conflict(error):
+    """requiredRevisionId가 최신 수정본과 달라 거절된 요청인지"""
+    return status_code(error) == 400 and 'revision' in str(error).lower()
+
+
+def relocate(items, blocks):
+    """바뀐 문서의 블록에서 기준 문단을 다시 찾아 삽입 위치 갱신
+
+    같은 내용의 문단이 여러 개면 원래 위치에 가장 가까운 것을 고릅니다.
+    반환값은 (옮긴 항목 목록, 기준 문단을 찾지 못한 항목 목록)입니다.
+    """
+    positions = {}
+    for block in blocks:
+        positions.setdefault(block['text'], []).append(block)
+
+    moved = []
+    missing = []
+    for item in items:
+        anchor = item.get('anchor')
+        candidates = positions.get(anchor[0]) if anchor else None
+        if not candidates:
+            missing.append(item)
+            continue
+        edge = anchor[1]
+        block = min(candidates, key=lambda block: abs(block[edge] - item['index']))
+        moved.append({**item, 'index': block[edge]})
+    return moved, missing
+
+
+def drop_applied(items, blocks):
+    """다시 읽은 문서에 이미 들어 있는 삽입 빼기
+
+    삽입할 텍스트 전체(머리말부터 구분선까지, 공백 차이 무시)가 문서에 그대로 있으면
+    앞서 보낸 요청이 적용된 것으로 봅니다.
+    반환값은 (남은 항목 목록, 이미 들어 있는 항목 목록)입니다.
+    """
+    document = '\n' + normalize_text(''.join(block['text'] for block in blocks)) + '\n'
+    remaining = []
+    applied = []
+    for item in items:
+        if '\n' + normalize_text(item['text']) + '\n' in document:
+            applied.append(item)
+        else:
+            remaining.append(item)
+    return remaining, applied
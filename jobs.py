@@ -0,0 +1,142 @@
+"""Streamlit 재실행과 무관하게 계속되는 백그라운드 작업
+
+Streamlit은 위젯 조작, 새로고침, 연결 끊김이 있을 때마다 스크립트를 처음부터
+다시 실행하므로, 버튼 처리 블록 안에서 분석을 돌리면 중간에 끊깁니다.
+작업을 프로세스 전체에서 공유하는 작업자 풀에 맡기고 화면은 작업 ID로
+진행 상황만 조회하면, 다시 연결한 세션도 같은 작업에 이어 붙을 수 있습니다.
+
+작업 함수는 화면(st.*)에 직접 출력하지 말고 Job 객체에 진행 상황을 기록해야 합니다.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_RETENTION_SECONDS = 60 * 60  # 끝난 작업을 보관하는 시간
+
+
+class Job:
+    """작업 하나의 상태와 진행 상황 (작업 스레드와 화면 스레드가 함께 사용)"""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status = STATUS_QUEUED
+        self.progress = 0.0
+        self.message = "대기 중..."
+        self.events = []
+        self.sections = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, progress=None, message=None):
+        """진행률(0~1)과 상태 메시지 갱신"""
+        with self._lock:
+            if progress is not None:
+                self.progress = min(1.0, max(self.progress, progress))
+            if message is not None:
+                self.message = message
+
+    def log(self, level, text):
+        """화면에 순서대로 보여줄 알림 추가 (level: success, info, warning, error)"""
+        with self._lock:
+            self.events.append((level, text))
+
+    def set_section(self, name, text):
+        """작성 중이거나 완성된 섹션 내용 갱신"""
+        with self._lock:
+            self.sections[name] = text
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATUSES
+
+    def snapshot(self):
+        """화면 출력용 현재 상태 복사본"""
+        with self._lock:
+            return {
+                'id': self.id,
+                'key': self.key,
+                'status': self.status,
+                'progress': self.progress,
+                'message': self.message,
+                'events': list(self.events),
+                'sections': dict(self.sections),
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+            }
+
+
+class JobManager:
+    """작업자 풀에서 작업을 실행하고 ID와 키(문서 ID 등)로 찾아주는 관리자"""
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, retention_seconds=DEFAULT_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """func(job, *args, **kwargs)를 백그라운드에서 실행하고 Job 반환
+
+        같은 키로 진행 중인 작업이 있으면 새로 시작하지 않고 그 작업을 돌려주므로
+        버튼을 여러 번 눌러도 분석과 댓글 추가가 중복되지 않습니다.
+        """
+        with self._lock:
+            self._prune()
+            running = self._find_locked(key, active_only=True)
+            if running:
+                return running
+            job = Job(key)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job.status = STATUS_RUNNING
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = STATUS_DONE
+            job.update(1.0)
+        except Exception as e:
+            job.error = str(e)
+            job.status = STATUS_FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        """작업 ID로 찾기 (없거나 보관 기간이 지났으면 None)"""
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def find(self, key):
+        """키로 가장 최근 작업 찾기 (진행 중인 작업 우선)"""
+        with self._lock:
+            return self._find_locked(key, active_only=True) or self._find_locked(key, active_only=False)
+
+    def _find_locked(self, key, active_only):
+        candidates = [
+            job for job in self._jobs.values()
+            if job.key == key and (job.active or not active_only)
+        ]
+        return max(candidates, key=lambda job: job.created_at) if candidates else None
+
+    def _prune(self):
+        """보관 기간이 지난 끝난 작업 정리"""
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
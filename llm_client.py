@@ -0,0 +1,355 @@
+"""Anthropic/OpenAI 공통 AI 호출 계층과 프로세스 전체 연결 풀
+
+두 앱이 요청할 때마다 SDK 클라이언트를 새로 만들면 TCP 연결과 TLS 핸드셰이크를
+매번 다시 하게 됩니다. 이 모듈은 모든 세션과 두 제공자가 함께 쓰는 keep-alive
+HTTP 연결 풀을 하나 두고, 그 위에 제공자별 SDK 클라이언트를 API 키마다 한 번만
+만들어 재사용합니다.
+
+- complete()/acomplete(): 동기/비동기 한 번 호출, stream_text(): 생성되는 대로 텍스트 조각 반환
+- 모델 이름으로 제공자를 고르므로(provider_for) 호출마다 모델을 바꿀 수 있습니다
+- 요청 형식(system, 강제 도구 호출, JSON 응답)과 응답(text, tool_input, usage)을
+  제공자와 무관한 형태로 맞추고, 재시도·동시 실행 제한·캐시 적중 집계를 함께 처리합니다
+- 비동기 SDK 클라이언트는 이벤트 루프에 묶이므로 루프마다 따로 둡니다
+- complete()에 hedge(hedging.HedgePolicy)를 넘기면 첫 토큰이 늦은 요청을 한 번 더 보냅니다
+- 모든 요청은 llm_scheduler의 분당 요청·토큰 예산을 받은 뒤에 보내고 실제 사용량으로 정산합니다
+- SDK와 httpx는 처음 클라이언트를 만들 때 불러오므로 앱 시작(첫 화면 표시)을 늦추지 않습니다
+
+사용 예:
+    client = get_client('anthropic', api_key)
+    result = complete("claude-3-5-sonnet-20241022", messages, system=SYSTEM_PROMPT, client=client)
+    print(result.text)
+"""
+import json
+import os
+import threading
+import time
+import weakref
+
+import llm_scheduler
+import metrics
+from hedging import run_hedged
+from prompt_cache import cached_system_prompt, get_prompt_cache_stats
+from resilience import acall_with_retry, call_with_retry, held_call
+
+PROVIDER_ANTHROPIC = "anthropic"
+PROVIDER_OPENAI = "openai"
+
+# 모델 이름 앞부분 → 제공자
+MODEL_ROUTES = (
+    ("claude", PROVIDER_ANTHROPIC),
+    ("gpt", PROVIDER_OPENAI),
+    ("o1", PROVIDER_OPENAI),
+    ("o3", PROVIDER_OPENAI),
+    ("o4", PROVIDER_OPENAI),
+)
+
+API_KEY_ENV = {
+    PROVIDER_ANTHROPIC: "ANTHROPIC_API_KEY",
+    PROVIDER_OPENAI: "OPENAI_API_KEY",
+}
+
+# 연결 풀 설정 (동시 실행 상한보다 넉넉하게, 요청 사이 유휴 연결은 오래 유지)
+POOL_MAX_CONNECTIONS = 128
+POOL_MAX_KEEPALIVE = 64
+POOL_KEEPALIVE_SECONDS = 90.0
+HTTP_TIMEOUT_SECONDS = 600.0
+HTTP_CONNECT_TIMEOUT_SECONDS = 10.0
+
+
+def provider_for(model):
+    """모델 이름으로 제공자 결정"""
+    name = model.lower()
+    for prefix, provider in MODEL_ROUTES:
+        if name.startswith(prefix):
+            return provider
+    raise ValueError(f"알 수 없는 모델입니다: {model}")
+
+
+def _pool_options():
+    """httpx 연결 풀 설정 (httpx는 처음 연결 풀을 만들 때 불러옴)"""
+    import httpx
+    return {
+        'limits': httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_SECONDS,
+        ),
+        'timeout': httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+    }
+
+
+_lock = threading.Lock()
+_http = None
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()  # 이벤트 루프 → {'http': ..., (제공자, 키): 클라이언트}
+
+
+def shared_http():
+    """모든 제공자가 함께 쓰는 동기 HTTP 연결 풀"""
+    global _http
+    with _lock:
+        if _http is None:
+            import httpx
+            _http = httpx.Client(**_pool_options())
+        return _http
+
+
+def _resolve_key(provider, api_key):
+    api_key = api_key or os.getenv(API_KEY_ENV[provider])
+    if not api_key:
+        raise ValueError(f"{provider} API 키가 설정되지 않았습니다.")
+    return api_key
+
+
+def _make_client(provider, api_key, http_client, asynchronous):
+    # 재시도는 resilience에서 엔드포인트 동시 실행 제한과 함께 처리하므로 SDK 재시도는 끔
+    if provider == PROVIDER_ANTHROPIC:
+        import anthropic
+        cls = anthropic.AsyncAnthropic if asynchronous else anthropic.Anthropic
+    else:
+        import openai
+        cls = openai.AsyncOpenAI if asynchronous else openai.OpenAI
+    return cls(api_key=api_key, max_retries=0, http_client=http_client)
+
+
+def get_client(provider, api_key=None):
+    """제공자와 API 키별로 공유하는 동기 SDK 클라이언트 (키를 생략하면 환경 변수 사용)"""
+    api_key = _resolve_key(provider, api_key)
+    http_client = shared_http()
+    with _lock:
+        key = (provider, api_key)
+        if key not in _clients:
+            _clients[key] = _make_client(provider, api_key, http_client, asynchronous=False)
+        return _clients[key]
+
+
+def get_async_client(provider, api_key=None):
+    """현재 이벤트 루프에서 공유하는 비동기 SDK 클라이언트 (루프 안에서 호출)"""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    api_key = _resolve_key(provider, api_key)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        if 'http' not in clients:
+            import httpx
+            clients['http'] = httpx.AsyncClient(**_pool_options())
+        key = (provider, api_key)
+        if key not in clients:
+            clients[key] = _make_client(provider, api_key, clients['http'], asynchronous=True)
+        return clients[key]
+
+
+class Completion:
+    """제공자와 무관한 응답 (도구 호출을 강제했으면 tool_input에 입력 dict)"""
+
+    def __init__(self, provider, model, text, tool_input, usage, raw):
+        self.provider = provider
+        self.model = model
+        self.text = text
+        self.tool_input = tool_input
+        self.usage = usage
+        self.raw = raw
+
+
+def _build_request(provider, model, messages, system, max_tokens, temperature, tool, json_mode):
+    """공통 인자를 제공자별 요청 인자로 변환
+
+    tool은 Anthropic 형식({'name', 'description', 'input_schema'})이며 그 도구 호출을 강제합니다.
+    json_mode는 OpenAI에서만 response_format으로 전달합니다 (Anthropic은 프롬프트 지시로 충분).
+    """
+    request = {'model': model, 'max_tokens': max_tokens, 'temperature': temperature}
+    if provider == PROVIDER_ANTHROPIC:
+        request['messages'] = messages
+        if system:
+            request['system'] = cached_system_prompt(system)
+        if tool:
+            request['tools'] = [tool]
+            request['tool_choice'] = {"type": "tool", "name": tool['name']}
+        return request
+
+    # OpenAI: 고정된 system 메시지를 맨 앞에 두면 앞부분이 자동으로 캐시됨
+    request['messages'] = ([{"role": "system", "content": system}] if system else []) + list(messages)
+    if tool:
+        request['tools'] = [{
+            "type": "function",
+            "function": {
+                "name": tool['name'],
+                "description": tool.get('description', ''),
+                "parameters": tool['input_schema'],
+            },
+        }]
+        request['tool_choice'] = {"type": "function", "function": {"name": tool['name']}}
+    elif json_mode:
+        request['response_format'] = {"type": "json_object"}
+    return request
+
+
+def _parse_response(provider, model, response):
+    usage = getattr(response, 'usage', None)
+    if provider == PROVIDER_ANTHROPIC:
+        text = ''.join(getattr(block, 'text', '') for block in response.content
+                       if getattr(block, 'type', 'text') == 'text')
+        tool_input = next(
+            (block.input for block in response.content if getattr(block, 'type', None) == 'tool_use'),
+            None
+        )
+        return Completion(provider, model, text, tool_input, usage, response)
+
+    message = response.choices[0].message
+    tool_input = None
+    for call in getattr(message, 'tool_calls', None) or []:
+        try:
+            tool_input = json.loads(call.function.arguments)
+        except (TypeError, ValueError):
+            tool_input = None
+        break
+    return Completion(provider, model, message.content or '', tool_input, usage, response)
+
+
+def _record_usage(provider, usage, span):
+    if span is not None:
+        span.add_usage(usage)
+    get_prompt_cache_stats(provider).record(usage)
+
+
+def _send(provider, client, request):
+    if provider == PROVIDER_ANTHROPIC:
+        return client.messages.create(**request)
+    return client.chat.completions.create(**request)
+
+
+def complete(model, messages, system=None, max_tokens=1000, temperature=0.7, tool=None,
+             json_mode=False, client=None, span=None, hedge=None, hedge_key=None):
+    """모델에 맞는 제공자로 한 번 호출하고 Completion 반환
+
+    client를 넘기지 않으면 환경 변수의 API 키로 공유 클라이언트를 사용합니다.
+    span(metrics.Span)을 넘기면 토큰 수와 재시도 횟수가 기록됩니다.
+    hedge를 넘기면 스트리밍으로 요청하여 첫 토큰이 늦을 때 중복 요청을 보내며,
+    지연 기록은 hedge_key(기본값: 모델 이름)별로 따로 쌓습니다. 도구 호출에는 적용하지 않습니다.
+    요청 예산을 기다려야 할 만큼 요청이 몰려 있으면 중복 요청도 예산만 쓰므로 보내지 않습니다.
+    """
+    provider = provider_for(model)
+    request = _build_request(provider, model, messages, system, max_tokens, temperature, tool, json_mode)
+    if hedge is not None and tool is None and not llm_scheduler.is_congested(provider, request):
+        return _complete_hedged(model, messages, system, max_tokens, temperature, json_mode,
+                                client, span, hedge, hedge_key or model)
+    client = client or get_client(provider)
+    with llm_scheduler.scheduled(provider, request) as ticket:
+        response = call_with_retry(provider, lambda: _send(provider, client, request), span=span)
+        result = _parse_response(provider, model, response)
+        ticket.usage = result.usage
+    _record_usage(provider, result.usage, span)
+    return result
+
+
+async def acomplete(model, messages, system=None, max_tokens=1000, temperature=0.7, tool=None,
+                    json_mode=False, client=None, span=None):
+    """complete()의 비동기 버전 (client는 비동기 SDK 클라이언트)"""
+    provider = provider_for(model)
+    client = client or get_async_client(provider)
+    request = _build_request(provider, model, messages, system, max_tokens, temperature, tool, json_mode)
+    async with llm_scheduler.ascheduled(provider, request) as ticket:
+        response = await acall_with_retry(provider, lambda: _send(provider, client, request), span=span)
+        result = _parse_response(provider, model, response)
+        ticket.usage = result.usage
+    _record_usage(provider, result.usage, span)
+    return result
+
+
+def stream_text(model, messages, system=None, max_tokens=1000, temperature=0.7, json_mode=False,
+                client=None, span=None, on_start=None, on_open=None):
+    """생성되는 텍스트 조각을 차례로 반환하는 제너레이터
+
+    연결을 여는 단계만 재시도합니다 (텍스트를 받기 시작한 뒤에는 중복되므로 재시도하지 않음).
+    제공자의 동시 실행 자리는 스트림을 다 읽거나 닫을 때까지 차지합니다.
+    span을 넘기면 첫 조각까지 걸린 시간도 기록하며, 끝까지 받으면 사용량을
+    span과 캐시 적중 집계에 기록합니다.
+    on_start()는 요청 예산을 받아 보내기 직전에, on_open(close)는 연결을 연 뒤 호출하며
+    close()로 다른 스레드에서 스트림을 닫을 수 있습니다 (중복 전송에서 진 시도 취소).
+    """
+    started = time.perf_counter()
+
+    def mark_first_token():
+        if span is not None and span.first_token_seconds is None:
+            span.first_token_seconds = time.perf_counter() - started
+
+    provider = provider_for(model)
+    client = client or get_client(provider)
+    request = _build_request(provider, model, messages, system, max_tokens, temperature, None, json_mode)
+
+    with llm_scheduler.scheduled(provider, request) as ticket:
+        # 예산을 기다린 시간은 첫 조각까지의 시간에서 뺌
+        started = time.perf_counter()
+        if on_start is not None:
+            on_start()
+        # 동시 실행 자리는 스트림을 다 읽을 때까지 차지 (도중에 받은 429·과부하도 제한기에 반영)
+        if provider == PROVIDER_ANTHROPIC:
+            with held_call(provider, lambda: client.messages.stream(**request).__enter__(), span=span) as stream:
+                if on_open is not None:
+                    on_open(stream.close)
+                try:
+                    for text in stream.text_stream:
+                        mark_first_token()
+                        yield text
+                    usage = stream.get_final_message().usage
+                finally:
+                    stream.close()
+        else:
+            request['stream'] = True
+            request['stream_options'] = {"include_usage": True}
+            with held_call(provider, lambda: client.chat.completions.create(**request), span=span) as stream:
+                usage = None
+                if on_open is not None and getattr(stream, 'close', None):
+                    on_open(stream.close)
+                try:
+                    for chunk in stream:
+                        if getattr(chunk, 'usage', None) is not None:
+                            usage = chunk.usage
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if text:
+                            mark_first_token()
+                            yield text
+                finally:
+                    close = getattr(stream, 'close', None)
+                    if close:
+                        close()
+        ticket.usage = usage
+    _record_usage(provider, usage, span)
+
+
+def _streamed_attempt(model, messages, system, max_tokens, temperature, json_mode, client):
+    """중복 전송용 시도 함수: 스트림으로 받으면서 취소되면 멈춤 (기다리던 스트림은 attempt.cancel()이 닫음)"""
+    def run(attempt):
+        span = metrics.Span('llm_attempt', {'model': model})
+        parts = []
+        stream = stream_text(model, messages, system, max_tokens, temperature, json_mode, client=client, span=span,
+                             on_start=attempt.begin, on_open=attempt.attach)
+        try:
+            for text in stream:
+                attempt.received(text)
+                if attempt.cancelled.is_set():
+                    return None
+                parts.append(text)
+        finally:
+            stream.close()
+        return ''.join(parts), span
+    return run
+
+
+def _complete_hedged(model, messages, system, max_tokens, temperature, json_mode, client, span, hedge, key):
+    secondary_model = hedge.secondary_model or model
+    secondary_client = hedge.secondary_client if hedge.secondary_model else client
+    text, attempt_span = run_hedged(
+        hedge,
+        key,
+        _streamed_attempt(model, messages, system, max_tokens, temperature, json_mode, client),
+        _streamed_attempt(secondary_model, messages, system, max_tokens, temperature, json_mode, secondary_client),
+    )
+    if span is not None:
+        # 이긴 시도의 사용량과 재시도 횟수를 호출한 단계에 반영
+        span.input_tokens += attempt_span.input_tokens
+        span.output_tokens += attempt_span.output_tokens
+        span.cached_tokens += attempt_span.cached_tokens
+        span.retries += attempt_span.retries
+    winner_model = attempt_span.labels['model']
+    return Completion(provider_for(winner_model), winner_model, text, None, None, None)
@@ -0,0 +1,353 @@
+"""AI 요청 속도 예산 스케줄러 (분당 요청 수 RPM · 분당 토큰 수 TPM)
+
+두 AI 제공자는 분당 요청 수와 분당 토큰 수를 제한합니다. 한 반 학생들이 한꺼번에
+제출하면 요청이 제한을 넘어 429 오류가 연달아 나고 재시도가 다시 몰립니다.
+이 모듈은 보내기 전에 요청마다 토큰을 추정하여(입력 글 길이 + max_tokens) 예산 안에서만
+내보내고, 예산이 모자라면 기다리는 요청을 마감이 이른 순서로 줄 세웁니다.
+
+- 예산은 분당 한도를 1분에 걸쳐 채우는 버킷이며, 응답의 실제 사용량으로 정산하여
+  쓰지 않은 max_tokens는 바로 돌려받습니다 (처리량이 한도 가까이 유지됨)
+- 마감은 scheduling() 안에서 정합니다. 화면에서 기다리는 학생(INTERACTIVE)은 곧,
+  배치 실행(BATCH)은 넉넉하게 잡으므로 학생 요청이 먼저 나가지만, 오래 기다린 배치
+  요청도 마감이 다가오면 차례가 옵니다
+- estimate_wait()와 on_wait 콜백으로 지금 요청하면 얼마나 기다릴지 알려줄 수 있습니다
+
+한도는 환경 변수 ANTHROPIC_RPM/ANTHROPIC_TPM, OPENAI_RPM/OPENAI_TPM으로 바꾸며
+0이면 그 한도는 적용하지 않습니다. 한 프로세스 안에서만 공유하므로 같은 API 키를 쓰는
+다른 프로세스(배치 실행기 등)가 있으면 한도를 나누어 지정하세요.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import metrics
+from chunking import estimate_tokens
+from prompt_cache import usage_tokens
+
+# 제공자별 기본 (분당 요청 수, 분당 토큰 수)
+DEFAULT_QUOTAS = {
+    'anthropic': (50, 40000),
+    'openai': (500, 200000),
+}
+QUOTA_ENV = {
+    'anthropic': ("ANTHROPIC_RPM", "ANTHROPIC_TPM"),
+    'openai': ("OPENAI_RPM", "OPENAI_TPM"),
+}
+
+# 요청을 보낸 뒤 이 시간 안에 나가기를 바라는 목표 (초, 마감 = 요청 시각 + 목표)
+INTERACTIVE_TARGET_SECONDS = 30.0
+BATCH_TARGET_SECONDS = 900.0
+
+# 메시지마다 붙는 형식 토큰 (역할, 구분자 등)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 기다리는 동안 예상 대기 시간을 알려주는 간격 (초)
+WAIT_NOTIFY_INTERVAL = 1.0
+
+# 실제 사용량 / 예약한 토큰 비율의 이동 평균 가중치 (대기 시간 추정에 사용)
+USAGE_RATIO_WEIGHT = 0.2
+
+
+def _texts(value):
+    """요청 내용(문자열, 블록 목록, dict)에 들어 있는 글자 모두"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _texts(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _texts(item)
+
+
+def estimate_request(request):
+    """제공자별 요청 인자의 (입력 토큰 추정, 최대 출력 토큰)"""
+    messages = request.get('messages', [])
+    input_tokens = sum(estimate_tokens(text) for text in _texts(
+        [request.get('system'), messages, request.get('tools')]
+    ))
+    input_tokens += MESSAGE_OVERHEAD_TOKENS * (len(messages) + (1 if request.get('system') else 0))
+    return input_tokens, request.get('max_tokens', 0)
+
+
+def used_tokens(usage):
+    """응답 usage에서 한도에 들어가는 토큰 수 (입력 + 출력, 알 수 없으면 None)"""
+    if usage is None:
+        return None
+    input_tokens, _, _ = usage_tokens(usage)
+    output_tokens = getattr(usage, 'output_tokens', None) or getattr(usage, 'completion_tokens', None) or 0
+    return input_tokens + output_tokens
+
+
+class _Budget:
+    """분당 한도를 초당 1/60씩 채우는 버킷 (정산으로 음수가 될 수 있음, 잠금은 호출하는 쪽에서)"""
+
+    def __init__(self, per_minute, now):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = now
+
+    @property
+    def unlimited(self):
+        return self.capacity <= 0
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount, now):
+        """amount만큼 쓸 수 있을 때까지 남은 시간"""
+        if self.unlimited:
+            return 0.0
+        self.refill(now)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount):
+        if not self.unlimited:
+            self.level -= amount
+
+
+class Ticket:
+    """예산을 기다리거나 받은 요청 하나 (받은 뒤 usage를 채우면 실제 사용량으로 정산)"""
+
+    def __init__(self, input_tokens, output_tokens, deadline, seq, on_wait=None):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cost = input_tokens + output_tokens
+        self.deadline = deadline
+        self.seq = seq
+        self.on_wait = on_wait
+        self.waited = 0.0
+        self.usage = None
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class ProviderScheduler:
+    """제공자 하나의 RPM/TPM 예산과 마감 순 대기열 (clock은 예산을 채우는 단조 시계)"""
+
+    def __init__(self, provider, rpm, tpm, clock=time.monotonic):
+        self.provider = provider
+        self._clock = clock
+        self._requests = _Budget(rpm, clock())
+        self._tokens = _Budget(tpm, clock())
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.granted = 0
+        self.queued = 0
+        self.waited_seconds = 0.0
+        self.refunded_tokens = 0
+        self.in_flight_tokens = 0
+        self.usage_ratio = 1.0
+
+    @property
+    def unlimited(self):
+        return self._requests.unlimited and self._tokens.unlimited
+
+    def _charge(self, tokens):
+        # 한 번에 버킷보다 큰 요청은 버킷 크기로 계산 (그렇지 않으면 영원히 보낼 수 없음)
+        return tokens if self._tokens.unlimited else min(tokens, self._tokens.capacity)
+
+    def _time_until(self, tokens, requests, now):
+        return max(self._tokens.time_until(tokens, now), self._requests.time_until(requests, now))
+
+    def _ahead(self, deadline):
+        """마감이 deadline보다 이른 대기 요청들의 (토큰 합계, 개수)"""
+        ahead = [ticket for ticket in self._queue if ticket.deadline <= deadline]
+        return sum(self._charge(ticket.cost) for ticket in ahead), len(ahead)
+
+    def _expected_wait(self, ahead_tokens, own_tokens, requests, now):
+        """앞 요청들과 보내는 중인 요청들이 예약 중 쓰지 않을 몫(최근 사용 비율)을 돌려준다고 보고 계산한 대기 시간
+
+        내 요청은 예약한 토큰이 모두 있어야 나갈 수 있으므로 그대로 셉니다.
+        """
+        returning = (1.0 - self.usage_ratio) * self.in_flight_tokens
+        tokens = self.usage_ratio * ahead_tokens + own_tokens - returning
+        return self._time_until(tokens, requests, now)
+
+    def estimate_wait(self, tokens, requests=1, deadline=None):
+        """지금 요청하면 예산을 받기까지 기다릴 시간 추정 (앞에 선 요청 포함)
+
+        tokens는 요청들의 입력·출력 토큰 합계, requests는 요청 수입니다.
+        """
+        if self.unlimited:
+            return 0.0
+        deadline = deadline if deadline is not None else time.time() + INTERACTIVE_TARGET_SECONDS
+        with self._cond:
+            ahead_tokens, ahead_count = self._ahead(deadline)
+            return self._expected_wait(ahead_tokens, self._charge(tokens), ahead_count + requests, self._clock())
+
+    def _ticket_wait(self, ticket, now):
+        """대기 중인 ticket의 남은 대기 시간 추정 (_ahead에는 ticket 자신도 들어 있음)"""
+        ahead_tokens, ahead_count = self._ahead(ticket.deadline)
+        own = self._charge(ticket.cost)
+        return self._expected_wait(ahead_tokens - own, own, ahead_count, now)
+
+    def acquire(self, input_tokens, output_tokens, deadline=None, on_wait=None):
+        """예산을 받을 때까지 기다린 뒤 Ticket 반환 (마감이 이른 요청부터 차례로)"""
+        deadline = deadline if deadline is not None else time.time() + INTERACTIVE_TARGET_SECONDS
+        ticket = Ticket(input_tokens, output_tokens, deadline, next(self._seq), on_wait)
+        if self.unlimited:
+            return ticket
+
+        started = self._clock()
+        notified = None
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                now = self._clock()
+                if self._queue[0] is ticket:
+                    delay = self._time_until(self._charge(ticket.cost), 1, now)
+                    if delay <= 0:
+                        heapq.heappop(self._queue)
+                        self._tokens.take(self._charge(ticket.cost))
+                        self._requests.take(1)
+                        self.in_flight_tokens += self._charge(ticket.cost)
+                        self._cond.notify_all()
+                        break
+                else:
+                    # 앞 요청이 나갈 때 깨워 주므로 알림 간격만큼만 기다림
+                    delay = WAIT_NOTIFY_INTERVAL
+                if on_wait is not None and (notified is None or now - notified >= WAIT_NOTIFY_INTERVAL):
+                    notified = now
+                    on_wait(self._ticket_wait(ticket, now))
+                self._cond.wait(timeout=min(delay, WAIT_NOTIFY_INTERVAL))
+
+            ticket.waited = self._clock() - started
+            self.granted += 1
+            if ticket.waited > 0.001:
+                self.queued += 1
+                self.waited_seconds += ticket.waited
+
+        if ticket.waited > 0.001:
+            metrics.observe('llm_queue', ticket.waited, provider=self.provider)
+        return ticket
+
+    def settle(self, ticket):
+        """실제 사용량으로 정산 (usage를 모르면 출력 토큰 추정분만 돌려줌)"""
+        if self.unlimited:
+            return
+        charged = self._charge(ticket.cost)
+        used = used_tokens(ticket.usage)
+        with self._cond:
+            if used is not None and charged:
+                ratio = min(1.5, max(0.05, used / charged))
+                self.usage_ratio += USAGE_RATIO_WEIGHT * (ratio - self.usage_ratio)
+            else:
+                used = ticket.input_tokens
+            refund = charged - used
+            self._tokens.take(-refund)
+            self.refunded_tokens += refund
+            self.in_flight_tokens -= charged
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'granted': self.granted,
+                'queued': self.queued,
+                'waited_seconds': self.waited_seconds,
+                'waiting': len(self._queue),
+                'refunded_tokens': self.refunded_tokens,
+                'usage_ratio': self.usage_ratio,
+            }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def _quota(provider):
+    rpm, tpm = DEFAULT_QUOTAS.get(provider, (0, 0))
+    rpm_env, tpm_env = QUOTA_ENV.get(provider, (None, None))
+    return int(os.getenv(rpm_env, rpm)) if rpm_env else rpm, int(os.getenv(tpm_env, tpm)) if tpm_env else tpm
+
+
+def get_scheduler(provider):
+    """제공자별로 프로세스 전체에서 공유하는 스케줄러"""
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            _schedulers[provider] = ProviderScheduler(provider, *_quota(provider))
+        return _schedulers[provider]
+
+
+def configure(provider, rpm, tpm):
+    """제공자의 한도를 바꾸고 새 스케줄러 반환 (0이면 그 한도 없음)"""
+    with _schedulers_lock:
+        _schedulers[provider] = ProviderScheduler(provider, rpm, tpm)
+        return _schedulers[provider]
+
+
+_context = contextvars.ContextVar('llm_schedule', default=None)
+
+
+@contextmanager
+def scheduling(target_seconds=INTERACTIVE_TARGET_SECONDS, deadline=None, on_wait=None):
+    """이 안에서 보내는 AI 요청의 마감(기본: 지금 + target_seconds)과 대기 알림 콜백 지정
+
+    on_wait(예상 대기 초)는 예산을 기다리는 동안 WAIT_NOTIFY_INTERVAL마다 호출됩니다.
+    작업자 스레드에는 metrics.in_current_run()으로 감싼 함수에 함께 전달됩니다.
+    """
+    token = _context.set({
+        'deadline': deadline if deadline is not None else time.time() + target_seconds,
+        'on_wait': on_wait,
+    })
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_deadline():
+    options = _context.get()
+    return options['deadline'] if options else None
+
+
+def estimate_wait(provider, tokens, requests=1):
+    """지금 요청하면 기다릴 시간 추정 (현재 scheduling()의 마감 기준)"""
+    return get_scheduler(provider).estimate_wait(tokens, requests, current_deadline())
+
+
+def is_congested(provider, request):
+    """이 요청을 지금 바로 보낼 수 없는지 (예산이 모자라거나 앞에 기다리는 요청이 있음)"""
+    return estimate_wait(provider, sum(estimate_request(request))) > 0
+
+
+@contextmanager
+def scheduled(provider, request):
+    """예산을 받은 뒤 요청을 보내고, 끝나면 ticket.usage로 정산
+
+    사용 예:
+        with scheduled(provider, request) as ticket:
+            response = send(request)
+            ticket.usage = response.usage
+    """
+    options = _context.get() or {}
+    scheduler = get_scheduler(provider)
+    ticket = scheduler.acquire(*estimate_request(request), options.get('deadline'), options.get('on_wait'))
+    try:
+        yield ticket
+    finally:
+        scheduler.settle(ticket)
+
+
+@asynccontextmanager
+async def ascheduled(provider, request):
+    """scheduled()의 비동기 버전 (기다리는 동안 이벤트 루프를 막지 않음)"""
+    options = _context.get() or {}
+    scheduler = get_scheduler(provider)
+    ticket = await asyncio.get_running_loop().run_in_executor(
+        None, scheduler.acquire, *estimate_request(request), options.get('deadline'), options.get('on_wait')
+    )
+    try:
+        yield ticket
+    finally:
+        scheduler.settle(ticket)
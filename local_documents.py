@@ -0,0 +1,302 @@
+"""내 컴퓨터에 있는 보고서 파일 읽기 (Word, PDF, 텍스트)
+
+구글 문서를 거치지 않고 내려받아 둔 파일을 바로 분석할 수 있도록, 파일을 문단 단위로
+차례로 읽어 doc_extractor와 같은 블록({'text', 'start', 'end', 'kind'})을 만듭니다.
+read_document는 GoogleDocsCommenter.get_document_content와 같은 형태
+({'title', 'content', 'doc_id', 'word_count', 'blocks'})를 반환하므로 이후 분석 과정은 그대로 씁니다.
+
+- .docx : 압축 파일 안의 word/document.xml을 iterparse로 훑으며, 읽은 요소는 바로 비웁니다
+- .pdf  : pypdf가 설치되어 있어야 하며(선택 설치), 한 쪽씩 텍스트를 뽑습니다
+- .txt, .md : 한 줄씩 읽어 빈 줄로 문단을 나눕니다 (UTF-8이 아니면 CP949로 읽음)
+
+start/end는 구글 문서의 위치처럼 1부터 시작하는 글자 위치입니다.
+경로 대신 파일 객체(Streamlit 업로드 파일 등, name 속성 필요)를 넘겨도 됩니다.
+"""
+import codecs
+import io
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from xml.etree.ElementTree import iterparse
+
+from doc_extractor import KIND_PARAGRAPH, KIND_TABLE, blocks_to_text
+
+SUPPORTED_EXTENSIONS = (".docx", ".pdf", ".txt", ".md")
+
+# 로컬 파일의 문서 ID 앞에 붙여 구글 문서 ID와 구분
+LOCAL_DOC_PREFIX = "file:"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DC_TITLE = "{http://purl.org/dc/elements/1.1/}title"
+
+# PDF 줄이 문장 끝으로 끝나면 문단이 끝난 것으로 봄 (짧은 줄일 때만)
+_SENTENCE_END = re.compile(r'[.?!。"”’)]$|다\.?$|요\.?$')
+
+_READ_SIZE = 64 * 1024
+
+
+def is_supported(name):
+    return os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def is_local_doc_id(doc_id):
+    return doc_id.startswith(LOCAL_DOC_PREFIX)
+
+
+def local_doc_id(path):
+    """로컬 파일의 문서 ID (저널·히스토리에서 구글 문서 ID 대신 사용)"""
+    return LOCAL_DOC_PREFIX + os.path.abspath(path)
+
+
+def find_documents(directory):
+    """폴더(하위 폴더 포함)의 지원하는 파일 경로 목록 (이름순)"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if is_supported(name) and not name.startswith(('~$', '.')):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _name(source):
+    return source if isinstance(source, str) else getattr(source, 'name', '')
+
+
+def _stem(source):
+    return os.path.splitext(os.path.basename(_name(source)))[0] or "제목 없음"
+
+
+def _rewind(source):
+    if not isinstance(source, str):
+        source.seek(0)
+
+
+class _Positions:
+    """블록에 1부터 시작하는 글자 위치를 붙이기"""
+
+    def __init__(self):
+        self.offset = 1
+
+    def block(self, text, kind=KIND_PARAGRAPH):
+        text = text if text.endswith('\n') else text + '\n'
+        block = {'text': text, 'start': self.offset, 'end': self.offset + len(text), 'kind': kind}
+        self.offset += len(text)
+        return block
+
+
+# --- Word (.docx) ---
+
+def _run_text(element):
+    """w:p 안의 글자 (탭과 줄바꿈 포함)"""
+    parts = []
+    for node in element.iter():
+        if node.tag == _W + 't':
+            parts.append(node.text or '')
+        elif node.tag == _W + 'tab':
+            parts.append('\t')
+        elif node.tag in (_W + 'br', _W + 'cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _docx_title(archive):
+    try:
+        with archive.open('docProps/core.xml') as f:
+            for _, element in iterparse(f):
+                if element.tag == _DC_TITLE:
+                    return (element.text or '').strip() or None
+    except KeyError:
+        return None
+    return None
+
+
+def iter_docx_blocks(source):
+    """Word 문서의 문단·표 블록을 차례로 생성 (표는 doc_extractor처럼 '셀 | 셀' 줄)"""
+    positions = _Positions()
+    with zipfile.ZipFile(source) as archive, archive.open('word/document.xml') as f:
+        table_depth = 0
+        rows = []
+        cells = []
+        cell_parts = []
+        for event, element in iterparse(f, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == _W + 'tbl':
+                    table_depth += 1
+                continue
+
+            if tag == _W + 'p':
+                text = _run_text(element)
+                element.clear()
+                if table_depth:
+                    cell_parts.append(text)
+                elif text.strip():
+                    yield positions.block(text)
+            elif tag == _W + 'tc' and table_depth == 1:
+                cells.append(' '.join(' '.join(cell_parts).split()))
+                cell_parts = []
+                element.clear()
+            elif tag == _W + 'tr' and table_depth == 1:
+                if any(cells):
+                    rows.append(' | '.join(cells))
+                cells = []
+                element.clear()
+            elif tag == _W + 'tbl':
+                table_depth -= 1
+                if table_depth == 0:
+                    if rows:
+                        yield positions.block('\n'.join(rows), KIND_TABLE)
+                    rows = []
+                    element.clear()
+
+
+# --- PDF ---
+
+def _pdf_reader(source):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF 파일을 읽으려면 pypdf를 설치해주세요 (pip install pypdf)")
+    return PdfReader(source)
+
+
+def _page_paragraphs(text):
+    """PDF 한 쪽의 텍스트를 문단으로 나누기
+
+    빈 줄은 항상 문단을 나누고, 문장 끝으로 끝나는 짧은 줄(그 쪽에서 가장 긴 줄의 80% 미만)도
+    문단의 마지막 줄로 봅니다. 나머지 줄바꿈은 줄 길이 때문에 생긴 것이므로 이어 붙입니다.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    width = max((len(line) for line in lines), default=0)
+    paragraph = []
+    for line in lines:
+        if not line:
+            if paragraph:
+                yield ' '.join(paragraph)
+                paragraph = []
+            continue
+        paragraph.append(line)
+        if _SENTENCE_END.search(line) and len(line) < width * 0.8:
+            yield ' '.join(paragraph)
+            paragraph = []
+    if paragraph:
+        yield ' '.join(paragraph)
+
+
+def iter_pdf_blocks(source):
+    """PDF 문서의 문단 블록을 한 쪽씩 차례로 생성"""
+    positions = _Positions()
+    for page in _pdf_reader(source).pages:
+        for paragraph in _page_paragraphs(page.extract_text() or ''):
+            yield positions.block(paragraph)
+
+
+def _pdf_title(source):
+    metadata = _pdf_reader(source).metadata
+    if not metadata:
+        return None
+    return (metadata.title or '').strip() or None
+
+
+# --- 텍스트 (.txt, .md) ---
+
+@contextmanager
+def _open_binary(source):
+    """경로면 파일을 열고, 파일 객체면 닫지 않고 그대로 사용"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield f
+    else:
+        yield source
+
+
+@contextmanager
+def _open_text(source, encoding):
+    if isinstance(source, str):
+        with open(source, encoding=encoding, errors='replace') as f:
+            yield f
+    else:
+        f = io.TextIOWrapper(source, encoding=encoding, errors='replace')
+        try:
+            yield f
+        finally:
+            # 호출한 쪽의 파일 객체는 닫지 않음
+            f.detach()
+
+
+def _text_encoding(source):
+    """UTF-8로 읽을 수 있는지 파일을 조금씩 확인 (안 되면 CP949)"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with _open_binary(source) as f:
+            while True:
+                chunk = f.read(_READ_SIZE)
+                decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp949'
+    finally:
+        _rewind(source)
+
+
+def iter_text_blocks(source):
+    """텍스트·마크다운 파일의 문단 블록을 차례로 생성 (마크다운 제목 줄은 따로 한 문단)"""
+    positions = _Positions()
+    encoding = _text_encoding(source)
+    paragraph = []
+    with _open_text(source, encoding) as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line.lstrip().startswith('#') or not line.strip():
+                if paragraph:
+                    yield positions.block('\n'.join(paragraph))
+                    paragraph = []
+                if line.strip():
+                    yield positions.block(line)
+                continue
+            paragraph.append(line)
+    if paragraph:
+        yield positions.block('\n'.join(paragraph))
+
+
+# --- 공통 ---
+
+def iter_blocks(source):
+    """파일 종류에 맞게 블록을 차례로 생성 (지원하지 않는 형식이면 ValueError)"""
+    extension = os.path.splitext(_name(source))[1].lower()
+    if extension == ".docx":
+        return iter_docx_blocks(source)
+    if extension == ".pdf":
+        return iter_pdf_blocks(source)
+    if extension in (".txt", ".md"):
+        return iter_text_blocks(source)
+    raise ValueError(f"지원하지 않는 파일 형식입니다: {extension or _name(source)}")
+
+
+def document_title(source):
+    """문서 속성의 제목 (없으면 파일 이름)"""
+    extension = os.path.splitext(_name(source))[1].lower()
+    title = None
+    if extension == ".docx":
+        with zipfile.ZipFile(source) as archive:
+            title = _docx_title(archive)
+    elif extension == ".pdf":
+        title = _pdf_title(source)
+    _rewind(source)
+    return title or _stem(source)
+
+
+def read_document(source):
+    """파일을 읽어 get_document_content와 같은 형태의 문서 정보 반환"""
+    title = document_title(source)
+    blocks = list(iter_blocks(source))
+    content = blocks_to_text(blocks)
+    return {
+        'title': title,
+        'content': content.strip(),
+        'doc_id': local_doc_id(_name(source)) if isinstance(source, str) else LOCAL_DOC_PREFIX + _name(source),
+        'word_count': len(content.split()),
+        'blocks': blocks
+    }
@@ -0,0 +1,357 @@
+"""단계별 지연 시간·토큰·API 호출 계측
+
+문서 읽기, AI 분석, 섹션 완성, 댓글/문서 삽입 같은 단계를 timed()로 감싸면
+소요 시간, 입출력 토큰, 재시도 횟수, 주고받은 바이트, HTTP 상태 코드가
+프로세스 전체 히스토그램/카운터에 쌓입니다.
+
+- render_prometheus(): Prometheus 텍스트 형식
+- 환경 변수 METRICS_PORT: 지정하면 http://<host>:<port>/metrics 로 제공 (serve_from_env)
+- 환경 변수 METRICS_LOG: 지정하면 단계 기록을 JSON Lines 파일에 추가
+
+한 번의 분석 실행에 속한 단계만 따로 모으려면 start_run()/track_run()을 사용합니다.
+작업자 스레드로 넘기는 함수는 in_current_run()으로 감싸야 같은 실행에 기록됩니다.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompt_cache import usage_tokens
+
+# 지연 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STATUS_OK = "ok"
+
+
+def status_of(error):
+    """예외에서 HTTP 상태 코드 추출 (알 수 없으면 'error')"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'resp', None), 'status', None)
+    return str(status) if status is not None else "error"
+
+
+def payload_bytes(payload):
+    """요청/응답 본문(JSON)의 대략적인 크기"""
+    return len(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class Histogram:
+    """누적 구간 방식(Prometheus)의 히스토그램"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Span:
+    """측정한 단계 하나 (timed() 안에서 토큰·바이트 등을 채움)"""
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+        self.seconds = 0.0
+        self.first_token_seconds = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.calls = 1
+        self.retries = 0
+        self.status = None
+        self.errors = {}
+
+    def add_usage(self, usage):
+        """LLM 응답 usage의 토큰 수 더하기 (Anthropic/OpenAI 모두 지원)"""
+        if usage is None:
+            return
+        input_tokens, cached, _ = usage_tokens(usage)
+        self.input_tokens += input_tokens
+        self.cached_tokens += cached
+        self.output_tokens += (getattr(usage, 'output_tokens', None)
+                               or getattr(usage, 'completion_tokens', None) or 0)
+
+    def add_error(self, error):
+        """일괄 요청 중 일부 호출의 실패 기록"""
+        status = status_of(error)
+        self.errors[status] = self.errors.get(status, 0) + 1
+
+    def to_dict(self):
+        return {
+            'stage': self.stage,
+            'labels': self.labels,
+            'seconds': round(self.seconds, 4),
+            'first_token_seconds': self.first_token_seconds,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cached_tokens': self.cached_tokens,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'calls': self.calls,
+            'retries': self.retries,
+            'status': self.status,
+            'errors': self.errors,
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class MetricsRegistry:
+    """프로세스 전체 히스토그램과 카운터 (스레드 안전)"""
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _inc(self, name, labels, value=1):
+        if value:
+            key = (name, _label_key(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, name, labels, value):
+        key = (name, _label_key(labels))
+        if key not in self._histograms:
+            self._histograms[key] = Histogram()
+        self._histograms[key].observe(value)
+
+    def record(self, span):
+        stage = {'stage': span.stage, **span.labels}
+        with self._lock:
+            self._observe('report_stage_duration_seconds', stage, span.seconds)
+            if span.first_token_seconds is not None:
+                self._observe('report_first_token_seconds', stage, span.first_token_seconds)
+
+            failed = sum(span.errors.values())
+            self._inc('report_api_calls_total', {**stage, 'status': span.status}, span.calls - failed)
+            for status, count in span.errors.items():
+                self._inc('report_api_calls_total', {**stage, 'status': status}, count)
+
+            self._inc('report_tokens_total', {**stage, 'direction': 'input'}, span.input_tokens)
+            self._inc('report_tokens_total', {**stage, 'direction': 'output'}, span.output_tokens)
+            self._inc('report_tokens_total', {**stage, 'direction': 'cached'}, span.cached_tokens)
+            self._inc('report_bytes_total', {**stage, 'direction': 'sent'}, span.bytes_sent)
+            self._inc('report_bytes_total', {**stage, 'direction': 'received'}, span.bytes_received)
+            self._inc('report_retries_total', stage, span.retries)
+
+        if self.log_path:
+            self._write_log(span)
+
+    def count(self, event, labels):
+        with self._lock:
+            self._inc('report_events_total', {'event': event, **labels})
+
+    def _write_log(self, span):
+        line = json.dumps({'ts': time.time(), **span.to_dict()}, ensure_ascii=False)
+        with self._lock:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식으로 출력"""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, key), histogram in sorted(self._histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', str(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for (name, key), value in sorted(self._counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(log_path=os.getenv("METRICS_LOG"))
+
+
+class RunRecorder:
+    """한 번의 분석 실행에 속한 단계 기록"""
+
+    def __init__(self):
+        self.spans = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._token = None
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """단계별 (횟수, 합계 시간, 입력 토큰, 출력 토큰) 요약과 전체 소요 시간"""
+        stages = {}
+        with self._lock:
+            for span in self.spans:
+                count, seconds, input_tokens, output_tokens = stages.get(span.stage, (0, 0.0, 0, 0))
+                stages[span.stage] = (
+                    count + 1,
+                    seconds + span.seconds,
+                    input_tokens + span.input_tokens,
+                    output_tokens + span.output_tokens,
+                )
+        return {'total_seconds': time.perf_counter() - self.started, 'stages': stages}
+
+
+_current_run = contextvars.ContextVar('metrics_run', default=None)
+
+
+def start_run():
+    """현재 스레드(컨텍스트)의 단계 기록 시작"""
+    run = RunRecorder()
+    run._token = _current_run.set(run)
+    return run
+
+
+def finish_run(run):
+    """start_run()으로 시작한 기록 종료"""
+    _current_run.reset(run._token)
+    return run.summary()
+
+
+@contextmanager
+def track_run():
+    run = start_run()
+    try:
+        yield run
+    finally:
+        finish_run(run)
+
+
+def in_current_run(func):
+    """작업자 스레드에서 실행해도 지금 실행 기록에 남도록 함수 감싸기"""
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _record(span):
+    registry.record(span)
+    run = _current_run.get()
+    if run is not None:
+        run.add(span)
+
+
+@contextmanager
+def timed(stage, **labels):
+    """단계 소요 시간 측정 (예외가 나면 상태 코드를 기록하고 다시 발생시킴)"""
+    span = Span(stage, labels)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.status = status_of(e)
+        raise
+    finally:
+        span.seconds = time.perf_counter() - started
+        if span.status is None:
+            span.status = STATUS_OK
+        _record(span)
+
+
+def count(event, **labels):
+    """단계가 아닌 사건 횟수 기록 (예: 분석 재실행, 대체 파서 사용)"""
+    registry.count(event, labels)
+
+
+def observe(stage, seconds, **labels):
+    """이미 잰 시간을 단계 기록으로 추가 (예: 섹션이 완성되기까지 걸린 시간)"""
+    span = Span(stage, labels)
+    span.seconds = seconds
+    span.calls = 0
+    span.status = STATUS_OK
+    _record(span)
+
+
+# 화면에 표시할 단계 이름
+STAGE_LABELS = {
+    'fetch': "문서 읽기",
+    'analyze': "AI 분석",
+    'analyze_chunk': "부분 분석",
+    'section': "섹션 완성",
+    'parse': "섹션 파싱",
+    'comment': "댓글 추가",
+    'llm': "AI 평가",
+    'insert': "문서 삽입",
+    'hedge_saved': "중복 전송으로 단축(추정)",
+    'llm_queue': "요청 예산 대기",
+}
+
+
+def summary_lines(summary):
+    """사이드바 표시용 '단계: 시간' 목록"""
+    lines = []
+    for stage, (count, seconds, input_tokens, output_tokens) in summary['stages'].items():
+        line = f"{STAGE_LABELS.get(stage, stage)}: {seconds:.2f}초"
+        if count > 1:
+            line += f" ({count}회)"
+        if input_tokens or output_tokens:
+            line += f" · 토큰 {input_tokens:,}/{output_tokens:,}"
+        lines.append(line)
+    lines.append(f"전체: {summary['total_seconds']:.2f}초")
+    return lines
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_from_env():
+    """METRICS_PORT가 설정되어 있으면 /metrics 서버를 한 번만 시작"""
+    global _server
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server
@@ -0,0 +1,147 @@
+"""문단 단위 증분 분석 저장소
+
+문서별로 이미 분석한 문단의 지문(fingerprint)과 그 피드백, 그리고 문서에
+삽입한 AI 평가 머리말의 지문을 저장합니다. 학생이 일부 문단만 고쳐서 다시
+제출하면 새로 생기거나 바뀐 문단만 골라 분석하고, 나머지는 저장한 피드백을 씁니다.
+
+삽입한 AI 평가는 "[AI 평가 - …]" 머리말 줄부터 구분선까지를 한 블록으로 알아봅니다.
+블록 밖에 있는 학생의 구분선이나 평가와 같은 문장은 학생 글로 그대로 둡니다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from feedback_cache import normalize_text
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "paragraph_store.sqlite3"
+)
+
+KIND_ANALYZED = "analyzed"
+KIND_INSERTED = "inserted"
+
+# 문서에 삽입하는 AI 평가 블록의 머리말과 끝 구분선
+FEEDBACK_HEADER_PREFIX = "[AI 평가 - "
+FEEDBACK_SEPARATOR = "-" * 50
+
+
+def fingerprint(text):
+    """공백 차이를 무시한 문단 지문"""
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def make_scope(**settings):
+    """평가 설정(장르, 모델, 추가 지시사항 등)이 바뀌면 이전 결과를 쓰지 않도록 범위 키 생성"""
+    payload = json.dumps(settings, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def inserted_blocks(paragraphs, inserted):
+    """이전에 삽입한 AI 평가 블록에 속하는 문단 인덱스 집합
+
+    머리말 줄이 저장해 둔 머리말과 같으면 다음 구분선까지를 평가 블록으로 봅니다.
+    구분선이 지워진 블록은 머리말 줄만 뺍니다.
+    """
+    skip = set()
+    start = None
+    for idx, paragraph in enumerate(paragraphs):
+        text = paragraph['text'].strip()
+        if text.startswith(FEEDBACK_HEADER_PREFIX) and fingerprint(text) in inserted:
+            skip.add(idx)
+            start = idx
+        elif start is not None and text == FEEDBACK_SEPARATOR:
+            skip.update(range(start, idx + 1))
+            start = None
+    return skip
+
+
+def diff_paragraphs(paragraphs, analyzed, inserted):
+    """새로 가져온 문단을 저장된 지문과 비교
+
+    반환값은 (document_paragraphs, changed, reused)입니다.
+    document_paragraphs는 이전에 삽입한 AI 평가 블록을 뺀 학생 글 문단,
+    changed는 document_paragraphs 안에서 새로 생기거나 바뀐 문단의 인덱스 목록,
+    reused는 바뀌지 않은 문단의 {인덱스: 저장된 피드백}입니다.
+    """
+    skip = inserted_blocks(paragraphs, inserted)
+    document_paragraphs = [p for idx, p in enumerate(paragraphs) if idx not in skip]
+    changed = []
+    reused = {}
+    for idx, paragraph in enumerate(document_paragraphs):
+        fp = fingerprint(paragraph['text'])
+        if fp in analyzed:
+            reused[idx] = analyzed[fp]
+        else:
+            changed.append(idx)
+    return document_paragraphs, changed, reused
+
+
+class ParagraphStore:
+    """SQLite에 문서별 문단 지문과 피드백을 저장"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS paragraphs (
+                doc_id TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                feedback TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (doc_id, scope, fingerprint, kind)
+            )
+        """)
+        self._conn.commit()
+
+    def load(self, doc_id, scope):
+        """저장된 결과 반환: ({문단 지문: 피드백}, {삽입한 평가 문단 지문})"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, kind, feedback FROM paragraphs WHERE doc_id = ? AND scope = ?",
+                (doc_id, scope)
+            ).fetchall()
+
+        analyzed = {}
+        inserted = set()
+        for fp, kind, feedback in rows:
+            if kind == KIND_ANALYZED:
+                analyzed[fp] = feedback
+            else:
+                inserted.add(fp)
+        return analyzed, inserted
+
+    def save(self, doc_id, scope, analyzed, inserted_texts=()):
+        """분석한 문단({문단 텍스트: 피드백})과 문서에 삽입한 평가 텍스트 기록"""
+        now = time.time()
+        rows = [
+            (doc_id, scope, fingerprint(text), KIND_ANALYZED, feedback, now)
+            for text, feedback in analyzed.items()
+        ]
+        for text in inserted_texts:
+            # 삽입한 평가는 문서에서 여러 문단으로 나뉘므로 머리말 줄로 알아봄 (inserted_blocks 참고)
+            for line in text.splitlines():
+                if line.strip().startswith(FEEDBACK_HEADER_PREFIX):
+                    rows.append((doc_id, scope, fingerprint(line), KIND_INSERTED, None, now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO paragraphs "
+                "(doc_id, scope, fingerprint, kind, feedback, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def forget(self, doc_id):
+        """문서의 모든 기록 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM paragraphs WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
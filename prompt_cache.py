@@ -0,0 +1,84 @@
+"""프롬프트 앞부분(prefix) 캐시 설정과 캐시 적중 통계
+
+평가 기준처럼 매 요청마다 똑같이 보내는 부분을 프롬프트 맨 앞에 두고
+문서 내용을 맨 뒤에 두면, API 제공자가 앞부분의 처리 결과를 재사용합니다.
+
+- Anthropic: system 블록에 cache_control을 표시해야 캐시됩니다
+- OpenAI: 앞부분이 같으면 자동으로 캐시됩니다
+
+두 제공자 모두 일정 길이(MIN_CACHEABLE_TOKENS) 이상인 앞부분만 캐시하므로,
+각 앱은 모든 작업(전체·부분·섹션·묶음 평가)의 지침과 기준을 담은 system 블록 하나를
+함께 쓰고, 작업 종류와 문서는 사용자 메시지로 보냅니다.
+"""
+import threading
+
+# 제공자가 캐시하는 최소 앞부분 길이 (Anthropic Claude 3.5 Sonnet, OpenAI 모두 1024 토큰)
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def cached_system_prompt(text):
+    """Anthropic system 프롬프트를 캐시 지점이 표시된 블록 목록으로 변환"""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def usage_tokens(usage):
+    """응답 usage에서 (전체 입력 토큰, 캐시에서 읽은 토큰, 캐시에 새로 저장한 토큰) 추출"""
+    if usage is None:
+        return 0, 0, 0
+
+    # OpenAI: prompt_tokens는 캐시된 토큰을 포함
+    prompt_tokens = getattr(usage, 'prompt_tokens', None)
+    if prompt_tokens is not None:
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached = getattr(details, 'cached_tokens', 0) or 0
+        return prompt_tokens, cached, 0
+
+    # Anthropic: input_tokens는 캐시를 거치지 않은 토큰만 셈
+    cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    input_tokens = (getattr(usage, 'input_tokens', 0) or 0) + cache_read + cache_write
+    return input_tokens, cache_read, cache_write
+
+
+class PromptCacheStats:
+    """요청별 입력 토큰 중 캐시에서 읽은 비율 집계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.cache_write_tokens = 0
+
+    def record(self, usage):
+        """응답 usage를 집계하고 이번 요청에서 캐시된 토큰 수 반환"""
+        input_tokens, cached, written = usage_tokens(usage)
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached
+            self.cache_write_tokens += written
+        return cached
+
+    def snapshot(self):
+        """현재까지의 집계 결과"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'input_tokens': self.input_tokens,
+                'cached_tokens': self.cached_tokens,
+                'cache_write_tokens': self.cache_write_tokens,
+                'hit_rate': self.cached_tokens / self.input_tokens if self.input_tokens else 0.0,
+            }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_prompt_cache_stats(name):
+    """이름(제공자)별로 프로세스 전체에서 공유하는 집계 객체 반환"""
+    with _stats_lock:
+        if name not in _stats:
+            _stats[name] = PromptCacheStats()
+        return _stats[name]
@@ -0,0 +1,74 @@
+"""API 호출 속도 제한
+
+고정된 time.sleep 대신 토큰 버킷으로 호출 간격을 조절합니다.
+버킷은 프로세스 전체에서 공유되므로 여러 학생이 동시에 사용해도
+전체 호출 속도가 API 할당량을 넘지 않습니다.
+"""
+import threading
+import time
+
+# Drive API 쓰기 할당량 (사용자당 초당 약 3회의 지속적인 쓰기 권장)
+DRIVE_WRITE_RATE = 3.0
+DRIVE_WRITE_BURST = 10
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """토큰이 충분하면 바로 사용하고 True 반환"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """토큰을 사용할 수 있을 때까지 기다린 뒤 사용 (기다린 시간(초) 반환)
+
+        버킷 크기보다 많은 토큰을 요청하면 버킷 크기만큼씩 나누어 받습니다.
+        """
+        waited = 0.0
+        remaining = float(tokens)
+        while remaining > 0:
+            portion = min(remaining, self.capacity)
+            with self._lock:
+                self._refill()
+                if self._tokens >= portion:
+                    self._tokens -= portion
+                    remaining -= portion
+                    continue
+                delay = (portion - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(name, rate, capacity):
+    """이름별로 프로세스 전체에서 공유하는 토큰 버킷 반환"""
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(rate, capacity)
+        return _buckets[name]
+
+
+def drive_write_limiter():
+    """Drive 쓰기(댓글 작성 등) 요청용 공유 토큰 버킷"""
+    return get_rate_limiter('drive_write', DRIVE_WRITE_RATE, DRIVE_WRITE_BURST)
@@ -0,0 +1,295 @@
+"""Google/LLM API 호출 재시도와 엔드포인트별 적응형 동시 실행 제한
+
+- 429와 일시적인 서버 오류(5xx), 연결 오류는 지수 백오프(+무작위 지연)로 재시도하고,
+  서버가 Retry-After를 알려주면 그 시간만큼 기다립니다.
+- 다시 보내면 두 번 적용되는 쓰기(idempotent=False)는 서버가 처리하지 않은 것이 확실한
+  오류(429, 연결 거부)만 재시도합니다. 시간 초과나 5xx는 이미 적용되었을 수 있으므로
+  호출한 쪽에서 문서나 댓글을 다시 읽어 빠진 것만 보내야 합니다.
+- 엔드포인트마다 동시에 보낼 수 있는 요청 수를 AIMD 방식으로 조절합니다.
+  성공하면 조금씩(가산) 늘리고, 429나 과부하(529)를 받으면 절반으로(승산) 줄이므로
+  고정된 대기 시간 대신 실제로 남은 할당량에 맞춰 처리량이 움직입니다.
+- 스트리밍 응답은 held_call()로 다 읽을 때까지 자리를 차지하므로, 긴 스트림도 제한 안에서 돌고
+  읽는 도중에 받은 429·과부하 오류도 제한기에 반영됩니다.
+
+사용 예:
+    response = call_with_retry('openai', lambda: client.chat.completions.create(...))
+    response = await acall_with_retry('openai', lambda: async_client.chat.completions.create(...))
+    with held_call('anthropic', lambda: client.messages.stream(...).__enter__()) as stream:
+        for text in stream.text_stream: ...
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504, 529)
+
+# 할당량 초과나 과부하 (동시 실행 수를 줄여야 하는 오류, 529는 Anthropic 과부하)
+THROTTLED_STATUSES = (429, 529)
+
+# 스트림 도중 오류 이벤트로 받은 할당량 초과·과부하 (상태 코드가 200이라 본문의 오류 종류로 구분)
+THROTTLED_ERROR_TYPES = ('rate_limit_error', 'overloaded_error', 'rate_limit_exceeded')
+
+# 연결이 끊기거나 시간이 초과된 경우 (SDK마다 예외 클래스가 달라 이름으로 구분)
+RETRYABLE_ERROR_NAMES = (
+    'APIConnectionError', 'APITimeoutError', 'ConnectionError', 'TimeoutError', 'RemoteDisconnected',
+)
+
+# 엔드포인트별 (처음 동시 실행 수, 최소, 최대)
+ENDPOINT_LIMITS = {
+    'docs.read': (8, 1, 32),
+    'docs.write': (2, 1, 8),
+    'drive.read': (8, 1, 32),
+    'drive.comments': (2, 1, 8),
+    'anthropic': (6, 1, 32),
+    'openai': (8, 1, 64),
+}
+DEFAULT_LIMITS = (4, 1, 16)
+
+
+# 서버가 요청을 처리하지 않은 것이 확실한 경우 (쓰기 요청도 그대로 다시 보낼 수 있음)
+NOT_APPLIED_STATUSES = (429,)
+NOT_APPLIED_ERROR_NAMES = ('ConnectionRefusedError',)
+
+
+def status_code(error):
+    """예외의 HTTP 상태 코드 (없으면 None)"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """다시 시도하면 성공할 수 있는 오류인지"""
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_not_applied(error):
+    """서버가 요청을 처리하지 않은 것이 확실한 오류인지 (쓰기 요청을 다시 보내도 되는지)"""
+    status = status_code(error)
+    if status is not None:
+        return status in NOT_APPLIED_STATUSES
+    return any(cls.__name__ in NOT_APPLIED_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_outcome_unknown(error):
+    """일시적인 오류지만 서버가 요청을 이미 처리했을 수도 있는지 (시간 초과, 5xx, 연결 끊김)"""
+    return is_retryable(error) and not is_not_applied(error)
+
+
+def error_types(error):
+    """SDK 예외 본문의 오류 종류와 코드 ({'error': {'type', 'code'}} 또는 {'type', 'code'})"""
+    body = getattr(error, 'body', None)
+    if not isinstance(body, dict):
+        return ()
+    detail = body.get('error') if isinstance(body.get('error'), dict) else body
+    return tuple(value for value in (detail.get('type'), detail.get('code')) if isinstance(value, str))
+
+
+def is_throttled(error):
+    """할당량 초과나 과부하로 동시 실행 수를 줄여야 하는 오류인지"""
+    if status_code(error) in THROTTLED_STATUSES:
+        return True
+    return any(kind in THROTTLED_ERROR_TYPES for kind in error_types(error))
+
+
+def retry_after(error):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 반환 (없으면 None)"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers is None:
+        headers = getattr(error, 'resp', None)  # googleapiclient HttpError (httplib2.Response)
+    if headers is None:
+        return None
+    try:
+        milliseconds = headers.get('retry-after-ms')
+        value = headers.get('retry-after') or headers.get('Retry-After')
+    except AttributeError:
+        return None
+    if milliseconds:
+        try:
+            return max(0.0, float(milliseconds) / 1000)
+        except ValueError:
+            pass
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """지수 백오프 재시도 설정 (full jitter: 0 ~ 상한 사이 무작위 대기)"""
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, error=None):
+        """attempt번째(1부터) 실패 후 기다릴 시간"""
+        server_delay = retry_after(error) if error is not None else None
+        if server_delay is not None:
+            # 서버가 알려준 시간에 약간의 무작위 지연을 더해 동시에 몰리지 않도록 함
+            return min(self.max_delay, server_delay) + random.uniform(0, self.base_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+class AdaptiveLimiter:
+    """AIMD 방식으로 동시 실행 수를 조절하는 세마포어"""
+
+    def __init__(self, initial, minimum=1, maximum=16, decrease=0.5, cooldown=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # 동시에 받은 여러 429로 한꺼번에 줄어들지 않도록 cooldown마다 한 번만 감소
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                # 현재 한도만큼 성공하면 한도 +1
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """한 번의 요청 동안 자리를 차지 (yield한 dict의 'throttled'를 True로 하면 감소)"""
+        self.acquire()
+        outcome = {'throttled': False}
+        try:
+            yield outcome
+        finally:
+            self.release(outcome['throttled'])
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(endpoint):
+    """엔드포인트별로 프로세스 전체에서 공유하는 적응형 제한기"""
+    with _limiters_lock:
+        if endpoint not in _limiters:
+            initial, minimum, maximum = ENDPOINT_LIMITS.get(endpoint, DEFAULT_LIMITS)
+            _limiters[endpoint] = AdaptiveLimiter(initial, minimum, maximum)
+        return _limiters[endpoint]
+
+
+@contextmanager
+def held_call(endpoint, func, policy=DEFAULT_POLICY, span=None, idempotent=True):
+    """func()를 call_with_retry처럼 재시도하고, 결과를 쓰는 with 블록이 끝날 때까지 자리를 차지
+
+    스트림처럼 연 뒤에도 계속 읽어야 하는 응답에 씁니다. with 블록 안에서 난 오류는
+    재시도하지 않지만, 429·과부하 오류이면 제한기에 알려 동시 실행 수를 줄입니다.
+    """
+    can_retry = is_retryable if idempotent else is_not_applied
+    limiter = get_limiter(endpoint)
+    attempt = 0
+    while True:
+        attempt += 1
+        limiter.acquire()
+        try:
+            result = func()
+            break
+        except Exception as e:
+            limiter.release(is_throttled(e))
+            if attempt >= policy.max_attempts or not can_retry(e):
+                raise
+            error = e
+        if span is not None:
+            span.retries += 1
+        # 자리를 내놓은 뒤에 기다려야 다른 요청이 막히지 않음
+        time.sleep(policy.delay(attempt, error))
+
+    throttled = False
+    try:
+        yield result
+    except Exception as e:
+        throttled = is_throttled(e)
+        raise
+    finally:
+        limiter.release(throttled)
+
+
+def call_with_retry(endpoint, func, policy=DEFAULT_POLICY, span=None, idempotent=True):
+    """func()를 엔드포인트 동시 실행 제한 안에서 실행하고 일시적 오류는 재시도
+
+    span(metrics.Span)을 넘기면 재시도 횟수가 기록됩니다.
+    idempotent=False(다시 보내면 두 번 적용되는 쓰기)이면 is_not_applied 오류만 재시도합니다.
+    재시도할 수 없는 오류나 마지막 시도의 오류는 그대로 발생시킵니다.
+    """
+    with held_call(endpoint, func, policy, span, idempotent) as result:
+        return result
+
+
+async def _acquire_async(limiter):
+    """이벤트 루프를 막지 않고 제한기 자리 얻기 (기다리다 취소되면 나중에 얻은 자리를 반납)"""
+    waiter = asyncio.ensure_future(asyncio.to_thread(limiter.acquire))
+    try:
+        await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        waiter.add_done_callback(
+            lambda done: limiter.release() if not done.cancelled() and done.exception() is None else None
+        )
+        raise
+
+
+async def acall_with_retry(endpoint, func, policy=DEFAULT_POLICY, span=None):
+    """call_with_retry의 비동기 버전 (func()는 awaitable을 반환)
+
+    동시 실행 제한은 스레드와 함께 쓰는 같은 제한기를 사용하며,
+    자리가 날 때까지 이벤트 루프를 막지 않도록 별도 스레드에서 기다립니다.
+    """
+    limiter = get_limiter(endpoint)
+    attempt = 0
+    while True:
+        attempt += 1
+        await _acquire_async(limiter)
+        throttled = False
+        try:
+            return await func()
+        except Exception as e:
+            throttled = is_throttled(e)
+            if attempt >= policy.max_attempts or not is_retryable(e):
+                raise
+            error = e
+        finally:
+            limiter.release(throttled)
+        if span is not None:
+            span.retries += 1
+        await asyncio.sleep(policy.delay(attempt, error))
@@ -0,0 +1,85 @@
+"""공유 보고서 템플릿 문단 색인
+
+학생들은 모두 같은 템플릿 문서를 복사해서 보고서를 쓰므로, 안내 문구나 예시처럼
+템플릿에 있던 문단이 고치지 않은 채 그대로 남아 있는 경우가 많습니다.
+템플릿 문서의 문단 지문(fingerprint)을 한 번 모아 두고, 학생 문서에서 템플릿과
+똑같은 문단은 AI 분석과 문단별 평가 대상에서 뺍니다.
+
+- 지문은 공백 차이를 무시하므로 줄바꿈·띄어쓰기만 달라진 문단도 템플릿으로 봅니다
+- 짧은 문단(제목 등)은 글의 구조를 보여 주므로 템플릿과 같아도 남깁니다
+- 학생이 한 글자라도 고친 문단은 지문이 달라져 그대로 분석합니다
+
+템플릿 문서는 DEFAULT_TEMPLATE_DOC_IDS이며, 환경 변수(또는 secrets) TEMPLATE_DOC_IDS에
+쉼표로 구분한 문서 ID를 지정하면 그것으로 바꿉니다 (빈 값이면 사용하지 않음).
+"""
+from chunking import estimate_tokens
+from doc_extractor import DOCUMENT_FIELDS, extract_blocks
+from feedback_cache import normalize_text
+from paragraph_store import fingerprint
+from resilience import call_with_retry
+
+# 보고서 템플릿 (탐구 보고서 앱의 참고 자료에 연결된 문서)
+DEFAULT_TEMPLATE_DOC_IDS = ("1lvZ916Xo5WTw7Gzuvv3kXBbRvrV6PW9buDQWK5byCKU",)
+
+# 이보다 짧은 문단(정규화 후 글자 수)은 템플릿과 같아도 분석 대상에 남김
+DEFAULT_MIN_CHARS = 20
+
+
+def parse_doc_ids(value):
+    """쉼표로 구분한 문서 ID 목록 (None이면 기본 템플릿)"""
+    if value is None:
+        return DEFAULT_TEMPLATE_DOC_IDS
+    return tuple(doc_id.strip() for doc_id in value.split(',') if doc_id.strip())
+
+
+class TemplateIndex:
+    """템플릿 문단 지문 집합"""
+
+    def __init__(self, min_chars=DEFAULT_MIN_CHARS):
+        self.min_chars = min_chars
+        self.sources = []
+        self._fingerprints = set()
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def _eligible(self, text):
+        return len(normalize_text(text)) >= self.min_chars
+
+    def add_text(self, text):
+        if self._eligible(text):
+            self._fingerprints.add(fingerprint(text))
+
+    def add_document(self, document):
+        """documents().get 응답의 문단·표를 색인에 추가"""
+        for block in extract_blocks(document):
+            self.add_text(block['text'])
+        self.sources.append(document.get('title') or document.get('documentId'))
+
+    def is_template(self, text):
+        return self._eligible(text) and fingerprint(text) in self._fingerprints
+
+    def split(self, blocks):
+        """블록 목록을 (남길 블록, 템플릿 그대로인 블록)으로 나누기 (순서 유지)"""
+        kept = []
+        skipped = []
+        for block in blocks:
+            (skipped if self.is_template(block['text']) else kept).append(block)
+        return kept, skipped
+
+
+def skipped_tokens(blocks):
+    """건너뛴 블록의 추정 토큰 수"""
+    return sum(estimate_tokens(block['text']) for block in blocks)
+
+
+def build_template_index(docs_service, doc_ids, min_chars=DEFAULT_MIN_CHARS):
+    """템플릿 문서들을 읽어 색인 만들기 (읽기에 실패하면 예외를 그대로 발생)"""
+    index = TemplateIndex(min_chars)
+    for doc_id in doc_ids:
+        document = call_with_retry('docs.read', docs_service.documents().get(
+            documentId=doc_id,
+            fields=DOCUMENT_FIELDS
+        ).execute)
+        index.add_document(document)
+    return index
@@ -0,0 +1,177 @@
+"""AI 피드백 섹션 파서 테스트
+
+키워드 기반 대체 파서(parse_feedback_sections)는 키워드 목록을 하나의 정규식으로
+바꾸었으므로, 바꾸기 전의 키워드 반복문과 같은 결과를 내는지 예시 응답으로 비교합니다.
+스트리밍 파서는 섹션 제목이 조각 경계에서 잘려도 같은 섹션으로 나누는지 확인합니다.
+"""
+import pytest
+
+pytest.importorskip("streamlit")
+
+from benchmarks.bench_pipeline import load_research_app  # noqa: E402
+
+app = load_research_app()
+
+
+def baseline_parse_feedback_sections(feedback_text):
+    """정규식으로 바꾸기 전의 parse_feedback_sections (비교 기준)"""
+    sections = {
+        "전체 평가": "",
+        "구조와 논리성": "",
+        "내용의 충실성": "",
+        "학술적 글쓰기": "",
+        "창의성과 독창성": "",
+        "형식과 표현": "",
+        "추가 제안사항": ""
+    }
+
+    section_patterns = {
+        "구조와 논리성": ["구조", "논리", "체계", "서론", "본론", "결론", "흐름"],
+        "내용의 충실성": ["내용", "충실", "깊이", "자료", "근거", "탐구"],
+        "학술적 글쓰기": ["학술", "인용", "출처", "객관", "참고문헌"],
+        "창의성과 독창성": ["창의", "독창", "새로운", "관점", "비판적"],
+        "형식과 표현": ["형식", "표현", "문법", "맞춤법", "어휘"],
+        "추가 제안사항": ["제안", "추가", "향후", "개선", "보완"]
+    }
+
+    lines = feedback_text.split('\n')
+    current_section = "전체 평가"
+    section_changed = False
+
+    for line in lines:
+        line = line.strip()
+        if line:
+            section_changed = False
+            for section_name, keywords in section_patterns.items():
+                if (any(keyword in line.lower()[:20] for keyword in keywords) and
+                        (":" in line or any(char.isdigit() for char in line[:5]))):
+                    current_section = section_name
+                    section_changed = True
+                    break
+
+            if not section_changed or current_section == "전체 평가":
+                sections[current_section] += line + "\n"
+
+    result = {}
+    for k, v in sections.items():
+        content = v.strip()
+        if content:
+            if content.startswith(k):
+                content = content[len(k):].strip(": \n")
+            result[k] = content
+
+    return result
+
+
+NUMBERED = """전체 평가: 주제가 분명하고 탐구 과정이 잘 드러난 보고서입니다.
+
+1. 구조와 논리성 (25점): 서론과 본론의 연결이 자연스럽습니다.
+결론이 조금 짧습니다.
+2. 내용의 충실성 (30점): 실험 자료가 충분합니다.
+3. 학술적 글쓰기 (20점): 출처 표기가 일부 빠졌습니다.
+4. 창의성과 독창성 (15점): 새로운 관점이 돋보입니다.
+5. 형식과 표현 (10점): 맞춤법 오류가 몇 군데 있습니다.
+6. 추가 제안사항: 향후 표본을 늘려 보세요."""
+
+MARKDOWN = """## 전체 평가
+잘 정리된 보고서입니다. 점수: 82/100
+
+### **1. 구조와 논리성**
+- 문단 사이 흐름이 매끄럽습니다.
+### **2. 내용의 충실성**
+- 근거가 되는 자료를 더 보완하면 좋겠습니다.
+### **5. 형식과 표현**
+그림 번호가 빠졌습니다."""
+
+# 본문 줄에도 키워드와 ':'가 있어 섹션이 바뀌는 경우 (기존 동작 그대로 유지해야 함)
+KEYWORD_IN_BODY = """이 보고서는 전반적으로 우수합니다.
+구조: 체계적입니다.
+참고문헌 형식: APA를 따르세요.
+비판적 사고와 논리: 더 필요합니다.
+결론 부분 내용: 요약이 부족합니다.
+1) 개선할 점
+2) 추가로 볼 자료
+English Summary: Good structure."""
+
+# 한 줄에 여러 섹션의 키워드가 있으면 앞쪽 섹션이 우선
+OVERLAPPING = """표현과 구조: 문장이 깁니다.
+보완할 내용: 자료 출처를 밝히세요.
+새로운 형식 제안: 표를 활용하세요.
+관점 3가지: 다양합니다.
+앞부분 20자 이후에만 구조라는 말이 나오는 긴 줄입니다: 여기
+123 그냥 숫자로 시작하는 줄"""
+
+NO_HEADERS = """전체적으로 좋은 보고서입니다.
+특별히 고칠 점은 없습니다."""
+
+SAMPLES = [
+    ("번호 목록", NUMBERED),
+    ("마크다운 제목", MARKDOWN),
+    ("본문 키워드", KEYWORD_IN_BODY),
+    ("겹치는 키워드", OVERLAPPING),
+    ("제목 없음", NO_HEADERS),
+    ("빈 응답", ""),
+]
+
+
+@pytest.mark.parametrize("text", [sample[1] for sample in SAMPLES], ids=[sample[0] for sample in SAMPLES])
+def test_keyword_parser_matches_the_baseline_loop(text):
+    assert app.parse_feedback_sections(text) == baseline_parse_feedback_sections(text)
+
+
+@pytest.mark.parametrize("line", [
+    line.strip() for _, text in SAMPLES for line in text.split('\n') if line.strip()
+])
+def test_keyword_section_matches_the_baseline_line_by_line(line):
+    # 기준 파서에서 다음 줄이 들어간 섹션이 그 줄이 고른 섹션 (제목이 아니면 "전체 평가")
+    baseline = baseline_parse_feedback_sections(line + "\n끝")
+    expected = next(name for name, content in baseline.items() if content.endswith("끝"))
+
+    assert (app._keyword_section(line) or "전체 평가") == expected
+
+
+def test_keyword_parser_drops_header_lines_and_keeps_only_body_lines():
+    # 제목으로 판단된 줄은 그 뒤의 내용까지 버려짐: 첫 줄도 앞 20자 안에 "탐구"가 있어 제목으로 처리됨
+    assert app.parse_feedback_sections(NUMBERED) == {"구조와 논리성": "결론이 조금 짧습니다."}
+    assert app.parse_feedback_sections(NO_HEADERS) == {"전체 평가": NO_HEADERS}
+
+
+def parse_stream(chunks):
+    parser = app.StreamingSectionParser()
+    closed = []
+    for chunk in chunks:
+        closed.extend(parser.feed(chunk))
+    closed.extend(parser.close())
+    return closed, parser.sections
+
+
+def test_streaming_parser_splits_numbered_and_markdown_headers():
+    closed, sections = parse_stream([NUMBERED])
+
+    assert [name for name, _ in closed] == app.FEEDBACK_SECTIONS
+    assert sections["구조와 논리성"] == "서론과 본론의 연결이 자연스럽습니다.\n결론이 조금 짧습니다."
+    assert sections["추가 제안사항"] == "향후 표본을 늘려 보세요."
+
+    _, sections = parse_stream([MARKDOWN])
+    assert list(sections) == ["전체 평가", "구조와 논리성", "내용의 충실성", "형식과 표현"]
+    assert sections["구조와 논리성"] == "- 문단 사이 흐름이 매끄럽습니다."
+
+
+@pytest.mark.parametrize("text", [NUMBERED, MARKDOWN], ids=["번호 목록", "마크다운 제목"])
+def test_streaming_parser_handles_headers_split_across_chunks(text):
+    expected = parse_stream([text])
+
+    for cut in range(1, len(text)):
+        assert parse_stream([text[:cut], text[cut:]]) == expected, cut
+    # 한 글자씩 도착해도 같은 결과
+    assert parse_stream(list(text)) == expected
+
+
+def test_streaming_parser_closes_a_section_only_after_the_next_header_line_arrives():
+    parser = app.StreamingSectionParser()
+
+    assert parser.feed("1. 구조와 논리성: 흐름이 좋습니다.\n2. 내용의") == []
+    assert parser.current_text() == "흐름이 좋습니다.\n2. 내용의"
+    assert parser.feed(" 충실성 (30점): 자료가 충분합니다.\n") == [("구조와 논리성", "흐름이 좋습니다.")]
+    assert parser.current_section == "내용의 충실성"
+    assert parser.close() == [("내용의 충실성", "자료가 충분합니다.")]
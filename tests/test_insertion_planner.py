@@ -0,0 +1,211 @@
+"""insertion_planner의 위치 계산, 병합, 묶음 나누기, 재배치 테스트
+
+문서는 Google Docs처럼 1부터 시작하는 UTF-16 코드 단위 인덱스로 다룹니다.
+"""
+from insertion_planner import (
+    EDGE_END,
+    EDGE_START,
+    build_requests,
+    drop_applied,
+    leading_anchor,
+    plan_insertions,
+    relocate,
+    split_batches,
+    utf16_len,
+)
+
+
+def blocks_of(text):
+    """문서 텍스트를 줄(문단) 단위 블록으로 나누기 (start/end는 UTF-16 인덱스)"""
+    blocks = []
+    index = 1
+    for line in text.splitlines(keepends=True):
+        length = utf16_len(line)
+        if line.strip():
+            blocks.append({'text': line, 'start': index, 'end': index + length, 'kind': 'paragraph'})
+        index += length
+    return blocks
+
+
+def apply(text, requests):
+    """batchUpdate의 insertText 요청을 순서대로 적용한 문서 텍스트"""
+    units = text.encode('utf-16-le')
+    for request in requests:
+        if 'insertText' in request:
+            offset = (request['insertText']['location']['index'] - 1) * 2
+            units = units[:offset] + request['insertText']['text'].encode('utf-16-le') + units[offset:]
+    return units.decode('utf-16-le')
+
+
+def feedback_items(blocks, label="평가"):
+    """블록마다 끝에 붙일 피드백 항목"""
+    return [
+        {'index': block['end'], 'text': f"[{label} {n}]\n", 'anchor': (block['text'], EDGE_END)}
+        for n, block in enumerate(blocks, 1)
+    ]
+
+
+def test_utf16_len_counts_emoji_as_two_units():
+    assert utf16_len("가나다") == 3
+    assert utf16_len("😀") == 2
+    assert utf16_len("a😀b") == 4
+
+
+def test_plan_insertions_sorts_descending_and_merges_same_index_in_order():
+    items = [
+        {'index': 5, 'text': "A"},
+        {'index': 20, 'text': "B"},
+        {'index': 5, 'text': "C😀"},
+    ]
+    plan = plan_insertions(items)
+
+    assert [insertion['index'] for insertion in plan] == [20, 5]
+    assert plan[1]['text'] == "AC😀"
+    assert plan[1]['length'] == 4
+    assert [item['text'] for item in plan[1]['items']] == ["A", "C😀"]
+
+
+def test_insertions_after_emoji_land_at_paragraph_ends():
+    text = "첫 문단 😀 이모지\n둘째 👍🏽 문단\n셋째 문단\n"
+    blocks = blocks_of(text)
+    requests = build_requests(plan_insertions(feedback_items(blocks)))
+
+    assert apply(text, requests) == (
+        "첫 문단 😀 이모지\n[평가 1]\n둘째 👍🏽 문단\n[평가 2]\n셋째 문단\n[평가 3]\n"
+    )
+
+
+def test_build_requests_styles_the_utf16_range_of_each_insertion():
+    plan = plan_insertions([{'index': 7, 'text': "😀피드백\n"}])
+    requests = build_requests(plan, {'italic': True})
+
+    assert requests[0] == {'insertText': {'location': {'index': 7}, 'text': "😀피드백\n"}}
+    assert requests[1]['updateTextStyle']['range'] == {'startIndex': 7, 'endIndex': 7 + 6}
+    assert requests[1]['updateTextStyle']['fields'] == 'italic'
+
+
+def test_split_batches_keeps_descending_order_within_request_limit():
+    plan = plan_insertions([{'index': index, 'text': "x"} for index in range(1, 11)])
+    batches = split_batches(plan, requests_per_insertion=2, max_requests=6)
+
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    indices = [insertion['index'] for batch in batches for insertion in batch]
+    assert indices == sorted(indices, reverse=True)
+
+
+def test_split_batches_puts_oversized_insertion_alone():
+    plan = plan_insertions([
+        {'index': 30, 'text': "짧음"},
+        {'index': 20, 'text': "가" * 100},
+        {'index': 10, 'text': "짧음"},
+    ])
+    batches = split_batches(plan, max_bytes=50)
+
+    assert [[insertion['index'] for insertion in batch] for batch in batches] == [[30], [20], [10]]
+
+
+def test_batches_applied_one_after_another_match_a_single_request():
+    text = "".join(f"{n}번째 문단 😀\n" for n in range(1, 8))
+    blocks = blocks_of(text)
+    plan = plan_insertions(feedback_items(blocks))
+
+    single = apply(text, build_requests(plan))
+    batched = text
+    for batch in split_batches(plan, max_requests=4):
+        batched = apply(batched, build_requests(batch))
+
+    assert batched == single
+
+
+def test_leading_anchor_skips_a_table_at_the_start():
+    """표지·학생 정보 표로 시작하는 문서: 표 시작 위치가 아니라 표 다음 첫 문단 앞에 넣음"""
+    blocks = [
+        {'text': "이름 | 김OO\n학번 | 10101\n", 'start': 2, 'end': 40, 'kind': 'table'},
+        {'text': "서론 😀\n", 'start': 41, 'end': 46, 'kind': 'paragraph'},
+        {'text': "본론\n", 'start': 46, 'end': 49, 'kind': 'paragraph'},
+    ]
+
+    index, anchor = leading_anchor(blocks)
+
+    assert index == 41
+    assert anchor == ("서론 😀\n", EDGE_START)
+    moved, missing = relocate([{'index': index, 'text': "[전체 평가]\n", 'anchor': anchor}], blocks)
+    assert missing == [] and moved[0]['index'] == 41
+
+
+def test_leading_anchor_uses_the_first_paragraph_or_the_end_of_a_table():
+    text = "첫 문단\n둘째 문단\n"
+    assert leading_anchor(blocks_of(text)) == (1, ("첫 문단\n", EDGE_START))
+
+    tables = [{'text': "가 | 나\n", 'start': 2, 'end': 12, 'kind': 'table'}]
+    assert leading_anchor(tables) == (12, ("가 | 나\n", EDGE_END))
+
+
+def test_relocate_follows_anchor_to_its_new_position():
+    text = "첫 문단\n둘째 문단\n"
+    items = feedback_items(blocks_of(text))
+    edited = "학생이 추가한 😀 문단\n첫 문단\n둘째 문단\n"
+
+    moved, missing = relocate(items, blocks_of(edited))
+
+    assert missing == []
+    assert apply(edited, build_requests(plan_insertions(moved))) == (
+        "학생이 추가한 😀 문단\n첫 문단\n[평가 1]\n둘째 문단\n[평가 2]\n"
+    )
+
+
+def test_relocate_picks_nearest_duplicate_and_reports_missing_anchor():
+    text = "반복\n가운데\n반복\n사라질 문단\n"
+    blocks = blocks_of(text)
+    items = [
+        {'index': blocks[2]['start'], 'text': "[뒤쪽 반복]\n", 'anchor': (blocks[2]['text'], EDGE_START)},
+        {'index': blocks[3]['end'], 'text': "[사라짐]\n", 'anchor': (blocks[3]['text'], EDGE_END)},
+    ]
+    edited = "반복\n가운데 😀\n반복\n"
+
+    moved, missing = relocate(items, blocks_of(edited))
+
+    assert [item['text'] for item in missing] == ["[사라짐]\n"]
+    assert moved[0]['index'] == blocks_of(edited)[2]['start']
+
+
+def test_drop_applied_ignores_whitespace_and_partial_lines():
+    document = blocks_of("본문\n[AI 평가 - 섹션 1 평가]\n좋은   글입니다.\n-----\n")
+    items = [
+        {'index': 1, 'text': "\n\n[AI 평가 - 섹션 1 평가]\n좋은 글입니다.\n-----\n"},
+        {'index': 1, 'text': "\n\n[AI 평가 - 섹션 1 평가]\n다른 피드백\n-----\n"},
+        {'index': 1, 'text': "AI 평가 - 섹션 1 평가]\n"},
+    ]
+
+    remaining, applied = drop_applied(items, document)
+
+    assert applied == [items[0]]
+    assert remaining == items[1:]
+
+
+def test_conflict_after_an_applied_batch_does_not_insert_twice():
+    """앞 묶음이 적용된 뒤 학생이 문서를 고쳐 충돌한 경우: 적용된 피드백은 빼고 남은 것만 새 위치에"""
+    text = "".join(f"{n}번째 문단 😀\n" for n in range(1, 5))
+    items = [
+        {**item, 'text': f"\n[AI 평가 - 섹션 {n}]\n피드백 {n}\n-----\n"}
+        for n, item in enumerate(feedback_items(blocks_of(text)), 1)
+    ]
+    batches = split_batches(plan_insertions(items), max_requests=4)
+    assert len(batches) == 2
+
+    # 첫 묶음(뒤쪽 두 문단)은 적용되었지만 응답을 받지 못했고, 그 사이 학생이 맨 앞에 문단을 추가함
+    document = "새로 쓴 문단\n" + apply(text, build_requests(batches[0]))
+
+    # 충돌 후 다시 계획: 모든 남은 항목(적용된 첫 묶음 포함)을 다시 읽은 문서 기준으로
+    blocks = blocks_of(document)
+    remaining = [item for batch in batches for insertion in batch for item in insertion['items']]
+    remaining, applied = drop_applied(remaining, blocks)
+    moved, missing = relocate(remaining, blocks)
+    for batch in split_batches(plan_insertions(moved), max_requests=4):
+        document = apply(document, build_requests(batch))
+
+    assert len(applied) == 2 and missing == []
+    for n in range(1, 5):
+        assert document.count(f"[AI 평가 - 섹션 {n}]") == 1
+        assert f"{n}번째 문단 😀\n\n[AI 평가 - 섹션 {n}]\n피드백 {n}\n" in document
+    assert document.startswith("새로 쓴 문단\n1번째 문단 😀\n")
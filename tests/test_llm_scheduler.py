@@ -0,0 +1,136 @@
+"""llm_scheduler.ProviderScheduler의 마감 순서, 큰 요청 처리, 정산 테스트
+
+예산은 주입한 시계로 채우므로 실제로 1분을 기다리지 않습니다. 기다리는 요청은
+시계를 움직인 뒤 깨워야 바로 다시 확인합니다.
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_scheduler import (
+    BATCH_TARGET_SECONDS,
+    INTERACTIVE_TARGET_SECONDS,
+    ProviderScheduler,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(tpm, rpm=0):
+    clock = FakeClock()
+    return ProviderScheduler('test', rpm, tpm, clock=clock), clock
+
+
+def advance(scheduler, clock, seconds):
+    """시계를 움직이고 기다리는 요청들을 깨움"""
+    clock.now += seconds
+    with scheduler._cond:
+        scheduler._cond.notify_all()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "시간 안에 조건을 만족하지 못했습니다"
+        time.sleep(0.01)
+
+
+def test_interactive_request_goes_ahead_of_earlier_batch_request():
+    # 분당 600토큰 = 초당 10토큰
+    scheduler, clock = make_scheduler(tpm=600)
+    first = scheduler.acquire(300, 300)
+    assert first.waited == 0
+    granted = []
+
+    def request(name, target):
+        scheduler.acquire(50, 50, deadline=time.time() + target)
+        granted.append(name)
+
+    batch = threading.Thread(target=request, args=('batch', BATCH_TARGET_SECONDS))
+    batch.start()
+    wait_until(lambda: scheduler.stats()['waiting'] == 1)
+    interactive = threading.Thread(target=request, args=('interactive', INTERACTIVE_TARGET_SECONDS))
+    interactive.start()
+    wait_until(lambda: scheduler.stats()['waiting'] == 2)
+
+    # 100토큰이 채워지면 마감이 이른 화면 요청만 나감
+    advance(scheduler, clock, 10)
+    wait_until(lambda: granted == ['interactive'])
+    assert scheduler.stats()['waiting'] == 1
+
+    advance(scheduler, clock, 10)
+    wait_until(lambda: granted == ['interactive', 'batch'])
+    batch.join(1)
+    interactive.join(1)
+    assert scheduler.stats()['queued'] == 2
+
+
+def test_request_larger_than_the_bucket_is_charged_at_capacity():
+    scheduler, _ = make_scheduler(tpm=1000)
+
+    # 버킷보다 큰 요청도 가득 찬 버킷에서 바로 나감 (그렇지 않으면 영원히 기다림)
+    ticket = scheduler.acquire(4000, 1000)
+    assert ticket.waited == 0
+    assert scheduler.in_flight_tokens == 1000
+    # 버킷이 비었으므로 다음 요청 100토큰은 6초(분당 1000토큰) 기다려야 함
+    assert scheduler.estimate_wait(100) == pytest.approx(6.0)
+
+
+def test_settle_refunds_unused_tokens_from_usage():
+    scheduler, _ = make_scheduler(tpm=1000)
+    ticket = scheduler.acquire(200, 800)
+    assert scheduler.estimate_wait(100) == pytest.approx(6.0)
+
+    ticket.usage = SimpleNamespace(input_tokens=200, output_tokens=300)
+    scheduler.settle(ticket)
+
+    stats = scheduler.stats()
+    assert stats['refunded_tokens'] == 500
+    assert scheduler.in_flight_tokens == 0
+    # 실제로 쓴 비율(0.5)을 향해 이동 평균이 움직임
+    assert stats['usage_ratio'] == pytest.approx(0.9)
+    assert scheduler.estimate_wait(500) == 0
+
+
+def test_settle_without_usage_refunds_only_the_output_estimate():
+    scheduler, _ = make_scheduler(tpm=1000)
+    ticket = scheduler.acquire(200, 300)
+
+    scheduler.settle(ticket)
+
+    stats = scheduler.stats()
+    assert stats['refunded_tokens'] == 300
+    assert stats['usage_ratio'] == 1.0
+    assert scheduler.estimate_wait(800) == 0
+    assert scheduler.estimate_wait(900) == pytest.approx(6.0)
+
+
+def test_settle_with_more_usage_than_reserved_takes_the_difference():
+    scheduler, _ = make_scheduler(tpm=1000)
+    ticket = scheduler.acquire(100, 100)
+
+    ticket.usage = SimpleNamespace(input_tokens=150, output_tokens=250)
+    scheduler.settle(ticket)
+
+    assert scheduler.stats()['refunded_tokens'] == -200
+    assert scheduler.estimate_wait(600) == 0
+    assert scheduler.estimate_wait(700) == pytest.approx(6.0)
+
+
+def test_budget_refills_with_the_injected_clock():
+    scheduler, clock = make_scheduler(tpm=600)
+    scheduler.acquire(600, 0)
+    assert scheduler.estimate_wait(100) == pytest.approx(10.0)
+
+    clock.now += 4
+    assert scheduler.estimate_wait(100) == pytest.approx(6.0)
+    clock.now += 120
+    assert scheduler.estimate_wait(600) == 0
@@ -0,0 +1,54 @@
+"""프롬프트 캐시 사용량 집계와 앱 공통 system 블록의 캐시 가능 길이 테스트
+
+대역(benchmarks.fakes)도 실제 API와 같은 최소 길이(MIN_CACHEABLE_TOKENS)를 넘는
+앞부분만 캐시한 것으로 보고합니다.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from benchmarks.fakes import FakeAnthropic, FakeBackend, FakeOpenAI
+from chunking import estimate_tokens
+from prompt_cache import MIN_CACHEABLE_TOKENS, PromptCacheStats, usage_tokens
+
+LONG_SYSTEM = "평가 기준을 자세히 설명합니다. " * 200
+SHORT_SYSTEM = "짧은 지시"
+
+
+def test_usage_tokens_reads_both_providers():
+    anthropic = SimpleNamespace(input_tokens=100, cache_read_input_tokens=1200, cache_creation_input_tokens=0)
+    openai = SimpleNamespace(prompt_tokens=1300, prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+
+    assert usage_tokens(anthropic) == (1300, 1200, 0)
+    assert usage_tokens(openai) == (1300, 1024, 0)
+    assert usage_tokens(None) == (0, 0, 0)
+
+
+def hit_rate(client, model, system, calls=3):
+    stats = PromptCacheStats()
+    for n in range(calls):
+        result = llm_client.complete(model, [{"role": "user", "content": f"문서 {n}"}],
+                                     system=system, max_tokens=100, client=client)
+        stats.record(result.usage)
+    return stats.snapshot()['hit_rate']
+
+
+@pytest.mark.parametrize("client, model", [
+    (FakeAnthropic, "claude-3-5-sonnet-20241022"),
+    (FakeOpenAI, "gpt-4o-mini"),
+])
+def test_shared_system_prefix_is_cached_only_above_threshold(client, model):
+    assert estimate_tokens(LONG_SYSTEM) >= MIN_CACHEABLE_TOKENS > estimate_tokens(SHORT_SYSTEM)
+
+    assert hit_rate(client(FakeBackend()), model, LONG_SYSTEM) > 0.5
+    assert hit_rate(client(FakeBackend()), model, SHORT_SYSTEM) == 0.0
+
+
+def test_app_system_prompts_are_long_enough_to_cache():
+    """두 앱이 모든 작업에 함께 쓰는 system 블록이 캐시 최소 길이를 넘는지 (앱 의존성이 있을 때만)"""
+    pytest.importorskip("streamlit")
+    from benchmarks.bench_pipeline import load_genre_app, load_research_app
+
+    assert estimate_tokens(load_research_app().FEEDBACK_SYSTEM_PROMPT) >= MIN_CACHEABLE_TOKENS
+    assert estimate_tokens(load_genre_app().GENRE_SYSTEM_PROMPT) >= MIN_CACHEABLE_TOKENS
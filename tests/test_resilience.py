@@ -0,0 +1,273 @@
+"""resilience의 재시도 판단, Retry-After 처리, AIMD 동시 실행 제한 테스트
+
+쓰기 요청(idempotent=False)을 잘못 재시도하면 댓글이나 피드백이 두 번 들어가므로
+오류 종류마다 어떻게 판단하는지 확인합니다.
+"""
+import email.utils
+import threading
+import time
+
+import anthropic
+import httplib2
+import httpx
+import openai
+import pytest
+from googleapiclient.errors import HttpError
+
+import llm_client
+from benchmarks.fakes import FakeAnthropic, FakeBackend
+from resilience import (
+    AdaptiveLimiter,
+    RetryPolicy,
+    call_with_retry,
+    get_limiter,
+    held_call,
+    is_not_applied,
+    is_outcome_unknown,
+    is_retryable,
+    is_throttled,
+    retry_after,
+    status_code,
+)
+
+NO_WAIT = RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=0.0)
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/messages")
+
+
+def http_error(status, headers=None):
+    """googleapiclient가 Google API 오류 응답에 발생시키는 예외"""
+    return HttpError(httplib2.Response({'status': status, **(headers or {})}), b'{}')
+
+
+def sdk_error(cls, status, headers=None):
+    """Anthropic/OpenAI SDK의 상태 코드 오류"""
+    return cls("오류", response=httpx.Response(status, headers=headers or {}, request=REQUEST), body=None)
+
+
+# (설명, 오류, 재시도 가능, 처리되지 않은 것이 확실, 적용 여부 모름)
+CASES = [
+    ("Google 429", http_error(429), True, True, False),
+    ("Google 503", http_error(503), True, False, True),
+    ("Google 500", http_error(500), True, False, True),
+    ("Google 408", http_error(408), True, False, True),
+    ("Google 400", http_error(400), False, False, False),
+    ("Google 403", http_error(403), False, False, False),
+    ("Google 404", http_error(404), False, False, False),
+    ("Anthropic 429", sdk_error(anthropic.RateLimitError, 429), True, True, False),
+    ("Anthropic 500", sdk_error(anthropic.InternalServerError, 500), True, False, True),
+    ("Anthropic 400", sdk_error(anthropic.BadRequestError, 400), False, False, False),
+    ("Anthropic 529 과부하", sdk_error(anthropic.OverloadedError, 529), True, False, True),
+    ("OpenAI 429", sdk_error(openai.RateLimitError, 429), True, True, False),
+    ("OpenAI 502", sdk_error(openai.InternalServerError, 502), True, False, True),
+    ("Anthropic 시간 초과", anthropic.APITimeoutError(request=REQUEST), True, False, True),
+    ("Anthropic 연결 오류", anthropic.APIConnectionError(request=REQUEST), True, False, True),
+    ("OpenAI 시간 초과", openai.APITimeoutError(request=REQUEST), True, False, True),
+    ("소켓 시간 초과", TimeoutError(), True, False, True),
+    ("연결 끊김", ConnectionResetError(), True, False, True),
+    ("연결 거부", ConnectionRefusedError(), True, True, False),
+    ("알 수 없는 오류", ValueError("잘못된 값"), False, False, False),
+]
+
+
+@pytest.mark.parametrize("error, retryable, not_applied, unknown",
+                         [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_error_classification(error, retryable, not_applied, unknown):
+    assert is_retryable(error) is retryable
+    assert is_not_applied(error) is not_applied
+    assert is_outcome_unknown(error) is unknown
+
+
+def test_status_code_from_google_and_sdk_errors():
+    assert status_code(http_error(503)) == 503
+    assert status_code(sdk_error(anthropic.RateLimitError, 429)) == 429
+    assert status_code(ValueError()) is None
+    assert is_throttled(http_error(429)) and not is_throttled(http_error(503))
+    assert is_throttled(sdk_error(anthropic.OverloadedError, 529))
+
+
+def mid_stream_error(error_type):
+    """스트림 도중 받은 오류 이벤트 (응답 상태는 이미 200)"""
+    return anthropic.APIStatusError("스트림 오류", response=httpx.Response(200, request=REQUEST),
+                                    body={'type': error_type, 'message': "스트림 오류"})
+
+
+def test_mid_stream_overload_and_rate_limit_are_throttling_but_not_retried():
+    assert is_throttled(mid_stream_error('overloaded_error'))
+    assert is_throttled(mid_stream_error('rate_limit_error'))
+    assert not is_throttled(mid_stream_error('api_error'))
+    assert not is_retryable(mid_stream_error('overloaded_error'))
+
+
+def test_retry_after_seconds_milliseconds_and_http_date():
+    assert retry_after(http_error(429, {'retry-after': '7'})) == 7.0
+    assert retry_after(sdk_error(anthropic.RateLimitError, 429, {'retry-after': '3'})) == 3.0
+    assert retry_after(sdk_error(openai.RateLimitError, 429, {'retry-after-ms': '1500', 'retry-after': '9'})) == 1.5
+
+    date = email.utils.formatdate(time.time() + 20, usegmt=True)
+    assert 15 <= retry_after(sdk_error(openai.RateLimitError, 429, {'retry-after': date})) <= 20
+
+    assert retry_after(sdk_error(openai.RateLimitError, 429, {'retry-after': 'soon'})) is None
+    assert retry_after(http_error(429)) is None
+    assert retry_after(TimeoutError()) is None
+
+
+def test_retry_policy_waits_for_retry_after_up_to_max_delay():
+    policy = RetryPolicy(base_delay=0.5, max_delay=10.0)
+
+    assert 4.0 <= policy.delay(1, http_error(429, {'retry-after': '4'})) <= 4.5
+    assert 10.0 <= policy.delay(1, http_error(429, {'retry-after': '120'})) <= 10.5
+    assert all(0.0 <= policy.delay(3, http_error(503)) <= 2.0 for _ in range(50))
+
+
+def flaky(errors, result="완료"):
+    """errors를 차례로 발생시킨 뒤 result를 반환하는 함수와 호출 횟수"""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return func, calls
+
+
+def test_idempotent_call_retries_transient_errors():
+    func, calls = flaky([http_error(503), anthropic.APITimeoutError(request=REQUEST)])
+
+    assert call_with_retry('test.read', func, policy=NO_WAIT) == "완료"
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("error", [
+    http_error(503), http_error(500), anthropic.APITimeoutError(request=REQUEST), TimeoutError(),
+], ids=["503", "500", "sdk timeout", "socket timeout"])
+def test_write_is_not_retried_when_it_may_have_been_applied(error):
+    func, calls = flaky([error])
+
+    with pytest.raises(type(error)):
+        call_with_retry('test.write', func, policy=NO_WAIT, idempotent=False)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("error", [http_error(429), ConnectionRefusedError()], ids=["429", "refused"])
+def test_write_is_retried_when_it_was_certainly_not_applied(error):
+    func, calls = flaky([error])
+
+    assert call_with_retry('test.write', func, policy=NO_WAIT, idempotent=False) == "완료"
+    assert len(calls) == 2
+
+
+def test_non_retryable_and_last_attempt_errors_are_raised():
+    func, calls = flaky([http_error(403)])
+    with pytest.raises(HttpError):
+        call_with_retry('test.read', func, policy=NO_WAIT)
+    assert len(calls) == 1
+
+    func, calls = flaky([http_error(503)] * 5)
+    with pytest.raises(HttpError):
+        call_with_retry('test.read', func, policy=NO_WAIT)
+    assert len(calls) == NO_WAIT.max_attempts
+
+
+def test_retries_are_counted_on_the_span():
+    class Span:
+        retries = 0
+
+    span = Span()
+    func, _ = flaky([http_error(429), http_error(429)])
+    call_with_retry('test.read', func, policy=NO_WAIT, span=span)
+    assert span.retries == 2
+
+
+def test_limiter_increases_additively_and_halves_on_throttle_once_per_cooldown():
+    limiter = AdaptiveLimiter(4, minimum=1, maximum=5, cooldown=60.0)
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == pytest.approx(5.0, abs=0.1)
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+    halved = limiter.limit
+    assert halved == pytest.approx(limiter.maximum * 0.5, abs=0.5)
+
+    # 같은 cooldown 안의 429는 한 번만 반영
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == halved
+
+
+def test_limiter_respects_minimum_and_maximum():
+    limiter = AdaptiveLimiter(2, minimum=1, maximum=3, cooldown=0.0)
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(throttled=True)
+    assert limiter.limit == 1
+
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 3
+
+
+def test_limiter_blocks_beyond_the_current_limit():
+    limiter = AdaptiveLimiter(1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def second():
+        limiter.acquire()
+        acquired.set()
+    threading.Thread(target=second, daemon=True).start()
+
+    assert not acquired.wait(0.1)
+    limiter.release()
+    assert acquired.wait(1.0)
+
+
+def test_throttled_call_shrinks_the_endpoint_limit():
+    limiter = get_limiter('test.throttle')
+    before = limiter.limit
+    func, _ = flaky([http_error(429)])
+
+    call_with_retry('test.throttle', func, policy=NO_WAIT)
+
+    assert limiter.limit < before
+    assert limiter.in_flight == 0
+
+
+def test_held_call_keeps_the_slot_until_the_block_ends():
+    limiter = get_limiter('test.stream')
+    func, calls = flaky([http_error(503)], result="스트림")
+
+    with held_call('test.stream', func, policy=NO_WAIT) as stream:
+        assert stream == "스트림" and len(calls) == 2
+        assert limiter.in_flight == 1
+    assert limiter.in_flight == 0
+
+
+def test_held_call_reports_throttling_raised_while_reading():
+    limiter = get_limiter('test.stream-overload')
+    before = limiter.limit
+
+    with pytest.raises(anthropic.APIStatusError):
+        with held_call('test.stream-overload', lambda: "스트림", policy=NO_WAIT):
+            raise mid_stream_error('overloaded_error')
+
+    assert limiter.limit < before
+    assert limiter.in_flight == 0
+
+
+def test_stream_text_holds_the_provider_slot_while_streaming():
+    limiter = get_limiter('anthropic')
+    stream = llm_client.stream_text("claude-3-5-sonnet-20241022", [{"role": "user", "content": "보고서"}],
+                                    system="지시", max_tokens=100, client=FakeAnthropic(FakeBackend()))
+
+    next(stream)
+    assert limiter.in_flight == 1
+    stream.close()
+    assert limiter.in_flight == 0
+
+    assert ''.join(llm_client.stream_text("claude-3-5-sonnet-20241022", [{"role": "user", "content": "보고서"}],
+                                          system="지시", max_tokens=100, client=FakeAnthropic(FakeBackend())))
+    assert limiter.in_flight == 0
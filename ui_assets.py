@@ -0,0 +1,165 @@
+"""두 앱의 고정 화면 요소 (CSS, 사용 안내, 푸터)
+
+Streamlit은 위젯을 조작할 때마다 앱 스크립트를 처음부터 다시 실행합니다.
+바뀌지 않는 긴 HTML/CSS 문자열은 이 모듈에 두어 프로세스에서 한 번만 만들고,
+앱은 실행할 때마다 만들어 둔 문자열을 그대로 출력합니다.
+"""
+
+# 두 앱이 함께 쓰는 스타일 (제목, 결과 상자)
+_BASE_CSS = """
+    .main-header {
+        text-align: center;
+        color: #2E86AB;
+        font-size: 2.5rem;
+        margin-bottom: %(header_margin)s;
+        font-weight: bold;
+    }
+    .sub-header {
+        text-align: center;
+        color: #666;
+        font-size: 1.2rem;
+        margin-bottom: 2rem;
+    }
+    .success-box {
+        background-color: #d4edda;
+        color: #155724;
+        padding: 1.5rem;
+        border-radius: 10px;
+        border-left: 5px solid #28a745;
+        margin: 1rem 0;
+    }
+    .warning-box {
+        background-color: #fff3cd;
+        color: #856404;
+        padding: 1.5rem;
+        border-radius: 10px;
+        border-left: 5px solid #ffc107;
+        margin: 1rem 0;
+    }
+    .error-box {
+        background-color: #f8d7da;
+        color: #721c24;
+        padding: 1.5rem;
+        border-radius: 10px;
+        border-left: 5px solid #dc3545;
+        margin: 1rem 0;
+    }
+"""
+
+# 연구 보고서 피드백 앱 (app.py)
+RESEARCH_CSS = "<style>" + _BASE_CSS % {'header_margin': "2rem"} + """
+    .stButton > button {
+        background-color: #2E86AB;
+        color: white;
+        border-radius: 10px;
+        border: none;
+        padding: 0.75rem 2rem;
+        font-weight: bold;
+        font-size: 1.1rem;
+        width: 100%;
+    }
+</style>
+"""
+
+RESEARCH_HEADER = (
+    '<h1 class="main-header">📝 연구 보고서 AI 피드백 시스템</h1>'
+    '<p class="sub-header">구글 문서 링크를 입력하면 AI가 상세한 피드백을 댓글로 달아드립니다</p>'
+)
+
+RESEARCH_USAGE = """
+### 📖 사용 방법
+1. **구글 문서 준비**: 연구 보고서를 구글 문서로 작성
+2. **공유 설정**: "링크가 있는 모든 사용자 - 댓글 작성자" 권한 설정
+3. **링크 입력**: 아래에 구글 문서 링크 붙여넣기
+4. **분석 시작**: "피드백 분석 시작" 버튼 클릭
+5. **결과 확인**: 구글 문서에 추가된 댓글 확인 및 활용
+"""
+
+RESEARCH_LINKS = """
+### 🔗 참고 자료
+- [📋 탐구 보고서 계획서](https://docs.google.com/document/d/1aAUtsWK8daVP1TVnd9Zn_WE-FNvG8a2FaXXWzL2oPt4/edit?usp=sharing)
+- [📖 보고서 작성 가이드](https://docs.google.com/document/d/16PuheEpWW8l6bbHwLCYCbeMpti_lk59qlqLYzxsRjD4/edit?usp=sharing)
+- [💡 예시 주제 목록](https://docs.google.com/document/d/1SvYyqBKpvOUNGfGTHs_xdGfs5TK3ppdDnnZeyM3Aw-E/edit?usp=sharing)
+- [📄 보고서 템플릿](https://docs.google.com/document/d/1lvZ916Xo5WTw7Gzuvv3kXBbRvrV6PW9buDQWK5byCKU/edit?usp=sharing)
+"""
+
+RESEARCH_FOOTER = """
+<div style="text-align: center; color: #666; margin-top: 2rem; padding: 1rem; background-color: #f8f9fa; border-radius: 10px;">
+    <p><strong>🏫 완도고등학교</strong></p>
+    <p>📧 개발: 국어교사 공지훈 | 💡 이 도구는 완도고등학교 학생들의 연구 보고서 작성을 돕기 위해 개발되었습니다</p>
+    <p><small>⚠️ AI 피드백은 참고용이며, 최종 판단은 학생과 교사가 함께 해야 합니다</small></p>
+</div>
+"""
+
+# 장르별 글쓰기 평가 앱 (app(os.ver).py)
+GENRE_CSS = "<style>" + _BASE_CSS % {'header_margin': "1rem"} + """
+    .info-box {
+        background-color: #d1ecf1;
+        color: #0c5460;
+        padding: 1.5rem;
+        border-radius: 10px;
+        border-left: 5px solid #17a2b8;
+        margin: 1rem 0;
+    }
+    .step-box {
+        background-color: #f8f9fa;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 0.5rem 0;
+        border: 1px solid #dee2e6;
+    }
+    .feedback-section {
+        background-color: #f8f9fa;
+        padding: 2rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+        border: 1px solid #dee2e6;
+    }
+</style>
+"""
+
+GENRE_HEADER = (
+    '<h1 class="main-header">📝 AI 글쓰기 평가 시스템</h1>'
+    '<p class="sub-header">Google Docs 문서에 AI가 장르별 맞춤 평가를 제공합니다</p>'
+)
+
+GENRE_GUIDE = """
+### 🚀 빠른 시작 가이드
+
+<div class='step-box'>
+<b>1단계: Google Docs 문서 준비</b>
+<ul>
+<li>평가받고 싶은 Google Docs 문서를 준비합니다</li>
+<li>문서를 열고 우측 상단의 '공유' 버튼을 클릭합니다</li>
+<li>'링크 복사'를 클릭하거나, 특정 사용자에게 '편집자' 권한을 부여합니다</li>
+<li><b>중요:</b> 이 앱의 서비스 계정에 '편집자' 권한이 있어야 피드백을 추가할 수 있습니다</li>
+</ul>
+</div>
+
+<div class='step-box'>
+<b>2단계: 글의 장르 선택</b>
+<ul>
+<li>감상문: 독서감상문, 영화감상문 등</li>
+<li>비평문: 문학비평, 예술비평 등</li>
+<li>보고서: 실험보고서, 조사보고서 등</li>
+<li>소논문: 학술적 논문, 연구논문 등</li>
+<li>논설문: 주장과 논거를 담은 글</li>
+</ul>
+</div>
+
+<div class='step-box'>
+<b>3단계: 평가 요청</b>
+<ul>
+<li>Google Docs URL을 입력하고 '평가 요청' 버튼을 클릭합니다</li>
+<li>AI가 문서를 분석하고 장르별 구조적 원리에 따라 평가합니다</li>
+<li>평가 결과가 문서에 직접 삽입됩니다</li>
+</ul>
+</div>
+"""
+
+GENRE_FOOTER = """
+<div style='text-align: center; color: #888;'>
+    <p>Powered by GPT-4o-mini & Google Docs API | 교육 목적으로 제작됨</p>
+    <p>피드백은 문서 내에 파란색 배경으로 표시됩니다</p>
+</div>
+"""